@@ -0,0 +1,94 @@
+"""compact dcf_valuations.outputs projections and equity bridge
+
+Revision ID: 1dd9d8da6874
+Revises: 3275872e9443
+Create Date: 2026-10-17 11:48:05.612734
+
+Converts stored outputs to format_version 2 (see app/services/dcf_outputs.py):
+projections become a struct of arrays and the equity bridge a numeric vector.
+Readers accept both versions, so this can run while the app is serving.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1dd9d8da6874"
+down_revision: Union[str, None] = "3275872e9443"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copies of the field orders at the time of this migration
+PROJECTION_FIELDS = (
+    "year",
+    "growth_rate",
+    "revenue",
+    "ebit",
+    "ebit_after_tax",
+    "reinvestment_rate",
+    "reinvestment",
+    "fcff",
+    "beta",
+    "cost_of_equity",
+    "debt_ratio",
+    "wacc",
+    "roc",
+    "pv_factor",
+    "pv_fcff",
+)
+
+BRIDGE_FIELDS = (
+    "enterprise_value",
+    "plus_cash",
+    "minus_debt",
+    "minus_minority_interests",
+    "minus_preferred_stock",
+    "equity_value",
+    "shares_outstanding",
+    "value_per_share",
+)
+
+
+def upgrade() -> None:
+    columns = ", ".join(
+        f"'{field}', COALESCE((SELECT jsonb_agg(p.elem->'{field}' ORDER BY p.ord) "
+        f"FROM jsonb_array_elements(outputs->'projections') "
+        f"WITH ORDINALITY AS p(elem, ord)), '[]'::jsonb)"
+        for field in PROJECTION_FIELDS
+    )
+    bridge = ", ".join(f"outputs->'equity_bridge'->'{f}'" for f in BRIDGE_FIELDS)
+    op.execute(
+        f"""
+        UPDATE dcf_valuations SET outputs = outputs || jsonb_build_object(
+            'format_version', 2,
+            'projections', jsonb_build_object({columns}),
+            'equity_bridge', jsonb_build_array({bridge})
+        )
+        WHERE NOT outputs ? 'format_version'
+        """
+    )
+
+
+def downgrade() -> None:
+    bridge = ", ".join(
+        f"'{f}', outputs->'equity_bridge'->{i}" for i, f in enumerate(BRIDGE_FIELDS)
+    )
+    row = ", ".join(
+        f"'{f}', outputs->'projections'->'{f}'->i" for f in PROJECTION_FIELDS
+    )
+    op.execute(
+        f"""
+        UPDATE dcf_valuations SET outputs = (outputs - 'format_version')
+            || jsonb_build_object(
+                'projections', COALESCE((
+                    SELECT jsonb_agg(jsonb_build_object({row}) ORDER BY i)
+                    FROM generate_series(
+                        0, jsonb_array_length(outputs->'projections'->'year') - 1
+                    ) AS i
+                ), '[]'::jsonb),
+                'equity_bridge', jsonb_build_object({bridge})
+            )
+        WHERE (outputs->>'format_version')::int = 2
+        """
+    )
@@ -0,0 +1,95 @@
+"""add dcf_valuations summary columns and covering list index
+
+Revision ID: 3275872e9443
+Revises: 6c3349f99a5e
+Create Date: 2026-10-17 11:03:27.540918
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3275872e9443"
+down_revision: Union[str, None] = "6c3349f99a5e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _bounded(path: str, precision: int, scale: int) -> str:
+    """
+    SQL for a JSON number as NUMERIC(precision, scale), NULL if the column
+    cannot hold it (as DCFService._summary_columns does at save time), so
+    one out-of-range legacy row cannot abort the backfill with an overflow.
+    """
+    value = f"({path})::numeric"
+    return (
+        f"CASE WHEN abs(round({value}, {scale})) < 10^{precision - scale} "
+        f"THEN {value} END"
+    )
+
+
+def upgrade() -> None:
+    op.add_column(
+        "dcf_valuations", sa.Column("scenario", sa.String(length=20), nullable=True)
+    )
+    op.add_column(
+        "dcf_valuations",
+        sa.Column("value_per_share", sa.Numeric(precision=14, scale=4), nullable=True),
+    )
+    op.add_column(
+        "dcf_valuations",
+        sa.Column("implied_upside", sa.Numeric(precision=12, scale=6), nullable=True),
+    )
+    op.add_column(
+        "dcf_valuations",
+        sa.Column("wacc", sa.Numeric(precision=8, scale=6), nullable=True),
+    )
+    op.add_column(
+        "dcf_valuations",
+        sa.Column("terminal_growth", sa.Numeric(precision=8, scale=6), nullable=True),
+    )
+
+    # Backfill from the outputs JSONB written by DCFService._format_result
+    value_per_share = _bounded("outputs->>'value_per_share'", 14, 4)
+    implied_upside = _bounded("outputs->>'implied_upside'", 12, 6)
+    wacc = _bounded("outputs->'computed_inputs'->>'wacc'", 8, 6)
+    terminal_growth = _bounded("outputs->'terminal'->>'terminal_growth'", 8, 6)
+    op.execute(
+        f"""
+        UPDATE dcf_valuations SET
+            scenario = outputs->>'scenario',
+            value_per_share = {value_per_share},
+            implied_upside = {implied_upside},
+            wacc = {wacc},
+            terminal_growth = {terminal_growth}
+        """
+    )
+
+    op.create_index(
+        "ix_dcf_valuations_user_stock_saved_computed",
+        "dcf_valuations",
+        ["user_id", "stock_id", "is_saved", "computed_at"],
+        unique=False,
+        postgresql_include=[
+            "id",
+            "run_name",
+            "scenario",
+            "value_per_share",
+            "implied_upside",
+            "source_fiscal_date",
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_dcf_valuations_user_stock_saved_computed", table_name="dcf_valuations"
+    )
+    op.drop_column("dcf_valuations", "terminal_growth")
+    op.drop_column("dcf_valuations", "wacc")
+    op.drop_column("dcf_valuations", "implied_upside")
+    op.drop_column("dcf_valuations", "value_per_share")
+    op.drop_column("dcf_valuations", "scenario")
@@ -0,0 +1,45 @@
+"""add ttm_snapshots
+
+Revision ID: 4e7a9c2d1b86
+Revises: 9b4e2f7a1c53
+Create Date: 2026-10-17 16:20:41.903215
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "4e7a9c2d1b86"
+down_revision: Union[str, None] = "9b4e2f7a1c53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Starts empty: a read miss writes its snapshot back and statement upserts
+    # rebuild it. Run `python -m scripts.rebuild_ttm_snapshots` after
+    # upgrading to build every snapshot up front.
+    op.create_table(
+        "ttm_snapshots",
+        sa.Column("stock_id", sa.BigInteger(), nullable=False),
+        sa.Column("income_date", sa.Date(), nullable=True),
+        sa.Column("balance_sheet_date", sa.Date(), nullable=True),
+        sa.Column("cash_flow_date", sa.Date(), nullable=True),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["stock_id"], ["stocks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("stock_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ttm_snapshots")
@@ -0,0 +1,30 @@
+"""add dcf_valuations.fingerprint
+
+Revision ID: 6c3349f99a5e
+Revises: 057f02f41cd7
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "6c3349f99a5e"
+down_revision: Union[str, None] = "057f02f41cd7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows keep NULL and are recomputed on their next read.
+    op.add_column(
+        "dcf_valuations",
+        sa.Column("fingerprint", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("dcf_valuations", "fingerprint")
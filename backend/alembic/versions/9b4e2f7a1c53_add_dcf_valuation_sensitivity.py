@@ -0,0 +1,32 @@
+"""add dcf_valuations.sensitivity
+
+Revision ID: 9b4e2f7a1c53
+Revises: 1dd9d8da6874
+Create Date: 2026-10-17 13:05:22.480917
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4e2f7a1c53"
+down_revision: Union[str, None] = "1dd9d8da6874"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing default rows keep NULL; the surfaces are computed (and the
+    # default re-persisted) on the next sensitivity read.
+    op.add_column(
+        "dcf_valuations",
+        sa.Column("sensitivity", postgresql.JSONB(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("dcf_valuations", "sensitivity")
@@ -0,0 +1,114 @@
+"""add financial_facts
+
+Revision ID: c81f3a5e7d20
+Revises: 4e7a9c2d1b86
+Create Date: 2026-10-17 18:02:13.557104
+
+Creates the canonical fact table written at ingest (see
+app/services/financial_facts.py), backfills it from existing statement
+JSONB and clears ttm_snapshots so cached TTMs are rebuilt with facts.
+Until they are, every TTM read takes the slow path: run
+`python -m scripts.rebuild_ttm_snapshots` after upgrading.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c81f3a5e7d20"
+down_revision: Union[str, None] = "4e7a9c2d1b86"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of the alias table at the time of this migration
+FACT_ALIASES = {
+    "income": {
+        "revenue": ("revenue", "total_revenue"),
+        "cost_of_revenue": ("cost_of_revenue", "cost_of_goods_sold"),
+        "gross_profit": ("gross_profit",),
+        "operating_income": ("operating_income", "ebit"),
+        "pretax_income": ("income_before_tax", "pretax_income"),
+        "income_tax": ("income_tax_expense", "tax_provision"),
+        "interest_expense": ("interest_expense",),
+        "net_income": ("net_income", "net_income_applicable_to_common_shares"),
+    },
+    "cash_flow": {
+        "capex": ("capital_expenditure", "capital_expenditures"),
+        "depreciation": ("depreciation_and_amortization", "depreciation"),
+    },
+    "balance_sheet": {
+        "total_assets": ("total_assets",),
+        "total_equity": (
+            "total_shareholders_equity",
+            "stockholders_equity",
+            "total_equity",
+        ),
+        "total_debt": ("total_debt",),
+        "current_assets": ("current_assets",),
+        "current_liabilities": ("current_liabilities",),
+        "inventory": ("inventory",),
+        "cash": ("cash_and_cash_equivalents", "cash_and_short_term_investments"),
+        "shares_outstanding": ("shares_outstanding", "common_shares_outstanding"),
+        "minority_interest": ("minority_interest",),
+    },
+}
+
+_NUMBER = r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$"
+
+
+def _num(key: str) -> str:
+    return f"CASE WHEN data->>'{key}' ~ '{_NUMBER}' THEN (data->>'{key}')::numeric END"
+
+
+def _resolve(aliases) -> str:
+    """First non-zero alias, else a zero if any alias holds one."""
+    nonzero = ", ".join(f"NULLIF({_num(a)}, 0)" for a in aliases)
+    return f"COALESCE({nonzero}, {', '.join(_num(a) for a in aliases)})"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "financial_facts",
+        sa.Column("statement_id", sa.BigInteger(), nullable=False),
+        sa.Column("fact", sa.String(length=40), nullable=False),
+        sa.Column("value", sa.Numeric(precision=24, scale=4), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["statement_id"], ["financial_statements.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("statement_id", "fact"),
+    )
+    op.create_index("ix_financial_facts_fact", "financial_facts", ["fact"])
+
+    for statement_type, facts in FACT_ALIASES.items():
+        for fact, aliases in facts.items():
+            value = _resolve(aliases)
+            if fact == "total_debt":
+                short = _resolve(("short_term_debt",))
+                long = _resolve(("long_term_debt",))
+                value = (
+                    f"CASE WHEN COALESCE({value}, 0) = 0 AND "
+                    f"(COALESCE({short}, 0) <> 0 OR COALESCE({long}, 0) <> 0) "
+                    f"THEN COALESCE({short}, 0) + COALESCE({long}, 0) "
+                    f"ELSE {value} END"
+                )
+            op.execute(
+                f"""
+                INSERT INTO financial_facts (statement_id, fact, value)
+                SELECT id, '{fact}', v FROM (
+                    SELECT id, {value} AS v FROM financial_statements
+                    WHERE statement_type = '{statement_type}'
+                ) s
+                WHERE v IS NOT NULL
+                """
+            )
+
+    # Cached TTMs predate facts; rebuild with scripts.rebuild_ttm_snapshots
+    op.execute("DELETE FROM ttm_snapshots")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_financial_facts_fact", table_name="financial_facts")
+    op.drop_table("financial_facts")
+    op.execute("DELETE FROM ttm_snapshots")
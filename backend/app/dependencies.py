@@ -1,3 +1,4 @@
+from app.services.dcf_revaluation import DefaultRevaluator
 from app.services.fred import FredClient
 from app.services.fred_scheduler import FredScheduler
 from app.services.twelvedata import TwelveDataClient
@@ -7,6 +8,7 @@ twelvedata_client: TwelveDataClient = None
 fred_client: FredClient = None
 ws_manager: TwelveDataWSManager = None
 fred_scheduler: FredScheduler = None
+dcf_revaluator: DefaultRevaluator = None
 
 
 def get_twelvedata() -> TwelveDataClient:
@@ -23,3 +25,7 @@ def get_ws_manager() -> TwelveDataWSManager:
 
 def get_fred_scheduler() -> FredScheduler:
     return fred_scheduler
+
+
+def get_dcf_revaluator() -> DefaultRevaluator:
+    return dcf_revaluator
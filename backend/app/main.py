@@ -12,6 +12,7 @@ from app.models.dashboard import DashboardTicker
 from app.routers import auth, dashboard, dcf, portfolio, stocks, utility
 from app.services.fred import FredClient
 from app.services.fred_scheduler import FredScheduler
+from app.services.dcf_revaluation import DefaultRevaluator
 from app.services.damodaran_seed import seed_damodaran_data
 from app.services.glossary_service import seed_glossary
 from app.services.seed import seed_dashboard_tickers
@@ -41,11 +42,16 @@ async def startup():
     deps.twelvedata_client = TwelveDataClient(settings.TWELVE_DATA_API_KEY)
     deps.fred_client = FredClient(settings.FRED_API_KEY)
 
+    # Background refresh of default DCF valuations when their inputs change
+    deps.dcf_revaluator = DefaultRevaluator(session_factory=async_session)
+
     # Seed dashboard tickers + Damodaran reference data
     async with async_session() as session:
         await seed_dashboard_tickers(session)
     async with async_session() as session:
-        await seed_damodaran_data(session)
+        seeded = await seed_damodaran_data(session)
+    if seeded["changed"]:
+        deps.dcf_revaluator.notify("damodaran_update")
     async with async_session() as session:
         await seed_glossary(session)
 
@@ -67,7 +73,9 @@ async def startup():
 
     # FRED scheduler — daily fetch + in-memory cache
     deps.fred_scheduler = FredScheduler(
-        client=deps.fred_client, session_factory=async_session
+        client=deps.fred_client,
+        session_factory=async_session,
+        on_rate_change=lambda: deps.dcf_revaluator.notify("new_dgs10"),
     )
     await deps.fred_scheduler.start()
 
@@ -76,6 +84,8 @@ async def startup():
 async def shutdown():
     if deps.fred_scheduler:
         deps.fred_scheduler.stop()
+    if deps.dcf_revaluator:
+        deps.dcf_revaluator.stop()
     if deps.ws_manager:
         await deps.ws_manager.stop()
     if deps.twelvedata_client:
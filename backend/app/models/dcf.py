@@ -125,11 +125,38 @@ class DcfValuation(Base):
     is_saved: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     inputs: Mapped[dict] = mapped_column(JSONB, nullable=False)
     outputs: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Precomputed WACC x growth surfaces, default valuations only
+    sensitivity: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+
+    # Headline results copied out of `outputs` so listings skip the JSONB
+    scenario: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    value_per_share: Mapped[Optional[str]] = mapped_column(
+        Numeric(14, 4), nullable=True
+    )
+    implied_upside: Mapped[Optional[str]] = mapped_column(Numeric(12, 6), nullable=True)
+    wacc: Mapped[Optional[str]] = mapped_column(Numeric(8, 6), nullable=True)
+    terminal_growth: Mapped[Optional[str]] = mapped_column(Numeric(8, 6), nullable=True)
 
     __table_args__ = (
         Index("ix_dcf_valuations_stock_default", "stock_id", "is_default"),
         Index("ix_dcf_valuations_stock_user", "stock_id", "user_id"),
         Index("ix_dcf_valuations_user_saved", "user_id", "is_saved"),
+        Index(
+            "ix_dcf_valuations_user_stock_saved_computed",
+            "user_id",
+            "stock_id",
+            "is_saved",
+            "computed_at",
+            postgresql_include=[
+                "id",
+                "run_name",
+                "scenario",
+                "value_per_share",
+                "implied_upside",
+                "source_fiscal_date",
+            ],
+        ),
     )
 
 
@@ -13,7 +13,7 @@ from sqlalchemy import (
     UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 from app.models import Base
@@ -51,6 +51,11 @@ class FinancialStatement(Base):
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
 
+    # Never lazy-loaded: readers that need facts use selectinload()
+    facts: Mapped[list["FinancialFact"]] = relationship(
+        lazy="raise", passive_deletes=True
+    )
+
     __table_args__ = (
         UniqueConstraint(
             "stock_id",
@@ -69,6 +74,42 @@ class FinancialStatement(Base):
     )
 
 
+class FinancialFact(Base):
+    """Canonical numeric line item resolved from a statement's JSONB at
+    ingest (see app/services/financial_facts.py)."""
+
+    __tablename__ = "financial_facts"
+
+    statement_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("financial_statements.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    fact: Mapped[str] = mapped_column(String(40), primary_key=True)
+    value: Mapped[str] = mapped_column(Numeric(24, 4), nullable=False)
+
+    __table_args__ = (Index("ix_financial_facts_fact", "fact"),)
+
+
+class TtmSnapshot(Base):
+    """Cached TTMService output, one row per stock. Rebuilt whenever the
+    stock's quarterly statements are upserted; the *_date columns record the
+    latest quarter of each statement type the snapshot was built from."""
+
+    __tablename__ = "ttm_snapshots"
+
+    stock_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("stocks.id", ondelete="CASCADE"), primary_key=True
+    )
+    income_date: Mapped[Optional[str]] = mapped_column(Date, nullable=True)
+    balance_sheet_date: Mapped[Optional[str]] = mapped_column(Date, nullable=True)
+    cash_flow_date: Mapped[Optional[str]] = mapped_column(Date, nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    computed_at: Mapped[str] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
 class PriceHistory(Base):
     __tablename__ = "price_history"
 
@@ -1,30 +1,61 @@
 """DCF valuation endpoints."""
 
+import asyncio
+import logging
+from contextlib import suppress
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Header,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.database import get_session
+from app.database import async_session, get_session
 from app.schemas.dcf import (
+    DCFBatchRequest,
+    DCFBatchResponse,
     DCFConstraintsResponse,
     DCFEligibilityError,
+    DCFHistoryResponse,
     DCFOverrides,
+    DCFRunComparisonResponse,
     DCFRunDetailResponse,
     DCFRunListResponse,
     DCFSaveRequest,
     DCFSummaryResponse,
+    ImpliedValueResponse,
+    MAX_COMPARE_RUNS,
+    ScenarioComparisonResponse,
+    SensitivityGridRequest,
+    SensitivityGridResponse,
     SensitivityResponse,
+    SimulationResponse,
+    TornadoResponse,
     SectorContextResponse,
 )
+from app.services.dcf_engine import MAX_FORECAST_YEARS, MIN_FORECAST_YEARS
+from app.services.dcf_export import EXPORT_MEDIA_TYPES, export_chunks
 from app.services.dcf_service import (
     DCFEligibilityError as ServiceEligibilityError,
     DCFService,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/dcf", tags=["dcf"])
 
+# Cache handles carried on DCFOverrides that are not driver overrides
+_CACHE_TOKENS = {"snapshot_token", "stage_token"}
+
 
 def _get_user_id(x_user_id: Optional[str] = Header(None)) -> Optional[str]:
     """Extract user ID from header. In production this would come from Clerk JWT."""
@@ -48,7 +79,11 @@ async def get_constraints():
     """Return slider constraint rules (from code config, not DB)."""
     return DCFConstraintsResponse(
         data={
-            "forecast_years": {"min": 5, "max": 10, "default": 10},
+            "forecast_years": {
+                "min": MIN_FORECAST_YEARS,
+                "max": MAX_FORECAST_YEARS,
+                "default": 10,
+            },
             "stable_growth_rate": {
                 "min": -0.02,
                 "max": "risk_free_rate",
@@ -62,6 +97,85 @@ async def get_constraints():
     )
 
 
+# ------------------------------------------------------------------
+# POST /api/dcf/batch — many symbols / override sets in one call
+# ------------------------------------------------------------------
+
+
+@router.post("/batch")
+async def compute_batch(
+    body: DCFBatchRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    """Value many (symbol, overrides, scenario) items; errors are per item."""
+    service = DCFService(session)
+    try:
+        results = await service.compute_batch(
+            [
+                {
+                    "symbol": item.symbol,
+                    "overrides": item.overrides.model_dump(
+                        exclude_none=True, exclude=_CACHE_TOKENS
+                    ),
+                    "scenario": item.scenario,
+                }
+                for item in body.items
+            ]
+        )
+    except ServiceEligibilityError as e:
+        # Shared market data (e.g. the risk-free rate) is missing
+        raise HTTPException(
+            status_code=422,
+            detail=DCFEligibilityError(reason=e.reason, detail=e.detail).model_dump(),
+        )
+
+    now = datetime.now(timezone.utc).isoformat()
+    return DCFBatchResponse(data=results, data_as_of=now)
+
+
+# ------------------------------------------------------------------
+# GET /api/dcf/runs/export — stream many runs as CSV or JSON Lines
+# ------------------------------------------------------------------
+
+
+@router.get("/runs/export")
+async def export_runs(
+    symbols: Optional[str] = Query(None, description="Comma-separated; all if omitted"),
+    format: str = Query("csv", pattern="^(csv|jsonl)$"),
+    scope: str = Query("saved", pattern="^(saved|default)$"),
+    user_id: Optional[str] = Depends(_get_user_id),
+):
+    """Stream the user's saved runs, or every default valuation, with full detail.
+
+    ``scope=saved`` requires authentication.  The body is produced while
+    rows are read from a server-side cursor, so it opens its own session:
+    request-scoped dependencies are closed before streaming starts.
+    """
+    if scope == "saved" and not user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    symbol_list = (
+        [s.strip().upper() for s in symbols.split(",") if s.strip()]
+        if symbols
+        else None
+    )
+
+    async def body():
+        async with async_session() as session:
+            records = DCFService(session).export_runs(
+                symbol_list, user_id if scope == "saved" else None
+            )
+            async for chunk in export_chunks(records, format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f"attachment; filename=dcf_runs_{scope}.{format}"
+        },
+    )
+
+
 # ------------------------------------------------------------------
 # GET /api/dcf/{symbol}/default — system-computed baseline valuation
 # ------------------------------------------------------------------
@@ -108,8 +222,10 @@ async def compute_custom(
         service = DCFService(session)
         result = await service.compute_custom(
             symbol=symbol,
-            overrides=overrides.model_dump(exclude_none=True),
+            overrides=overrides.model_dump(exclude_none=True, exclude=_CACHE_TOKENS),
             scenario=overrides.scenario,
+            snapshot_token=overrides.snapshot_token,
+            stage_token=overrides.stage_token,
         )
     except ServiceEligibilityError as e:
         raise HTTPException(
@@ -121,6 +237,145 @@ async def compute_custom(
     return {"data": result, "data_as_of": now}
 
 
+# ------------------------------------------------------------------
+# WS /api/dcf/{symbol}/live — streamed slider recomputes
+# ------------------------------------------------------------------
+
+
+def _changed_fields(previous: dict, current: dict) -> dict:
+    """Top-level fields of `current` that differ from `previous`."""
+    return {k: v for k, v in current.items() if previous.get(k, object()) != v}
+
+
+@router.websocket("/{symbol}/live")
+async def live_valuation(
+    websocket: WebSocket,
+    symbol: str,
+    session: AsyncSession = Depends(get_session),
+):
+    """Stream custom DCF recomputes while the user drags sliders.
+
+    The client sends partial ``DCFOverrides`` objects; they are merged into
+    the connection's override set (an explicit ``null`` clears a field).
+    Bursts are coalesced: only the latest merged set is computed once the
+    previous push is done.  The first push is ``{"type": "valuation"}`` with
+    the full result; later pushes are ``{"type": "delta"}`` with only the
+    fields that changed.  Input data is gathered once per connection via
+    the service's snapshot token, and the connection keeps its own stage
+    graphs so only the stages an override touches rerun.
+    """
+    await websocket.accept()
+    service = DCFService(session)
+
+    overrides: dict = {}
+    # Stage graphs live as long as this connection and are never shared
+    stage_graphs: dict = {}
+    try:
+        previous = await service.compute_custom(
+            symbol=symbol, overrides={}, stage_graphs=stage_graphs
+        )
+    except ServiceEligibilityError as e:
+        await websocket.send_json(
+            {"type": "error", "reason": e.reason, "detail": e.detail}
+        )
+        await websocket.close(code=1008)
+        return
+    await websocket.send_json({"type": "valuation", "data": previous})
+
+    pending = asyncio.Event()
+
+    async def push_updates() -> None:
+        nonlocal previous
+        try:
+            while True:
+                await pending.wait()
+                pending.clear()
+                current = {k: v for k, v in overrides.items() if v is not None}
+                try:
+                    result = await service.compute_custom(
+                        symbol=symbol,
+                        overrides=current,
+                        scenario=current.get("scenario"),
+                        snapshot_token=previous.get("snapshot_token"),
+                        stage_graphs=stage_graphs,
+                    )
+                except ServiceEligibilityError as e:
+                    await websocket.send_json(
+                        {"type": "error", "reason": e.reason, "detail": e.detail}
+                    )
+                    continue
+                delta = _changed_fields(previous, result)
+                previous = result
+                await websocket.send_json({"type": "delta", "data": delta})
+        except Exception:
+            # Without a pusher nobody answers the client; close so it can
+            # reconnect instead of waiting on a silent socket
+            logger.exception("Live valuation push failed for %s", symbol)
+            with suppress(Exception):
+                await websocket.close(code=1011)
+
+    pusher = asyncio.create_task(push_updates())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            # Malformed JSON (or a binary frame) is a validation error too,
+            # answered with an error frame instead of dropping the connection
+            frame = message.get("text")
+            if frame is None:
+                frame = (message.get("bytes") or b"").decode("utf-8", "replace")
+            try:
+                partial = DCFOverrides.model_validate_json(frame)
+            except ValidationError as e:
+                await websocket.send_json(
+                    {
+                        "type": "error",
+                        "reason": "invalid_overrides",
+                        "detail": e.errors(include_url=False, include_context=False),
+                    }
+                )
+                continue
+            overrides.update(
+                partial.model_dump(exclude_unset=True, exclude=_CACHE_TOKENS)
+            )
+            pending.set()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pusher.cancel()
+
+
+# ------------------------------------------------------------------
+# GET /api/dcf/{symbol}/scenarios — scenario presets side by side
+# ------------------------------------------------------------------
+
+
+@router.get("/{symbol}/scenarios")
+async def get_scenarios(
+    symbol: str,
+    scenarios: str = Query(
+        "conservative,moderate,optimistic",
+        pattern="^(conservative|moderate|optimistic)(,(conservative|moderate|optimistic))*$",
+    ),
+    session: AsyncSession = Depends(get_session),
+):
+    """Value the requested scenario presets (comma-separated) side by side."""
+    try:
+        service = DCFService(session)
+        result = await service.get_scenarios(
+            symbol, scenarios=tuple(dict.fromkeys(scenarios.split(",")))
+        )
+    except ServiceEligibilityError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=DCFEligibilityError(reason=e.reason, detail=e.detail).model_dump(),
+        )
+
+    now = datetime.now(timezone.utc).isoformat()
+    return ScenarioComparisonResponse(data=result, data_as_of=now)
+
+
 # ------------------------------------------------------------------
 # POST /api/dcf/{symbol}/save — auth: save custom run with name
 # ------------------------------------------------------------------
@@ -140,7 +395,9 @@ async def save_run(
             symbol=symbol,
             user_id=user_id,
             run_name=body.run_name,
-            overrides=body.overrides.model_dump(exclude_none=True),
+            overrides=body.overrides.model_dump(
+                exclude_none=True, exclude=_CACHE_TOKENS
+            ),
         )
     except ServiceEligibilityError as e:
         raise HTTPException(
@@ -172,6 +429,41 @@ async def list_runs(
     return DCFRunListResponse(data=runs)
 
 
+# ------------------------------------------------------------------
+# GET /api/dcf/{symbol}/runs/compare — auth: align runs + attribution
+# (declared before /runs/{run_id} so "compare" is not parsed as an id)
+# ------------------------------------------------------------------
+
+
+@router.get("/{symbol}/runs/compare")
+async def compare_runs(
+    symbol: str,
+    ids: str = Query(..., description="Comma-separated run ids; the first is the base"),
+    user_id: str = Depends(_require_user_id),
+    session: AsyncSession = Depends(get_session),
+):
+    """Compare saved runs: aligned projections and a value attribution waterfall."""
+    try:
+        run_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be integers")
+    if len(set(run_ids)) != len(run_ids):
+        raise HTTPException(status_code=422, detail="ids must be distinct")
+    if not 2 <= len(run_ids) <= MAX_COMPARE_RUNS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Compare between 2 and {MAX_COMPARE_RUNS} runs",
+        )
+
+    try:
+        service = DCFService(session)
+        result = await service.compare_runs(symbol, run_ids, user_id)
+    except ServiceEligibilityError as e:
+        raise HTTPException(status_code=404, detail=e.detail)
+
+    return DCFRunComparisonResponse(data=result)
+
+
 # ------------------------------------------------------------------
 # GET /api/dcf/{symbol}/runs/{run_id} — auth: get specific saved run
 # ------------------------------------------------------------------
@@ -251,12 +543,13 @@ async def get_sector_context(
 @router.get("/{symbol}/sensitivity")
 async def get_sensitivity(
     symbol: str,
+    density: str = Query("standard", pattern="^(standard|dense)$"),
     session: AsyncSession = Depends(get_session),
 ):
-    """Compute WACC vs growth rate sensitivity matrix."""
+    """WACC vs growth rate sensitivity matrix (0.5% or, if dense, 0.1% steps)."""
     try:
         service = DCFService(session)
-        matrix = await service.get_sensitivity(symbol)
+        matrix = await service.get_sensitivity(symbol, density=density)
     except ServiceEligibilityError as e:
         raise HTTPException(
             status_code=422,
@@ -266,6 +559,136 @@ async def get_sensitivity(
     return SensitivityResponse(data=matrix)
 
 
+# ------------------------------------------------------------------
+# POST /api/dcf/{symbol}/sensitivity — N-dimensional sensitivity grid
+# ------------------------------------------------------------------
+
+
+@router.post("/{symbol}/sensitivity")
+async def get_sensitivity_grid(
+    symbol: str,
+    body: SensitivityGridRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    """Compute value per share over a grid of two or three inputs."""
+    try:
+        service = DCFService(session)
+        grid = await service.get_sensitivity_grid(
+            symbol,
+            axes=[axis.model_dump() for axis in body.axes],
+            resolution=body.resolution,
+        )
+    except ServiceEligibilityError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=DCFEligibilityError(reason=e.reason, detail=e.detail).model_dump(),
+        )
+
+    return SensitivityGridResponse(data=grid)
+
+
+# ------------------------------------------------------------------
+# GET /api/dcf/{symbol}/implied — reverse DCF (market-implied input)
+# ------------------------------------------------------------------
+
+
+@router.get("/{symbol}/implied")
+async def get_implied(
+    symbol: str,
+    solve_for: str = Query(
+        ..., pattern="^(stable_growth_rate|expected_growth|stable_roc|wacc)$"
+    ),
+    low: Optional[float] = Query(None),
+    high: Optional[float] = Query(None),
+    session: AsyncSession = Depends(get_session),
+):
+    """Solve for the input value at which the DCF matches the current price."""
+    try:
+        service = DCFService(session)
+        result = await service.get_implied(symbol, solve_for, low=low, high=high)
+    except ServiceEligibilityError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=DCFEligibilityError(reason=e.reason, detail=e.detail).model_dump(),
+        )
+
+    return ImpliedValueResponse(data=result)
+
+
+# ------------------------------------------------------------------
+# GET /api/dcf/{symbol}/tornado — input impact ranking
+# ------------------------------------------------------------------
+
+
+@router.get("/{symbol}/tornado")
+async def get_tornado(
+    symbol: str,
+    shock: float = Query(0.10, gt=0, le=0.5),
+    session: AsyncSession = Depends(get_session),
+):
+    """Value-per-share change for a +/- shock in every input, ranked by impact."""
+    try:
+        service = DCFService(session)
+        result = await service.get_tornado(symbol, shock=shock)
+    except ServiceEligibilityError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=DCFEligibilityError(reason=e.reason, detail=e.detail).model_dump(),
+        )
+
+    return TornadoResponse(data=result)
+
+
+# ------------------------------------------------------------------
+# GET /api/dcf/{symbol}/simulation — Monte Carlo value distribution
+# ------------------------------------------------------------------
+
+
+@router.get("/{symbol}/simulation")
+async def get_simulation(
+    symbol: str,
+    draws: int = Query(10_000, ge=100, le=100_000),
+    distribution: str = Query("normal", pattern="^(normal|uniform|triangular)$"),
+    seed: Optional[int] = Query(None),
+    bins: int = Query(40, ge=5, le=200),
+    growth_sd: Optional[float] = Query(None, ge=0, le=0.05),
+    beta_sd: Optional[float] = Query(None, ge=0, le=1),
+    roc_sd: Optional[float] = Query(None, ge=0, le=0.2),
+    erp_sd: Optional[float] = Query(None, ge=0, le=0.05),
+    tax_sd: Optional[float] = Query(None, ge=0, le=0.2),
+    session: AsyncSession = Depends(get_session),
+):
+    """Sample stable-state assumptions and return the value-per-share distribution."""
+    spreads = {
+        name: value
+        for name, value in (
+            ("stable_growth_rate", growth_sd),
+            ("stable_beta", beta_sd),
+            ("stable_roc", roc_sd),
+            ("equity_risk_premium", erp_sd),
+            ("marginal_tax_rate", tax_sd),
+        )
+        if value is not None
+    }
+    try:
+        service = DCFService(session)
+        result = await service.run_simulation(
+            symbol,
+            draws=draws,
+            spreads=spreads,
+            distribution=distribution,
+            seed=seed,
+            bins=bins,
+        )
+    except ServiceEligibilityError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=DCFEligibilityError(reason=e.reason, detail=e.detail).model_dump(),
+        )
+
+    return SimulationResponse(data=result)
+
+
 # ------------------------------------------------------------------
 # GET /api/dcf/{symbol}/summary — plain-English valuation summary
 # ------------------------------------------------------------------
@@ -289,6 +712,30 @@ async def get_summary(
     return DCFSummaryResponse(data=summary)
 
 
+# ------------------------------------------------------------------
+# GET /api/dcf/{symbol}/history — intrinsic value over time
+# ------------------------------------------------------------------
+
+
+@router.get("/{symbol}/history")
+async def get_history(
+    symbol: str,
+    years: int = Query(10, ge=1, le=20),
+    session: AsyncSession = Depends(get_session),
+):
+    """Default value per share at each quarter end plus daily price-driven values."""
+    try:
+        service = DCFService(session)
+        result = await service.get_history(symbol, years=years)
+    except ServiceEligibilityError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=DCFEligibilityError(reason=e.reason, detail=e.detail).model_dump(),
+        )
+
+    return DCFHistoryResponse(data=result)
+
+
 # ------------------------------------------------------------------
 # GET /api/dcf/{symbol}/runs/{run_id}/export — PDF/CSV download
 # ------------------------------------------------------------------
@@ -131,12 +131,30 @@ async def get_stock_profile(
 @router.get("/{symbol}/financials", response_model=StockEnvelope)
 async def get_financials(
     symbol: str,
-    period: str = Query("annual", pattern="^(annual|quarterly|ttm)$"),
+    period: str = Query("annual", pattern="^(annual|quarterly|ttm|ttm_history)$"),
     session: AsyncSession = Depends(get_session),
 ):
-    """Return financial statements for a stock, with annual/quarterly/ttm periods."""
+    """Return financial statements for a stock, with annual/quarterly/ttm periods.
+
+    ``ttm_history`` returns the rolling TTM value of every income and
+    cash-flow field at each historical quarter end, as columnar series.
+    """
     stock = await _get_stock_or_404(symbol, session)
 
+    if period == "ttm_history":
+        ttm_svc = TTMService(session=session)
+        history = await ttm_svc.compute_ttm_history(stock.id)
+
+        if history is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No quarterly data available to compute TTM for '{symbol}'",
+            )
+
+        data_as_of = stock.last_updated
+        next_refresh = await _next_refresh_for_stock(stock, data_as_of, session)
+        return _envelope(data=history, data_as_of=data_as_of, next_refresh=next_refresh)
+
     if period == "ttm":
         ttm_svc = TTMService(session=session)
         ttm_data = await ttm_svc.compute_ttm(stock.id)
@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
 
 
 # ---------------------------------------------------------------------------
@@ -101,6 +101,11 @@ class DCFResult(BaseModel):
     pv_operating_cashflows: float
     terminal_value_pct: float  # terminal as % of total value
 
+    # Engine stages recomputed for this result (POST /compute only)
+    stages_run: Optional[list[str]] = None
+    snapshot_token: Optional[str] = None
+    stage_token: Optional[str] = None
+
 
 class DCFDefaultResponse(BaseModel):
     """Response for GET /api/dcf/{symbol}/default."""
@@ -110,6 +115,21 @@ class DCFDefaultResponse(BaseModel):
     next_refresh: Optional[str] = None
 
 
+class ScenarioComparison(BaseModel):
+    """Scenario presets valued side by side."""
+
+    symbol: str
+    current_price: float
+    scenarios: list[DCFResult]  # in the requested order
+
+
+class ScenarioComparisonResponse(BaseModel):
+    """Response for GET /api/dcf/{symbol}/scenarios."""
+
+    data: ScenarioComparison
+    data_as_of: str
+
+
 # ---------------------------------------------------------------------------
 # Sensitivity analysis
 # ---------------------------------------------------------------------------
@@ -132,6 +152,163 @@ class SensitivityResponse(BaseModel):
     data: SensitivityMatrix
 
 
+class SensitivityGridAxis(BaseModel):
+    """One axis of an N-dimensional sensitivity grid."""
+
+    field: str
+    values: list[float]
+    base: float  # baseline value of the field in the default valuation
+
+
+class SensitivityGrid(BaseModel):
+    """Value per share over the Cartesian product of 2-3 input axes."""
+
+    axes: list[SensitivityGridAxis]
+    # values[i][j] (or values[i][j][k]) = value_per_share, None where invalid
+    values: list[Any]
+    base_value: float
+    resolution: int
+
+
+class SensitivityGridResponse(BaseModel):
+    """Response for POST /api/dcf/{symbol}/sensitivity."""
+
+    data: SensitivityGrid
+
+
+# ---------------------------------------------------------------------------
+# Reverse DCF
+# ---------------------------------------------------------------------------
+
+
+class ImpliedValue(BaseModel):
+    """Input value at which the DCF value per share equals the market price."""
+
+    symbol: str
+    solve_for: str  # stable_growth_rate, expected_growth, stable_roc, wacc
+    implied_value: float
+    baseline_value: float  # the variable's value in the default valuation
+    current_price: float
+    target_price: float
+    base_value: float  # default valuation's value per share
+    value_at_solution: float
+    bracket: list[float]  # [low, high] searched
+    evaluations: int
+
+
+class ImpliedValueResponse(BaseModel):
+    """Response for GET /api/dcf/{symbol}/implied."""
+
+    data: ImpliedValue
+
+
+# ---------------------------------------------------------------------------
+# Tornado analysis
+# ---------------------------------------------------------------------------
+
+
+class TornadoBar(BaseModel):
+    """Value-per-share response to a +/- shock in one input."""
+
+    field: str
+    base_input: float
+    low_input: float
+    high_input: float
+    low_value: Optional[float] = None  # None when the shocked input is invalid
+    high_value: Optional[float] = None
+    low_change: Optional[float] = None
+    high_change: Optional[float] = None
+    impact: Optional[float] = None  # max(|low_change|, |high_change|)
+
+
+class TornadoResult(BaseModel):
+    """Every numeric input ranked by impact on value per share."""
+
+    symbol: str
+    current_price: float
+    base_value: float
+    shock: float  # relative shock, e.g. 0.10 = +/-10%
+    bars: list[TornadoBar]  # sorted by impact, largest first
+
+
+class TornadoResponse(BaseModel):
+    """Response for GET /api/dcf/{symbol}/tornado."""
+
+    data: TornadoResult
+
+
+# ---------------------------------------------------------------------------
+# Monte Carlo simulation
+# ---------------------------------------------------------------------------
+
+
+class SimulationHistogram(BaseModel):
+    """Histogram of simulated values per share (len(bin_edges) == len(counts) + 1)."""
+
+    bin_edges: list[float]
+    counts: list[int]
+
+
+class SimulationResult(BaseModel):
+    """Distribution of value per share across simulated input draws."""
+
+    symbol: str
+    current_price: float
+    base_value: float
+    distribution: str
+    centers: dict[str, float]  # baseline of each sampled input
+    spreads: dict[str, float]  # standard deviation of each sampled input
+    draws: int
+    valid_draws: int
+    mean: float
+    std: float
+    percentiles: dict[str, float]  # p5, p10, p25, p50, p75, p90, p95
+    histogram: SimulationHistogram
+    probability_of_upside: float
+
+
+class SimulationResponse(BaseModel):
+    """Response for GET /api/dcf/{symbol}/simulation."""
+
+    data: SimulationResult
+
+
+# ---------------------------------------------------------------------------
+# Batch valuation
+# ---------------------------------------------------------------------------
+
+
+class DCFBatchItemError(BaseModel):
+    """Why a batch item could not be valued."""
+
+    reason: str
+    detail: str
+
+
+class DCFBatchItemResult(BaseModel):
+    """Headline valuation for one batch item (fields are None on error)."""
+
+    symbol: str
+    scenario: str
+    current_price: Optional[float] = None
+    value_per_share: Optional[float] = None
+    implied_upside: Optional[float] = None
+    verdict: Optional[str] = None
+    enterprise_value: Optional[float] = None
+    equity_value: Optional[float] = None
+    wacc: Optional[float] = None
+    expected_growth: Optional[float] = None
+    terminal_growth: Optional[float] = None
+    error: Optional[DCFBatchItemError] = None
+
+
+class DCFBatchResponse(BaseModel):
+    """Response for POST /api/dcf/batch (results in request order)."""
+
+    data: list[DCFBatchItemResult]
+    data_as_of: str
+
+
 # ---------------------------------------------------------------------------
 # Plain-English summary
 # ---------------------------------------------------------------------------
@@ -177,6 +354,34 @@ class DCFOverrides(BaseModel):
     wacc_override: Optional[float] = None
     marginal_tax_rate: Optional[float] = None
     scenario: Optional[str] = None
+    snapshot_token: Optional[str] = None
+    stage_token: Optional[str] = None
+
+
+MAX_BATCH_ITEMS = 200
+
+
+class DCFBatchItem(BaseModel):
+    """One valuation in a batch request."""
+
+    symbol: str
+    overrides: DCFOverrides = DCFOverrides()
+    scenario: Optional[str] = None
+
+
+class DCFBatchRequest(BaseModel):
+    """Request for POST /api/dcf/batch."""
+
+    items: list[DCFBatchItem]
+
+    @field_validator("items")
+    @classmethod
+    def validate_items(cls, v: list[DCFBatchItem]) -> list[DCFBatchItem]:
+        if not 1 <= len(v) <= MAX_BATCH_ITEMS:
+            raise ValueError(
+                f"items must contain between 1 and {MAX_BATCH_ITEMS} entries"
+            )
+        return v
 
 
 class DCFSaveRequest(BaseModel):
@@ -186,6 +391,67 @@ class DCFSaveRequest(BaseModel):
     overrides: DCFOverrides
 
 
+SENSITIVITY_GRID_FIELDS = {
+    "stable_growth_rate",
+    "stable_beta",
+    "stable_roc",
+    "stable_debt_to_equity",
+    "risk_free_rate",
+    "equity_risk_premium",
+}
+
+# Upper bound on grid cells (a 50x50x50 cube)
+MAX_SENSITIVITY_GRID_CELLS = 125_000
+
+
+class SensitivityAxisRequest(BaseModel):
+    """An input to vary; bounds default to a range around the baseline."""
+
+    field: str
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+    @field_validator("field")
+    @classmethod
+    def validate_field(cls, v: str) -> str:
+        if v not in SENSITIVITY_GRID_FIELDS:
+            raise ValueError(f"field must be one of {sorted(SENSITIVITY_GRID_FIELDS)}")
+        return v
+
+    @model_validator(mode="after")
+    def validate_bounds(self) -> "SensitivityAxisRequest":
+        if self.min is not None and self.max is not None and self.min > self.max:
+            raise ValueError("min must not exceed max")
+        return self
+
+
+class SensitivityGridRequest(BaseModel):
+    """Request for an N-dimensional sensitivity grid."""
+
+    axes: list[SensitivityAxisRequest]
+    resolution: int = 25
+
+    @field_validator("resolution")
+    @classmethod
+    def validate_resolution(cls, v: int) -> int:
+        if not 2 <= v <= 200:
+            raise ValueError("resolution must be between 2 and 200")
+        return v
+
+    @model_validator(mode="after")
+    def validate_axes(self) -> "SensitivityGridRequest":
+        fields = [axis.field for axis in self.axes]
+        if not 2 <= len(fields) <= 3:
+            raise ValueError("axes must contain two or three fields")
+        if len(set(fields)) != len(fields):
+            raise ValueError("axes must be distinct fields")
+        if self.resolution ** len(fields) > MAX_SENSITIVITY_GRID_CELLS:
+            raise ValueError(
+                f"grid exceeds {MAX_SENSITIVITY_GRID_CELLS} cells; lower the resolution"
+            )
+        return self
+
+
 # ---------------------------------------------------------------------------
 # Saved run schemas
 # ---------------------------------------------------------------------------
@@ -219,6 +485,121 @@ class DCFRunDetailResponse(BaseModel):
     run_id: int
 
 
+# ---------------------------------------------------------------------------
+# Valuation history
+# ---------------------------------------------------------------------------
+
+
+class DCFHistoryQuarter(BaseModel):
+    """Default valuation as of one quarter end (values None if invalid)."""
+
+    fiscal_date: str
+    price: float
+    risk_free_rate: float
+    value_per_share: Optional[float] = None
+    implied_upside: Optional[float] = None
+    wacc: Optional[float] = None
+
+
+class DCFHistoryDaily(BaseModel):
+    """Daily price-driven values between quarter ends (parallel arrays)."""
+
+    dates: list[str]
+    price: list[float]
+    value_per_share: list[Optional[float]]
+
+
+class DCFHistory(BaseModel):
+    """Intrinsic value over time for one stock."""
+
+    symbol: str
+    scenario: str
+    quarters: list[DCFHistoryQuarter]
+    daily: DCFHistoryDaily
+
+
+class DCFHistoryResponse(BaseModel):
+    """Response for GET /api/dcf/{symbol}/history."""
+
+    data: DCFHistory
+
+
+# ---------------------------------------------------------------------------
+# Run comparison
+# ---------------------------------------------------------------------------
+
+MAX_COMPARE_RUNS = 10
+
+
+class DCFCompareRun(BaseModel):
+    """Headline of one compared run."""
+
+    id: int
+    run_name: str
+    scenario: str
+    value_per_share: Optional[float] = None
+    computed_at: str
+
+
+class DCFRunProjectionSeries(BaseModel):
+    """One run's projections aligned on DCFRunComparison.years (None = no year)."""
+
+    run_id: int
+    growth_rate: list[Optional[float]]
+    revenue: list[Optional[float]]
+    ebit: list[Optional[float]]
+    ebit_after_tax: list[Optional[float]]
+    reinvestment_rate: list[Optional[float]]
+    reinvestment: list[Optional[float]]
+    fcff: list[Optional[float]]
+    beta: list[Optional[float]]
+    cost_of_equity: list[Optional[float]]
+    debt_ratio: list[Optional[float]]
+    wacc: list[Optional[float]]
+    roc: list[Optional[float]]
+    pv_factor: list[Optional[float]]
+    pv_fcff: list[Optional[float]]
+
+
+class AttributionStep(BaseModel):
+    """Value-per-share contribution of switching one input (None if invalid)."""
+
+    field: str
+    from_input: Optional[float] = None  # None = engine default
+    to_input: Optional[float] = None
+    value: Optional[float] = None  # value per share after this step
+    change: Optional[float] = None
+
+
+class DCFAttribution(BaseModel):
+    """Waterfall from the base run's value to another run's value."""
+
+    base_run_id: int
+    run_id: int
+    start_value: Optional[float] = None
+    end_value: Optional[float] = None
+    total_change: Optional[float] = None
+    steps: list[AttributionStep]
+    # Drivers a legacy run did not store: held fixed, not attributed
+    unknown_fields: list[str] = []
+
+
+class DCFRunComparison(BaseModel):
+    """Aligned projections and attribution waterfalls for several runs."""
+
+    symbol: str
+    runs: list[DCFCompareRun]  # in requested order; the first is the base
+    years: list[int]
+    projections: list[DCFRunProjectionSeries]
+    attribution: list[DCFAttribution]  # one per run after the base
+
+
+class DCFRunComparisonResponse(BaseModel):
+    """Response for GET /api/dcf/{symbol}/runs/compare."""
+
+    data: DCFRunComparison
+
+
 # ---------------------------------------------------------------------------
 # Sector context
 # ---------------------------------------------------------------------------
@@ -375,10 +375,31 @@ DAMODARAN_INDUSTRIES: list[
 ]
 
 
+def _update_row(row, now: datetime, **values) -> bool:
+    """Apply seed values to an existing row. updated_at (which default DCF
+    valuations are fingerprinted on) only moves when a value changed."""
+    changed = False
+    for name, value in values.items():
+        if getattr(row, name) != value:
+            setattr(row, name, value)
+            changed = True
+    if changed:
+        row.updated_at = now
+    return changed
+
+
 async def seed_damodaran_data(session: AsyncSession) -> dict[str, int]:
-    """Seed Damodaran reference data. Idempotent check-then-insert/update."""
+    """
+    Seed Damodaran reference data. Idempotent check-then-insert/update.
+
+    Returns rows seeded per table, plus "changed": how many existing rows
+    that default DCF valuations are fingerprinted on (industries and the
+    United States country row) got new values; non-zero means defaults are
+    stale. Default spreads are not read by the engine and never count.
+    """
     now = datetime.now(timezone.utc)
     counts: dict[str, int] = {}
+    changed = 0
 
     # -- default_spreads ---------------------------------------------------
     result = await session.execute(select(DefaultSpread))
@@ -387,9 +408,7 @@ async def seed_damodaran_data(session: AsyncSession) -> dict[str, int]:
     inserted = updated = 0
     for rating, spread in DEFAULT_SPREADS:
         if rating in existing_spreads:
-            row = existing_spreads[rating]
-            row.spread_over_treasury = spread
-            row.updated_at = now
+            _update_row(existing_spreads[rating], now, spread_over_treasury=spread)
             updated += 1
         else:
             session.add(
@@ -410,12 +429,17 @@ async def seed_damodaran_data(session: AsyncSession) -> dict[str, int]:
     inserted = updated = 0
     for country, moody, ds, erp, crp in COUNTRY_RISK_PREMIUMS:
         if country in existing_countries:
-            row = existing_countries[country]
-            row.moody_rating = moody
-            row.default_spread = ds
-            row.equity_risk_premium = erp
-            row.country_risk_premium = crp
-            row.updated_at = now
+            country_changed = _update_row(
+                existing_countries[country],
+                now,
+                moody_rating=moody,
+                default_spread=ds,
+                equity_risk_premium=erp,
+                country_risk_premium=crp,
+            )
+            # DCF reads only the United States row
+            if country == "United States":
+                changed += country_changed
             updated += 1
         else:
             session.add(
@@ -452,17 +476,19 @@ async def seed_damodaran_data(session: AsyncSession) -> dict[str, int]:
         growth,
     ) in DAMODARAN_INDUSTRIES:
         if name in existing_industries:
-            row = existing_industries[name]
-            row.num_firms = num_firms
-            row.unlevered_beta = beta
-            row.avg_effective_tax_rate = tax
-            row.avg_debt_to_equity = de
-            row.avg_operating_margin = margin
-            row.avg_roc = roc
-            row.avg_reinvestment_rate = reinvest
-            row.cost_of_capital = coc
-            row.fundamental_growth_rate = growth
-            row.updated_at = now
+            changed += _update_row(
+                existing_industries[name],
+                now,
+                num_firms=num_firms,
+                unlevered_beta=beta,
+                avg_effective_tax_rate=tax,
+                avg_debt_to_equity=de,
+                avg_operating_margin=margin,
+                avg_roc=roc,
+                avg_reinvestment_rate=reinvest,
+                cost_of_capital=coc,
+                fundamental_growth_rate=growth,
+            )
             updated += 1
         else:
             session.add(
@@ -486,6 +512,8 @@ async def seed_damodaran_data(session: AsyncSession) -> dict[str, int]:
         "damodaran_industries seeded: %d inserted, %d updated", inserted, updated
     )
 
+    counts["changed"] = changed
+
     await session.commit()
     logger.info("Damodaran seed complete: %s", counts)
     return counts
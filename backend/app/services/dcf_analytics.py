@@ -0,0 +1,549 @@
+"""
+DCF Analytics — valuation distributions built on the vectorized engine.
+
+Pure computation module with ZERO database access.
+Every routine here expresses its question as arrays of perturbed inputs and
+evaluates them in one call to dcf_batch.evaluate_batch, so thousands of
+valuations cost a few milliseconds instead of thousands of compute_dcf runs.
+"""
+
+from dataclasses import fields
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.services.dcf_batch import (
+    BATCH_FIELDS,
+    evaluate_batch,
+    pack_inputs,
+    resolve_stable_state,
+)
+from app.services.dcf_engine import (
+    MAX_FORECAST_YEARS,
+    MIN_FORECAST_YEARS,
+    DCFError,
+    DCFInputs,
+)
+
+# ---------------------------------------------------------------------------
+# Monte Carlo simulation
+# ---------------------------------------------------------------------------
+
+# Inputs sampled by the simulation, with the default standard deviation of
+# each draw around the baseline value
+DEFAULT_SIMULATION_SPREADS: dict[str, float] = {
+    "stable_growth_rate": 0.005,
+    "stable_beta": 0.10,
+    "stable_roc": 0.02,
+    "equity_risk_premium": 0.005,
+    "marginal_tax_rate": 0.02,
+}
+
+SIMULATION_DISTRIBUTIONS = ("normal", "uniform", "triangular")
+
+# Physical bounds applied to draws (growth is capped at risk-free by the engine)
+_SIMULATION_BOUNDS: dict[str, tuple[float, float]] = {
+    "stable_growth_rate": (-np.inf, np.inf),
+    "stable_beta": (0.0, np.inf),
+    "stable_roc": (1e-6, np.inf),
+    "equity_risk_premium": (0.0, np.inf),
+    "marginal_tax_rate": (0.0, 0.99),
+}
+
+SIMULATION_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+
+def _sample(
+    rng: np.random.Generator,
+    center: float,
+    spread: float,
+    distribution: str,
+    size: int,
+) -> np.ndarray:
+    """Draw `size` values with mean `center` and standard deviation `spread`."""
+    if spread <= 0:
+        return np.full(size, center)
+    if distribution == "normal":
+        return rng.normal(center, spread, size)
+    if distribution == "uniform":
+        half_width = spread * np.sqrt(3.0)
+        return rng.uniform(center - half_width, center + half_width, size)
+    if distribution == "triangular":
+        half_width = spread * np.sqrt(6.0)
+        return rng.triangular(center - half_width, center, center + half_width, size)
+    raise DCFError(
+        f"Unknown distribution '{distribution}'. "
+        f"Use one of: {', '.join(SIMULATION_DISTRIBUTIONS)}."
+    )
+
+
+def simulation_centers(inputs: DCFInputs) -> dict[str, float]:
+    """
+    Baseline value of each simulated input.
+
+    Stable growth and stable ROC resolve their engine defaults
+    (risk-free - 1% capped at risk-free, and stable WACC) when unset.
+    """
+    stable = resolve_stable_state(pack_inputs([inputs]))
+    return {
+        "stable_growth_rate": float(stable["growth"][0]),
+        "stable_beta": float(inputs.stable_beta),
+        "stable_roc": float(stable["roc"][0]),
+        "equity_risk_premium": float(inputs.equity_risk_premium),
+        "marginal_tax_rate": float(inputs.marginal_tax_rate),
+    }
+
+
+def simulate_dcf(
+    inputs: DCFInputs,
+    draws: int = 10_000,
+    spreads: Optional[Mapping[str, float]] = None,
+    distribution: str = "normal",
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Monte Carlo value-per-share distribution.
+
+    Samples each input in DEFAULT_SIMULATION_SPREADS independently around
+    its baseline and evaluates all draws in one vectorized pass. Draws that
+    make the valuation invalid (e.g. stable growth >= stable WACC) are NaN.
+    """
+    rng = np.random.default_rng(seed)
+    spreads = {**DEFAULT_SIMULATION_SPREADS, **(spreads or {})}
+    centers = simulation_centers(inputs)
+
+    packed = pack_inputs([inputs])
+    for name, center in centers.items():
+        low, high = _SIMULATION_BOUNDS[name]
+        packed[name] = np.clip(
+            _sample(rng, center, spreads[name], distribution, draws), low, high
+        )
+
+    return evaluate_batch(packed)["value_per_share"]
+
+
+def summarize_distribution(
+    values: np.ndarray, current_price: float, bins: int = 40
+) -> dict:
+    """Percentiles, histogram and probability of upside for simulated values."""
+    valid = values[np.isfinite(values)]
+    if valid.size == 0:
+        raise DCFError("No simulation draw produced a valid valuation.")
+
+    counts, edges = np.histogram(valid, bins=bins)
+    percentiles = np.percentile(valid, SIMULATION_PERCENTILES)
+
+    return {
+        "draws": int(values.size),
+        "valid_draws": int(valid.size),
+        "mean": float(valid.mean()),
+        "std": float(valid.std()),
+        "percentiles": {
+            f"p{p}": round(float(v), 2)
+            for p, v in zip(SIMULATION_PERCENTILES, percentiles)
+        },
+        "histogram": {
+            "bin_edges": [round(float(e), 2) for e in edges],
+            "counts": [int(c) for c in counts],
+        },
+        "probability_of_upside": float((valid > current_price).mean()),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Sensitivity grid
+# ---------------------------------------------------------------------------
+
+# Inputs that may be used as grid axes, with the default half-width of the
+# range around the baseline when the caller gives no explicit bounds
+GRID_FIELDS: dict[str, float] = {
+    "stable_growth_rate": 0.01,
+    "stable_beta": 0.30,
+    "stable_roc": 0.05,
+    "stable_debt_to_equity": 0.30,
+    "risk_free_rate": 0.01,
+    "equity_risk_premium": 0.01,
+}
+
+# Fields that cannot go negative; default ranges are floored at zero
+_NON_NEGATIVE_GRID_FIELDS = {
+    "stable_beta",
+    "stable_roc",
+    "stable_debt_to_equity",
+    "equity_risk_premium",
+}
+
+
+def grid_centers(inputs: DCFInputs) -> dict[str, float]:
+    """Baseline value of each grid field, with engine defaults resolved."""
+    stable = resolve_stable_state(pack_inputs([inputs]))
+    stable_de = (
+        inputs.stable_debt_to_equity
+        if inputs.stable_debt_to_equity is not None
+        else inputs.sector_avg_debt_to_equity
+    )
+    return {
+        "stable_growth_rate": float(stable["growth"][0]),
+        "stable_beta": float(inputs.stable_beta),
+        "stable_roc": float(stable["roc"][0]),
+        "stable_debt_to_equity": float(stable_de),
+        "risk_free_rate": float(inputs.risk_free_rate),
+        "equity_risk_premium": float(inputs.equity_risk_premium),
+    }
+
+
+def grid_axis(
+    inputs: DCFInputs,
+    field: str,
+    resolution: int,
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Evenly spaced values for one grid axis.
+
+    Without explicit bounds the range is centered on the baseline. Stable
+    growth defaults to 0..risk-free instead, matching the legacy matrix,
+    since the engine caps growth at the risk-free rate anyway.
+    """
+    if field not in GRID_FIELDS:
+        raise DCFError(f"Cannot vary '{field}'. Use one of: {', '.join(GRID_FIELDS)}.")
+    center = grid_centers(inputs)[field]
+    if field == "stable_growth_rate":
+        default_low, default_high = 0.0, float(inputs.risk_free_rate)
+    else:
+        default_low = center - GRID_FIELDS[field]
+        default_high = center + GRID_FIELDS[field]
+        if field in _NON_NEGATIVE_GRID_FIELDS:
+            default_low = max(default_low, 0.0)
+    low = default_low if low is None else low
+    high = default_high if high is None else high
+    if high < low:
+        raise DCFError(f"Grid range for '{field}' is empty ({low} > {high}).")
+    return np.linspace(low, high, resolution)
+
+
+def compute_sensitivity_grid(
+    inputs: DCFInputs, axes: Sequence[tuple[str, np.ndarray]]
+) -> np.ndarray:
+    """
+    Value per share over the Cartesian product of the given axes.
+
+    Each axis is reshaped onto its own dimension and broadcast against the
+    scalar baseline, so stages that do not depend on a varied field (e.g.
+    the base year when only stable-state inputs vary) are evaluated once
+    rather than per cell. Returns an array of shape (len(axis_1), ...);
+    invalid cells are NaN.
+    """
+    fields = [field for field, _ in axes]
+    if len(set(fields)) != len(fields):
+        raise DCFError("Grid axes must be distinct fields.")
+
+    packed = pack_inputs([inputs])
+    for dim, (field, values) in enumerate(axes):
+        shape = [1] * len(axes)
+        shape[dim] = len(values)
+        packed[field] = np.asarray(values, dtype=np.float64).reshape(shape)
+
+    return evaluate_batch(packed)["value_per_share"]
+
+
+# ---------------------------------------------------------------------------
+# Reverse DCF (market-implied inputs)
+# ---------------------------------------------------------------------------
+
+# Quantities the reverse DCF can solve for, with the default search bracket.
+# "wacc" brackets the base-year WACC; it is solved as a parallel shift of
+# every discount rate. Stable growth is capped at the risk-free rate.
+IMPLIED_VARIABLES: dict[str, tuple[float, float]] = {
+    "stable_growth_rate": (-0.05, np.inf),
+    "expected_growth": (-0.30, 0.60),
+    "stable_roc": (0.001, 1.0),
+    "wacc": (0.02, 0.30),
+}
+
+# Points evaluated per bracketing pass: the bracket shrinks by a factor of
+# (_SOLVER_POINTS - 1) per vectorized evaluation
+_SOLVER_POINTS = 33
+_SOLVER_MAX_PASSES = 20
+
+
+def _implied_evaluator(inputs: DCFInputs, solve_for: str):
+    """
+    Return (baseline, evaluate) where evaluate maps an array of candidate
+    values to value per share, and baseline is the variable's current value.
+    """
+    packed = pack_inputs([inputs])
+    baseline_out = evaluate_batch(packed)
+
+    if solve_for == "stable_growth_rate":
+        baseline = float(resolve_stable_state(packed)["growth"][0])
+        key, offset = "stable_growth_rate", 0.0
+    elif solve_for == "stable_roc":
+        baseline = float(resolve_stable_state(packed)["roc"][0])
+        key, offset = "stable_roc", 0.0
+    elif solve_for == "expected_growth":
+        baseline = float(baseline_out["expected_growth"][0])
+        key, offset = "expected_growth", 0.0
+    elif solve_for == "wacc":
+        # Candidate base WACC -> shift relative to the unshifted base WACC
+        baseline = float(baseline_out["wacc"][0])
+        key, offset = "wacc_shift", -baseline
+    else:
+        raise DCFError(
+            f"Cannot solve for '{solve_for}'. "
+            f"Use one of: {', '.join(IMPLIED_VARIABLES)}."
+        )
+
+    def evaluate(candidates: np.ndarray) -> np.ndarray:
+        trial = dict(packed)
+        trial[key] = candidates + offset
+        return evaluate_batch(trial)["value_per_share"]
+
+    return baseline, evaluate
+
+
+def solve_implied(
+    inputs: DCFInputs,
+    solve_for: str,
+    target_price: Optional[float] = None,
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+    tolerance: float = 1e-7,
+) -> dict:
+    """
+    Find the value of `solve_for` at which value per share equals the
+    target price (default: the current price).
+
+    Bracketed root finding on the vectorized evaluator: each pass evaluates
+    a grid of points across the bracket in one call and keeps the first
+    sub-interval whose endpoints straddle the target — bisection with many
+    cuts per evaluation. Invalid points (NaN) are skipped.
+
+    Raises DCFError when the bracket contains no solution.
+    """
+    target = float(inputs.current_price if target_price is None else target_price)
+    baseline, evaluate = _implied_evaluator(inputs, solve_for)
+
+    default_low, default_high = IMPLIED_VARIABLES[solve_for]
+    low = default_low if low is None else low
+    high = default_high if high is None else high
+    if solve_for == "stable_growth_rate":
+        high = min(high, float(inputs.risk_free_rate))
+    if not low < high:
+        raise DCFError(f"Empty search bracket for '{solve_for}': [{low}, {high}].")
+
+    evaluations = 0
+    lo, hi = low, high
+    for _ in range(_SOLVER_MAX_PASSES):
+        points = np.linspace(lo, hi, _SOLVER_POINTS)
+        gap = evaluate(points) - target
+        evaluations += 1
+
+        finite = np.isfinite(gap)
+        straddle = (
+            finite[:-1] & finite[1:] & (np.sign(gap[:-1]) != np.sign(gap[1:]))
+        ) | (finite & (gap == 0))[:-1]
+        hits = np.flatnonzero(straddle)
+        if hits.size == 0:
+            if evaluations == 1:
+                raise DCFError(
+                    f"No {solve_for} in [{low:.4f}, {high:.4f}] values the stock "
+                    f"at {target:.2f}."
+                )
+            break
+        i = int(hits[0])
+        lo, hi = float(points[i]), float(points[i + 1])
+        if hi - lo <= tolerance:
+            break
+
+    # Linear interpolation inside the final bracket
+    v_lo, v_hi = evaluate(np.array([lo, hi])) - target
+    implied = lo if v_hi == v_lo else lo - v_lo * (hi - lo) / (v_hi - v_lo)
+    value_at_solution = evaluate(np.array([implied]))[0]
+    evaluations += 2
+
+    return {
+        "solve_for": solve_for,
+        "implied_value": float(implied),
+        "baseline_value": baseline,
+        "target_price": target,
+        "value_at_solution": float(value_at_solution),
+        "bracket": [low, high],
+        "evaluations": evaluations,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Tornado (one-at-a-time input shocks)
+# ---------------------------------------------------------------------------
+
+
+def compute_tornado(inputs: DCFInputs, shock: float = 0.10) -> list[dict]:
+    """
+    Value-per-share change for a +/- `shock` relative move in every numeric
+    DCFInputs field, ranked by the larger of the two moves.
+
+    All 2 x fields perturbed rows are evaluated in one vectorized call.
+    Optional stable-state fields are shocked around their resolved engine
+    defaults; forecast_years is rounded to whole years (at least +/- 1) and
+    kept within MIN_FORECAST_YEARS..MAX_FORECAST_YEARS.
+    Zero-valued fields show no change. Invalid rows report None.
+    """
+    packed = pack_inputs([inputs])
+    base_value = float(evaluate_batch(packed)["value_per_share"][0])
+    stable = resolve_stable_state(packed)
+    resolved = {
+        "stable_growth_rate": float(stable["growth"][0]),
+        "stable_roc": float(stable["roc"][0]),
+        "stable_debt_to_equity": float(grid_centers(inputs)["stable_debt_to_equity"]),
+    }
+
+    names = list(BATCH_FIELDS) + ["forecast_years"]
+    rows = 2 * len(names)
+    batch = {name: np.repeat(packed[name], rows) for name in names}
+
+    shocked: list[tuple[float, float, float]] = []
+    for k, name in enumerate(names):
+        center = resolved.get(name, float(packed[name][0]))
+        if np.isnan(center):
+            center = resolved[name]
+        low, high = center * (1.0 - shock), center * (1.0 + shock)
+        if name == "forecast_years":
+            # Whole years, at least one step, inside the supported horizon;
+            # at an edge that side stays at the base (no change)
+            low = max(MIN_FORECAST_YEARS, min(round(low), int(center) - 1))
+            high = min(MAX_FORECAST_YEARS, max(round(high), int(center) + 1))
+        batch[name][2 * k] = low
+        batch[name][2 * k + 1] = high
+        shocked.append((center, low, high))
+
+    values = evaluate_batch(batch)["value_per_share"]
+
+    def _change(value: float) -> Optional[float]:
+        return None if not np.isfinite(value) else round(value - base_value, 4)
+
+    bars = []
+    for k, name in enumerate(names):
+        center, low, high = shocked[k]
+        low_value, high_value = float(values[2 * k]), float(values[2 * k + 1])
+        low_change, high_change = _change(low_value), _change(high_value)
+        moves = [abs(c) for c in (low_change, high_change) if c is not None]
+        bars.append(
+            {
+                "field": name,
+                "base_input": round(center, 8),
+                "low_input": round(float(low), 8),
+                "high_input": round(float(high), 8),
+                "low_value": low_value if np.isfinite(low_value) else None,
+                "high_value": high_value if np.isfinite(high_value) else None,
+                "low_change": low_change,
+                "high_change": high_change,
+                "impact": max(moves) if moves else None,
+            }
+        )
+
+    # Invalid shocks (no impact measurable) sort last
+    bars.sort(
+        key=lambda bar: -1.0 if bar["impact"] is None else bar["impact"], reverse=True
+    )
+    return bars
+
+
+# ---------------------------------------------------------------------------
+# Attribution (sequential substitution)
+# ---------------------------------------------------------------------------
+
+
+def attribute_change(
+    base: DCFInputs,
+    target: DCFInputs,
+    order: Optional[Sequence[str]] = None,
+) -> dict:
+    """
+    Explain the value-per-share difference between two input sets.
+
+    Starting from `base`, each differing field is switched to its `target`
+    value in turn (DCFInputs declaration order unless `order` is given);
+    the change at each step is that field's contribution. The steps sum to
+    end_value - start_value. Every intermediate valuation is one row of a
+    single vectorized evaluation. Steps into or out of an invalid row
+    report None.
+    """
+    names = list(order) if order is not None else [f.name for f in fields(DCFInputs)]
+    unknown = set(names) - {f.name for f in fields(DCFInputs)}
+    if unknown:
+        raise DCFError(f"Cannot attribute to {sorted(unknown)}")
+
+    packed_base = pack_inputs([base])
+    packed_target = pack_inputs([target])
+
+    def _differs(name: str) -> bool:
+        a, b = packed_base[name][0], packed_target[name][0]
+        return not (a == b or (np.isnan(a) and np.isnan(b)))
+
+    changed = [name for name in names if _differs(name)]
+    rows = len(changed) + 1
+    batch = {name: np.repeat(packed_base[name], rows) for name in packed_base}
+    for k, name in enumerate(changed):
+        batch[name][k + 1 :] = packed_target[name][0]
+
+    values = evaluate_batch(batch)["value_per_share"]
+
+    def _value(x: float) -> Optional[float]:
+        return float(x) if np.isfinite(x) else None
+
+    def _input(x: float) -> Optional[float]:
+        return None if np.isnan(x) else round(float(x), 8)
+
+    steps = []
+    for k, name in enumerate(changed):
+        before, after = values[k], values[k + 1]
+        change = after - before
+        steps.append(
+            {
+                "field": name,
+                "from_input": _input(packed_base[name][0]),
+                "to_input": _input(packed_target[name][0]),
+                "value": _value(after),
+                "change": round(float(change), 4) if np.isfinite(change) else None,
+            }
+        )
+
+    start_value, end_value = _value(values[0]), _value(values[-1])
+    return {
+        "start_value": start_value,
+        "end_value": end_value,
+        "total_change": (
+            round(end_value - start_value, 4)
+            if start_value is not None and end_value is not None
+            else None
+        ),
+        "steps": steps,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Price paths (market-driven revaluation)
+# ---------------------------------------------------------------------------
+
+
+def value_path(inputs: DCFInputs, prices: Sequence[float]) -> dict[str, np.ndarray]:
+    """
+    Value per share of `inputs` at each of `prices`, holding everything but
+    the market price fixed.
+
+    The fundamentals are packed as scalars and only current_price is an
+    array, so broadcasting computes the operating base year (tax rate,
+    reinvestment, ROC, growth) once and re-evaluates just the price-driven
+    terms — market cap, D/E, levered beta, WACC weights — per price.
+    Invalid rows are NaN.
+    """
+    packed = {name: values[0] for name, values in pack_inputs([inputs]).items()}
+    packed["current_price"] = np.asarray(prices, dtype=np.float64)
+    out = evaluate_batch(packed)
+    return {
+        "value_per_share": out["value_per_share"],
+        "implied_upside": out["implied_upside"],
+        "wacc": out["wacc"],
+    }
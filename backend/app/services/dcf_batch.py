@@ -0,0 +1,445 @@
+"""
+Vectorized DCF Engine — Two-Stage FCFF Valuation over NumPy arrays
+
+Pure computation module with ZERO database access.
+Mirrors the Decimal engine in dcf_engine stage by stage (base year, stable
+state, projections, terminal value, equity bridge) but evaluates many
+valuations at once on float64 arrays.
+
+Accuracy: every stage uses the same formulas and branch conditions as the
+Decimal engine, so results agree to float64 round-off. value_per_share
+matches compute_dcf within BATCH_RTOL (relative) once both are rounded to
+cents; tests/test_dcf_batch.py checks this across scenarios and edge cases.
+
+Use compute_dcf for a single interactive valuation (full Decimal audit
+trail); use compute_dcf_batch when valuing many inputs at once.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.services.dcf_engine import DCFInputs, SYNTHETIC_RATING_TABLE
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+# Relative tolerance of the float64 engine against the Decimal engine
+BATCH_RTOL = 1e-9
+
+# Numeric DCFInputs fields packed into arrays (everything but forecast_years)
+BATCH_FIELDS: tuple[str, ...] = tuple(
+    f.name for f in fields(DCFInputs) if f.name != "forecast_years"
+)
+
+# Optional stable-state fields: None is packed as NaN and resolved to the
+# engine default inside _batch_stable_state
+OPTIONAL_FIELDS: tuple[str, ...] = (
+    "stable_growth_rate",
+    "stable_roc",
+    "stable_debt_to_equity",
+)
+
+# Synthetic rating table sorted by ascending lower bound for searchsorted
+_RATING_LOWER = np.array([float(row[0]) for row in reversed(SYNTHETIC_RATING_TABLE)])
+_RATING_SPREAD = np.array([float(row[3]) for row in reversed(SYNTHETIC_RATING_TABLE)])
+_FALLBACK_SPREAD = 0.15
+_NO_DEBT_SPREAD = 0.0075
+
+# Optional keys evaluate_batch accepts beyond DCFInputs fields (solver hooks,
+# not part of the model's inputs):
+#   expected_growth — replaces the base-year RR x ROC growth
+#   wacc_shift      — added to every discount rate (base, per-year, stable);
+#                     the stable ROC default still tracks the unshifted WACC
+OVERRIDE_KEYS: tuple[str, ...] = ("expected_growth", "wacc_shift")
+
+# Error codes reported per row
+ERROR_NON_POSITIVE_SHARES = "non_positive_shares"
+ERROR_NEGATIVE_EBIT = "negative_ebit"
+ERROR_TERMINAL_DENOMINATOR = "terminal_denominator"
+
+
+# ---------------------------------------------------------------------------
+# Data Structures
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class DCFBatchResult:
+    """Columnar output of a batch valuation: one array entry per input row."""
+
+    value_per_share: np.ndarray
+    enterprise_value: np.ndarray
+    equity_value: np.ndarray
+    implied_upside: np.ndarray
+    pv_operating_cashflows: np.ndarray
+    pv_terminal: np.ndarray
+    terminal_value: np.ndarray
+    expected_growth: np.ndarray
+    wacc: np.ndarray
+    terminal_wacc: np.ndarray
+    terminal_growth: np.ndarray
+    errors: list[Optional[str]]  # error code per row, None when valid
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    @property
+    def ok(self) -> np.ndarray:
+        """Boolean mask of rows that produced a valuation."""
+        return np.array([e is None for e in self.errors], dtype=bool)
+
+    def to_rows(self) -> list[dict]:
+        """Expand the columns into one JSON-safe dict per input row."""
+        rows: list[dict] = []
+        for i, error in enumerate(self.errors):
+            if error is not None:
+                rows.append({"error": error})
+                continue
+            rows.append(
+                {
+                    "value_per_share": round(float(self.value_per_share[i]), 2),
+                    "enterprise_value": round(float(self.enterprise_value[i]), 2),
+                    "equity_value": round(float(self.equity_value[i]), 2),
+                    "implied_upside": round(float(self.implied_upside[i]), 4),
+                    "pv_operating_cashflows": float(self.pv_operating_cashflows[i]),
+                    "pv_terminal": float(self.pv_terminal[i]),
+                    "terminal_value": float(self.terminal_value[i]),
+                    "expected_growth": float(self.expected_growth[i]),
+                    "wacc": float(self.wacc[i]),
+                    "terminal_wacc": float(self.terminal_wacc[i]),
+                    "terminal_growth": float(self.terminal_growth[i]),
+                    "error": None,
+                }
+            )
+        return rows
+
+
+# ---------------------------------------------------------------------------
+# Packing
+# ---------------------------------------------------------------------------
+
+
+def pack_inputs(inputs: Sequence[DCFInputs]) -> dict[str, np.ndarray]:
+    """
+    Pack a sequence of DCFInputs into a struct-of-arrays dict.
+
+    Optional stable-state fields left as None are packed as NaN so the
+    engine defaults are applied per row.
+    """
+    packed: dict[str, np.ndarray] = {}
+    for name in BATCH_FIELDS:
+        packed[name] = np.array(
+            [
+                np.nan if getattr(i, name) is None else float(getattr(i, name))
+                for i in inputs
+            ],
+            dtype=np.float64,
+        )
+    packed["forecast_years"] = np.array(
+        [i.forecast_years for i in inputs], dtype=np.int64
+    )
+    return packed
+
+
+# ---------------------------------------------------------------------------
+# Stages (broadcasting: any field may be a scalar, (1,) or (B,) array)
+# ---------------------------------------------------------------------------
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray, ok: np.ndarray) -> np.ndarray:
+    """num / den where ok, else 0 (matches the Decimal engine's guards)."""
+    return np.where(ok, num / np.where(ok, den, 1.0), 0.0)
+
+
+def _batch_base_year(a: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Vectorized counterpart of dcf_engine._compute_base_year."""
+    marginal = a["marginal_tax_rate"]
+    pretax = a["pretax_income"]
+
+    effective = _safe_div(a["tax_provision"], pretax, pretax != 0)
+    out_of_range = (pretax == 0) | (effective < 0) | (effective > 0.50)
+    tax_rate = np.where(out_of_range, marginal, effective)
+
+    ebit_after_tax = a["ebit"] * (1.0 - tax_rate)
+    reinvestment = (a["capex"] - a["depreciation"]) + a["working_capital_change"]
+    reinvestment_rate = _safe_div(reinvestment, ebit_after_tax, ebit_after_tax > 0)
+
+    invested_capital = (
+        a["book_value_equity"] + a["total_debt"] - a["cash_and_equivalents"]
+    )
+    roc = _safe_div(ebit_after_tax, invested_capital, invested_capital > 0)
+    expected_growth = reinvestment_rate * roc
+    if "expected_growth" in a:
+        expected_growth = a["expected_growth"]
+
+    market_cap = a["shares_outstanding"] * a["current_price"]
+    debt_to_equity = _safe_div(a["total_debt"], market_cap, market_cap > 0)
+    total_capital = a["total_debt"] + market_cap
+    debt_ratio = _safe_div(a["total_debt"], total_capital, total_capital > 0)
+
+    levered_beta = a["unlevered_beta"] * (1.0 + (1.0 - tax_rate) * debt_to_equity)
+    cost_of_equity = (
+        a["risk_free_rate"]
+        + levered_beta * a["equity_risk_premium"]
+        + a["country_risk_premium"]
+    )
+
+    interest = a["interest_expense"]
+    coverage = _safe_div(a["ebit"], interest, interest > 0)
+    idx = np.searchsorted(_RATING_LOWER, coverage, side="right") - 1
+    spread = np.where(idx >= 0, _RATING_SPREAD[np.clip(idx, 0, None)], _FALLBACK_SPREAD)
+    spread = np.where(interest <= 0, _NO_DEBT_SPREAD, spread)
+
+    cost_of_debt_pretax = a["risk_free_rate"] + spread
+    cost_of_debt_aftertax = cost_of_debt_pretax * (1.0 - tax_rate)
+    wacc = cost_of_equity * (1.0 - debt_ratio) + cost_of_debt_aftertax * debt_ratio
+    wacc = wacc + a.get("wacc_shift", 0.0)
+
+    return {
+        "computed_tax_rate": tax_rate,
+        "ebit_after_tax": ebit_after_tax,
+        "reinvestment_rate": reinvestment_rate,
+        "roc": roc,
+        "expected_growth": expected_growth,
+        "debt_ratio": debt_ratio,
+        "levered_beta": levered_beta,
+        "cost_of_equity": cost_of_equity,
+        "cost_of_debt_pretax": cost_of_debt_pretax,
+        "cost_of_debt_aftertax": cost_of_debt_aftertax,
+        "wacc": wacc,
+    }
+
+
+def _batch_stable_state(
+    a: Mapping[str, np.ndarray], base: Mapping[str, np.ndarray]
+) -> dict[str, np.ndarray]:
+    """Resolve stable-state defaults and the stable WACC (terminal stage inputs)."""
+    rf = a["risk_free_rate"]
+
+    growth = a["stable_growth_rate"]
+    growth = np.where(np.isnan(growth), rf - 0.01, growth)
+    growth = np.minimum(growth, rf)
+
+    stable_de = a["stable_debt_to_equity"]
+    stable_de = np.where(np.isnan(stable_de), a["sector_avg_debt_to_equity"], stable_de)
+    debt_ratio = _safe_div(stable_de, 1.0 + stable_de, (1.0 + stable_de) != 0)
+
+    cost_of_equity = (
+        rf + a["stable_beta"] * a["equity_risk_premium"] + a["country_risk_premium"]
+    )
+    cost_of_debt_aftertax = base["cost_of_debt_pretax"] * (1.0 - a["marginal_tax_rate"])
+    wacc = cost_of_equity * (1.0 - debt_ratio) + cost_of_debt_aftertax * debt_ratio
+
+    roc = a["stable_roc"]
+    roc = np.where(np.isnan(roc), wacc, roc)
+    wacc = wacc + a.get("wacc_shift", 0.0)
+
+    return {
+        "growth": growth,
+        "debt_ratio": debt_ratio,
+        "wacc": wacc,
+        "roc": roc,
+    }
+
+
+def _batch_projections(
+    a: Mapping[str, np.ndarray],
+    base: Mapping[str, np.ndarray],
+    stable: Mapping[str, np.ndarray],
+) -> dict[str, np.ndarray]:
+    """
+    High-growth period as (rows, years) arrays.
+
+    Rows with fewer forecast years than the widest row are padded with
+    neutral years (growth factor 1, discount factor 1, zero PV) so that the
+    cumulative products at the last column equal the row's final year.
+    """
+    n = np.asarray(a["forecast_years"])
+    n_max = int(n.max())
+    t = np.arange(1, n_max + 1, dtype=np.float64)
+    n_col = n[..., None].astype(np.float64)
+    valid = t <= n_col
+    fraction = np.where(valid, t / np.where(n_col > 0, n_col, 1.0), 1.0)
+
+    def transition(start, target):
+        start = np.asarray(start)[..., None]
+        target = np.asarray(target)[..., None]
+        return start + (target - start) * fraction
+
+    growth = transition(base["expected_growth"], stable["growth"])
+    beta = transition(base["levered_beta"], a["stable_beta"])
+    debt_ratio = transition(base["debt_ratio"], stable["debt_ratio"])
+    roc = transition(base["roc"], stable["roc"])
+
+    growth_factor = np.cumprod(np.where(valid, 1.0 + growth, 1.0), axis=-1)
+    ebit_after_tax = np.asarray(base["ebit_after_tax"])[..., None] * growth_factor
+    reinvestment_rate = _safe_div(growth, roc, roc > 0)
+    fcff = ebit_after_tax - ebit_after_tax * reinvestment_rate
+
+    cost_of_equity = (
+        np.asarray(a["risk_free_rate"])[..., None]
+        + beta * np.asarray(a["equity_risk_premium"])[..., None]
+        + np.asarray(a["country_risk_premium"])[..., None]
+    )
+    cod_aftertax = np.asarray(base["cost_of_debt_aftertax"])[..., None]
+    wacc = cost_of_equity * (1.0 - debt_ratio) + cod_aftertax * debt_ratio
+    wacc = wacc + np.asarray(a.get("wacc_shift", 0.0))[..., None]
+    pv_factor = np.cumprod(np.where(valid, 1.0 / (1.0 + wacc), 1.0), axis=-1)
+    pv_fcff = np.where(valid, fcff * pv_factor, 0.0)
+
+    return {
+        "valid": valid,
+        "growth_rate": growth,
+        "ebit_after_tax": ebit_after_tax,
+        "fcff": fcff,
+        "wacc": wacc,
+        "pv_factor": pv_factor,
+        "pv_fcff": pv_fcff,
+        "last_ebit_after_tax": ebit_after_tax[..., -1],
+        "last_pv_factor": pv_factor[..., -1],
+        "pv_operating": pv_fcff.sum(axis=-1),
+    }
+
+
+def _batch_terminal(
+    stable: Mapping[str, np.ndarray], proj: Mapping[str, np.ndarray]
+) -> dict[str, np.ndarray]:
+    """Gordon growth terminal value; non-positive denominators become NaN."""
+    growth = stable["growth"]
+    reinvestment_rate = _safe_div(growth, stable["roc"], stable["roc"] > 0)
+    terminal_fcff = (
+        proj["last_ebit_after_tax"] * (1.0 + growth) * (1.0 - reinvestment_rate)
+    )
+    denominator = stable["wacc"] - growth
+    terminal_value = np.where(
+        denominator > 0,
+        terminal_fcff / np.where(denominator > 0, denominator, 1.0),
+        np.nan,
+    )
+    return {
+        "denominator": denominator,
+        "terminal_fcff": terminal_fcff,
+        "terminal_reinvestment_rate": reinvestment_rate,
+        "terminal_value": terminal_value,
+        "pv_terminal": terminal_value * proj["last_pv_factor"],
+    }
+
+
+def _batch_equity_bridge(
+    a: Mapping[str, np.ndarray],
+    proj: Mapping[str, np.ndarray],
+    terminal: Mapping[str, np.ndarray],
+) -> dict[str, np.ndarray]:
+    """Enterprise value -> equity value -> value per share, plus implied upside."""
+    enterprise_value = proj["pv_operating"] + terminal["pv_terminal"]
+    equity_value = (
+        enterprise_value
+        + a["cash_and_equivalents"]
+        - a["total_debt"]
+        - a["minority_interests"]
+        - a["preferred_stock"]
+    )
+    shares = a["shares_outstanding"]
+    value_per_share = _safe_div(equity_value, shares, shares > 0)
+    price = a["current_price"]
+    implied_upside = _safe_div(value_per_share - price, price, price > 0)
+    return {
+        "enterprise_value": enterprise_value,
+        "equity_value": equity_value,
+        "value_per_share": value_per_share,
+        "implied_upside": implied_upside,
+    }
+
+
+def resolve_stable_state(a: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Stable-state values (growth, debt ratio, WACC, ROC) with engine defaults
+    applied — i.e. what compute_dcf reports as terminal_growth/terminal_roc.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _batch_stable_state(a, _batch_base_year(a))
+
+
+# ---------------------------------------------------------------------------
+# Main Entry Points
+# ---------------------------------------------------------------------------
+
+
+def evaluate_batch(a: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Run every stage on packed (or broadcastable) arrays.
+
+    Returns a flat dict of output arrays plus "error_code": an object array
+    holding an error code per row (None when valid). Invalid rows carry NaN
+    in every valuation output.
+    """
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        base = _batch_base_year(a)
+        stable = _batch_stable_state(a, base)
+        proj = _batch_projections(a, base, stable)
+        terminal = _batch_terminal(stable, proj)
+        bridge = _batch_equity_bridge(a, proj, terminal)
+
+    outputs = {
+        "value_per_share": bridge["value_per_share"],
+        "enterprise_value": bridge["enterprise_value"],
+        "equity_value": bridge["equity_value"],
+        "implied_upside": bridge["implied_upside"],
+        "pv_operating_cashflows": proj["pv_operating"],
+        "pv_terminal": terminal["pv_terminal"],
+        "terminal_value": terminal["terminal_value"],
+        "expected_growth": base["expected_growth"],
+        "wacc": base["wacc"],
+        "terminal_wacc": stable["wacc"],
+        "terminal_growth": stable["growth"],
+    }
+    shape = np.broadcast_shapes(*(np.shape(v) for v in outputs.values()))
+    outputs = {
+        k: np.broadcast_to(v, shape).astype(np.float64) for k, v in outputs.items()
+    }
+
+    # Error precedence matches compute_dcf: shares, then EBIT, then terminal.
+    error_code = np.full(shape, None, dtype=object)
+    denominator = np.broadcast_to(terminal["denominator"], shape)
+    error_code[denominator <= 0] = ERROR_TERMINAL_DENOMINATOR
+    error_code[np.broadcast_to(a["ebit"], shape) <= 0] = ERROR_NEGATIVE_EBIT
+    error_code[np.broadcast_to(a["shares_outstanding"], shape) <= 0] = (
+        ERROR_NON_POSITIVE_SHARES
+    )
+
+    invalid = error_code != None  # noqa: E711 — elementwise comparison
+    for value in outputs.values():
+        value[invalid] = np.nan
+    outputs["error_code"] = error_code
+    return outputs
+
+
+def compute_dcf_batch(inputs: Sequence[DCFInputs]) -> DCFBatchResult:
+    """
+    Value a sequence of DCFInputs in one vectorized pass.
+
+    Unlike compute_dcf this never raises for invalid rows: each row's
+    error code is reported in DCFBatchResult.errors instead.
+    """
+    if not inputs:
+        empty = np.empty(0, dtype=np.float64)
+        return DCFBatchResult(*([empty] * 11), errors=[])
+
+    out = evaluate_batch(pack_inputs(inputs))
+    return DCFBatchResult(
+        value_per_share=out["value_per_share"],
+        enterprise_value=out["enterprise_value"],
+        equity_value=out["equity_value"],
+        implied_upside=out["implied_upside"],
+        pv_operating_cashflows=out["pv_operating_cashflows"],
+        pv_terminal=out["pv_terminal"],
+        terminal_value=out["terminal_value"],
+        expected_growth=out["expected_growth"],
+        wacc=out["wacc"],
+        terminal_wacc=out["terminal_wacc"],
+        terminal_growth=out["terminal_growth"],
+        errors=list(out["error_code"]),
+    )
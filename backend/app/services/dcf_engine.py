@@ -7,9 +7,9 @@ Takes typed inputs, runs two-stage FCFF valuation, returns structured outputs.
 Based on Aswath Damodaran's FCFF framework.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, replace
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional
+from typing import Optional, Sequence
 
 
 # ---------------------------------------------------------------------------
@@ -20,6 +20,10 @@ from typing import Optional
 TWO_PLACES = Decimal("0.01")
 FOUR_PLACES = Decimal("0.0001")
 
+# Supported explicit forecast horizon, in years
+MIN_FORECAST_YEARS = 5
+MAX_FORECAST_YEARS = 10
+
 # Synthetic rating table: (lower_bound, upper_bound, rating, spread)
 # Coverage ratio maps to rating and default spread
 SYNTHETIC_RATING_TABLE: list[tuple[Decimal, Decimal, str, Decimal]] = [
@@ -377,13 +381,11 @@ def _compute_base_year(inputs: DCFInputs) -> dict:
     }
 
 
-def _compute_projections(inputs: DCFInputs, base: dict) -> list[YearProjection]:
+def _compute_stable_state(inputs: DCFInputs, base: dict) -> dict:
     """
-    Build year-by-year projections for the high-growth period.
-    All parameters transition linearly from base to stable over forecast_years.
+    Resolve stable-state parameters (the targets of the projection
+    transitions and the inputs to the terminal value), applying defaults.
     """
-    n = inputs.forecast_years
-
     # Resolve stable-state defaults
     stable_growth = inputs.stable_growth_rate
     if stable_growth is None:
@@ -400,16 +402,9 @@ def _compute_projections(inputs: DCFInputs, base: dict) -> list[YearProjection]:
         stable_debt_ratio = stable_de / (Decimal("1") + stable_de)
     else:
         stable_debt_ratio = Decimal("0")
-
-    # Base values for transition
-    base_growth = base["expected_growth"]
-    base_beta = base["levered_beta"]
-    base_debt_ratio = base["debt_ratio"]
-    base_roc = base["roc"]
-
-    # Stable ROC: defaults to stable WACC if not specified
-    # We compute stable WACC first to get the default
     stable_equity_ratio = Decimal("1") - stable_debt_ratio
+
+    # Stable WACC
     stable_cost_of_equity = _compute_cost_of_equity(
         inputs.risk_free_rate,
         inputs.stable_beta,
@@ -427,10 +422,39 @@ def _compute_projections(inputs: DCFInputs, base: dict) -> list[YearProjection]:
         stable_debt_ratio,
     )
 
+    # Stable ROC: defaults to stable WACC if not specified
     stable_roc = inputs.stable_roc
     if stable_roc is None:
         stable_roc = stable_wacc  # excess returns = 0
 
+    return {
+        "growth": stable_growth,
+        "debt_ratio": stable_debt_ratio,
+        "wacc": stable_wacc,
+        "roc": stable_roc,
+    }
+
+
+def _compute_projections(
+    inputs: DCFInputs, base: dict, stable: Optional[dict] = None
+) -> list[YearProjection]:
+    """
+    Build year-by-year projections for the high-growth period.
+    All parameters transition linearly from base to stable over forecast_years.
+    """
+    n = inputs.forecast_years
+    if stable is None:
+        stable = _compute_stable_state(inputs, base)
+    stable_growth = stable["growth"]
+    stable_debt_ratio = stable["debt_ratio"]
+    stable_roc = stable["roc"]
+
+    # Base values for transition
+    base_growth = base["expected_growth"]
+    base_beta = base["levered_beta"]
+    base_debt_ratio = base["debt_ratio"]
+    base_roc = base["roc"]
+
     projections: list[YearProjection] = []
     cumulative_ebit_after_tax = base["ebit_after_tax"]
     cumulative_revenue = inputs.revenue
@@ -508,48 +532,17 @@ def _compute_terminal_value(
     inputs: DCFInputs,
     base: dict,
     projections: list[YearProjection],
+    stable: Optional[dict] = None,
 ) -> dict:
     """
     Compute terminal value using Gordon Growth Model.
     Returns dict with terminal value components.
     """
-    # Resolve stable parameters
-    stable_growth = inputs.stable_growth_rate
-    if stable_growth is None:
-        stable_growth = inputs.risk_free_rate - Decimal("0.01")
-    stable_growth = min(stable_growth, inputs.risk_free_rate)
-
-    stable_de = inputs.stable_debt_to_equity
-    if stable_de is None:
-        stable_de = inputs.sector_avg_debt_to_equity
-    if (Decimal("1") + stable_de) != 0:
-        stable_debt_ratio = stable_de / (Decimal("1") + stable_de)
-    else:
-        stable_debt_ratio = Decimal("0")
-    stable_equity_ratio = Decimal("1") - stable_debt_ratio
-
-    # Stable WACC
-    stable_cost_of_equity = _compute_cost_of_equity(
-        inputs.risk_free_rate,
-        inputs.stable_beta,
-        inputs.equity_risk_premium,
-        inputs.country_risk_premium,
-    )
-    stable_cost_of_debt_pretax = base["cost_of_debt_pretax"]
-    stable_cost_of_debt_aftertax = stable_cost_of_debt_pretax * (
-        Decimal("1") - inputs.marginal_tax_rate
-    )
-    stable_wacc = _compute_wacc(
-        stable_cost_of_equity,
-        stable_cost_of_debt_aftertax,
-        stable_equity_ratio,
-        stable_debt_ratio,
-    )
-
-    # Stable ROC
-    stable_roc = inputs.stable_roc
-    if stable_roc is None:
-        stable_roc = stable_wacc
+    if stable is None:
+        stable = _compute_stable_state(inputs, base)
+    stable_growth = stable["growth"]
+    stable_wacc = stable["wacc"]
+    stable_roc = stable["roc"]
 
     # Terminal reinvestment rate
     if stable_roc > Decimal("0"):
@@ -622,44 +615,15 @@ def _compute_equity_bridge(
     }
 
 
-# ---------------------------------------------------------------------------
-# Main Entry Points
-# ---------------------------------------------------------------------------
-
-
-def compute_dcf(inputs: DCFInputs, scenario: str = "moderate") -> DCFResult:
-    """
-    Main entry point -- runs full two-stage FCFF DCF valuation.
-
-    Args:
-        inputs: All financial data and assumptions.
-        scenario: Label for the scenario.
-
-    Returns:
-        DCFResult with all computed values, projections, and equity bridge.
-
-    Raises:
-        DCFError: If inputs are invalid (e.g., negative EBIT).
-    """
-    if inputs.shares_outstanding <= Decimal("0"):
-        raise DCFError("Shares outstanding must be positive.")
-
-    # Step 1: Base year calculations
-    base = _compute_base_year(inputs)
-
-    # Step 2: Year-by-year projections
-    projections = _compute_projections(inputs, base)
-
-    # Step 3: Terminal value
-    terminal = _compute_terminal_value(inputs, base, projections)
-
-    # Step 4: Sum PV of operating cash flows
+def _compute_valuation(
+    inputs: DCFInputs,
+    projections: list[YearProjection],
+    terminal: dict,
+) -> dict:
+    """Sum PV of operating cash flows, run the equity bridge, implied upside."""
     pv_operating = sum((p.pv_fcff for p in projections), Decimal("0"))
-
-    # Step 5: Equity bridge
     bridge = _compute_equity_bridge(pv_operating, terminal["pv_terminal"], inputs)
 
-    # Implied upside
     if inputs.current_price > Decimal("0"):
         implied_upside = (
             bridge["value_per_share"] - inputs.current_price
@@ -667,18 +631,30 @@ def compute_dcf(inputs: DCFInputs, scenario: str = "moderate") -> DCFResult:
     else:
         implied_upside = Decimal("0")
 
+    return {**bridge, "pv_operating": pv_operating, "implied_upside": implied_upside}
+
+
+def _build_result(inputs: DCFInputs, scenario: str, stages: dict) -> DCFResult:
+    """Assemble a DCFResult from the outputs of every stage."""
+    base = stages["base_year"]
+    projections = stages["projections"]
+    terminal = stages["terminal"]
+    valuation = stages["equity_bridge"]
+
     return DCFResult(
         # Key outputs
-        value_per_share=bridge["value_per_share"].quantize(
+        value_per_share=valuation["value_per_share"].quantize(
             TWO_PLACES, rounding=ROUND_HALF_UP
         ),
-        enterprise_value=bridge["enterprise_value"].quantize(
+        enterprise_value=valuation["enterprise_value"].quantize(
             TWO_PLACES, rounding=ROUND_HALF_UP
         ),
-        equity_value=bridge["equity_value"].quantize(
+        equity_value=valuation["equity_value"].quantize(
             TWO_PLACES, rounding=ROUND_HALF_UP
         ),
-        implied_upside=implied_upside.quantize(FOUR_PLACES, rounding=ROUND_HALF_UP),
+        implied_upside=valuation["implied_upside"].quantize(
+            FOUR_PLACES, rounding=ROUND_HALF_UP
+        ),
         # Computed inputs
         effective_tax_rate=base["effective_tax_rate"],
         computed_tax_rate=base["computed_tax_rate"],
@@ -705,25 +681,201 @@ def compute_dcf(inputs: DCFInputs, scenario: str = "moderate") -> DCFResult:
         terminal_growth=terminal["terminal_growth"],
         terminal_roc=terminal["terminal_roc"],
         pv_terminal=terminal["pv_terminal"],
-        pv_operating_cashflows=pv_operating,
+        pv_operating_cashflows=valuation["pv_operating"],
         # Equity bridge
         enterprise_value_detail={
-            "pv_fcff": pv_operating,
+            "pv_fcff": valuation["pv_operating"],
             "pv_terminal": terminal["pv_terminal"],
         },
-        equity_bridge=bridge["equity_bridge"],
+        equity_bridge=valuation["equity_bridge"],
         # Metadata
         scenario=scenario,
         forecast_years=inputs.forecast_years,
     )
 
 
-def compute_sensitivity_matrix(inputs: DCFInputs, result: DCFResult) -> dict:
+# ---------------------------------------------------------------------------
+# Stage Graph (incremental recomputation)
+# ---------------------------------------------------------------------------
+
+# Stages in dependency order
+DCF_STAGES = ("base_year", "stable_state", "projections", "terminal", "equity_bridge")
+
+# DCFInputs fields each stage reads directly
+STAGE_FIELDS: dict[str, frozenset[str]] = {
+    "base_year": frozenset(
+        {
+            "ebit",
+            "tax_provision",
+            "pretax_income",
+            "marginal_tax_rate",
+            "capex",
+            "depreciation",
+            "working_capital_change",
+            "book_value_equity",
+            "total_debt",
+            "cash_and_equivalents",
+            "shares_outstanding",
+            "current_price",
+            "unlevered_beta",
+            "risk_free_rate",
+            "equity_risk_premium",
+            "country_risk_premium",
+            "interest_expense",
+        }
+    ),
+    "stable_state": frozenset(
+        {
+            "stable_growth_rate",
+            "stable_debt_to_equity",
+            "sector_avg_debt_to_equity",
+            "stable_beta",
+            "stable_roc",
+            "risk_free_rate",
+            "equity_risk_premium",
+            "country_risk_premium",
+            "marginal_tax_rate",
+        }
+    ),
+    "projections": frozenset(
+        {
+            "forecast_years",
+            "revenue",
+            "stable_beta",
+            "risk_free_rate",
+            "equity_risk_premium",
+            "country_risk_premium",
+        }
+    ),
+    "terminal": frozenset(),
+    "equity_bridge": frozenset(
+        {
+            "cash_and_equivalents",
+            "total_debt",
+            "minority_interests",
+            "preferred_stock",
+            "shares_outstanding",
+            "current_price",
+        }
+    ),
+}
+
+# Upstream stages whose outputs each stage consumes
+STAGE_UPSTREAM: dict[str, tuple[str, ...]] = {
+    "base_year": (),
+    "stable_state": ("base_year",),
+    "projections": ("base_year", "stable_state"),
+    "terminal": ("stable_state", "projections"),
+    "equity_bridge": ("projections", "terminal"),
+}
+
+_STAGE_FUNCTIONS = {
+    "base_year": lambda inputs, s: _compute_base_year(inputs),
+    "stable_state": lambda inputs, s: _compute_stable_state(inputs, s["base_year"]),
+    "projections": lambda inputs, s: _compute_projections(
+        inputs, s["base_year"], s["stable_state"]
+    ),
+    "terminal": lambda inputs, s: _compute_terminal_value(
+        inputs, s["base_year"], s["projections"], s["stable_state"]
+    ),
+    "equity_bridge": lambda inputs, s: _compute_valuation(
+        inputs, s["projections"], s["terminal"]
+    ),
+}
+
+
+class DCFStageGraph:
+    """
+    Incremental DCF valuation.
+
+    Keeps every stage's output from the previous compute() call. On the next
+    call only stages that read a changed input field, or whose upstream
+    output actually changed, are rerun — a stage that reruns to an identical
+    output does not invalidate its dependents. stages_run lists the stages
+    recomputed by the last call.
+
+    Not thread-safe; use one graph per caller.
+    """
+
+    def __init__(self) -> None:
+        self._inputs: Optional[DCFInputs] = None
+        self._stages: dict = {}
+        self.stages_run: list[str] = []
+
+    def _changed_fields(self, inputs: DCFInputs) -> set[str]:
+        names = {f.name for f in fields(DCFInputs)}
+        if self._inputs is None:
+            return names
+        return {n for n in names if getattr(inputs, n) != getattr(self._inputs, n)}
+
+    def compute(self, inputs: DCFInputs, scenario: str = "moderate") -> DCFResult:
+        """Run (or incrementally rerun) the valuation. Same contract as compute_dcf."""
+        if inputs.shares_outstanding <= Decimal("0"):
+            raise DCFError("Shares outstanding must be positive.")
+
+        changed_fields = self._changed_fields(inputs)
+        changed_stages: set[str] = set()
+        self.stages_run = []
+
+        try:
+            for stage in DCF_STAGES:
+                stale = (
+                    stage not in self._stages
+                    or not changed_fields.isdisjoint(STAGE_FIELDS[stage])
+                    or not changed_stages.isdisjoint(STAGE_UPSTREAM[stage])
+                )
+                if not stale:
+                    continue
+                output = _STAGE_FUNCTIONS[stage](inputs, self._stages)
+                self.stages_run.append(stage)
+                if self._stages.get(stage) != output:
+                    changed_stages.add(stage)
+                self._stages[stage] = output
+        except DCFError:
+            # Partially updated stages no longer match any inputs
+            self._inputs = None
+            self._stages = {}
+            raise
+
+        # Snapshot: callers may mutate their inputs after computing
+        self._inputs = replace(inputs)
+        return _build_result(inputs, scenario, self._stages)
+
+
+# ---------------------------------------------------------------------------
+# Main Entry Points
+# ---------------------------------------------------------------------------
+
+
+def compute_dcf(inputs: DCFInputs, scenario: str = "moderate") -> DCFResult:
+    """
+    Main entry point -- runs full two-stage FCFF DCF valuation.
+
+    Args:
+        inputs: All financial data and assumptions.
+        scenario: Label for the scenario.
+
+    Returns:
+        DCFResult with all computed values, projections, and equity bridge.
+
+    Raises:
+        DCFError: If inputs are invalid (e.g., negative EBIT).
+    """
+    return DCFStageGraph().compute(inputs, scenario)
+
+
+def compute_sensitivity_matrix(
+    inputs: DCFInputs,
+    result: DCFResult,
+    step: Decimal = Decimal("0.005"),
+    wacc_span: Decimal = Decimal("0.02"),
+) -> dict:
     """
     Generate WACC vs. terminal growth rate sensitivity table.
 
-    WACC range: base_wacc +/- 2%, step 0.5% (9 values)
-    Growth range: 0% to risk_free_rate, step 0.5%
+    WACC range: base_wacc +/- `wacc_span` (default 2%), in `step` increments
+    (default 0.5%, 9 values)
+    Growth range: 0% to risk_free_rate, in `step` increments
 
     Each cell: recompute terminal value with that WACC/growth,
     keep PV of operating cash flows constant.
@@ -744,13 +896,13 @@ def compute_sensitivity_matrix(inputs: DCFInputs, result: DCFResult) -> dict:
     last_pv_factor = result.projections[-1].pv_factor
     last_ebit_at = result.projections[-1].ebit_after_tax
 
-    # WACC range: base +/- 2%, step 0.5%
+    # WACC range: base +/- span
     wacc_values: list[Decimal] = []
-    step = Decimal("0.005")
-    for i in range(-4, 5):
+    half = int(wacc_span / step)
+    for i in range(-half, half + 1):
         wacc_values.append(base_wacc + step * Decimal(str(i)))
 
-    # Growth range: 0% to risk_free_rate, step 0.5%
+    # Growth range: 0% to risk_free_rate
     growth_values: list[Decimal] = []
     g = Decimal("0")
     while g <= inputs.risk_free_rate + Decimal("0.0001"):
@@ -808,6 +960,7 @@ def apply_scenario(
     scenario: str,
     sector_avg_reinvestment_rate: Decimal = Decimal("0"),
     sector_avg_roc: Decimal = Decimal("0"),
+    base: Optional[dict] = None,
 ) -> DCFInputs:
     """
     Return modified inputs for a scenario preset.
@@ -816,10 +969,12 @@ def apply_scenario(
         "conservative": sector avg growth, no beta improvement, ROC=WACC, g=rf-2%
         "moderate" (default): company's own rates, beta->1.0, ROC=WACC, g=rf-1%
         "optimistic": company's rates, beta->0.8-1.0, ROC=1.5xWACC, g=rf
-    """
-    import copy
 
-    modified = copy.deepcopy(inputs)
+    `base` is an already computed base year for these inputs; when given,
+    the optimistic stable WACC estimate reuses its cost of debt.
+    """
+    # Shallow copy is enough: every field is immutable (Decimal/int/None)
+    modified = replace(inputs)
 
     if scenario == "conservative":
         # Keep current beta (no improvement) -- compute current levered beta
@@ -851,27 +1006,63 @@ def apply_scenario(
         modified.stable_debt_to_equity = None  # sector avg default
         modified.stable_growth_rate = inputs.risk_free_rate  # max: risk-free rate
 
-        # Terminal ROC = 1.5x WACC -- compute an estimate of stable WACC first
-        stable_de = inputs.sector_avg_debt_to_equity
-        if (Decimal("1") + stable_de) != 0:
-            stable_dr = stable_de / (Decimal("1") + stable_de)
+        # Terminal ROC = 1.5x stable WACC
+        if base is not None:
+            cod_pretax = base["cost_of_debt_pretax"]
         else:
-            stable_dr = Decimal("0")
-        stable_er = Decimal("1") - stable_dr
-        coe = _compute_cost_of_equity(
-            inputs.risk_free_rate,
-            Decimal("1.0"),
-            inputs.equity_risk_premium,
-            inputs.country_risk_premium,
-        )
-        _, spread = _get_synthetic_rating(inputs.ebit, inputs.interest_expense)
-        cod_pretax = inputs.risk_free_rate + spread
-        cod_at = cod_pretax * (Decimal("1") - inputs.marginal_tax_rate)
-        est_wacc = _compute_wacc(coe, cod_at, stable_er, stable_dr)
-        modified.stable_roc = est_wacc * Decimal("1.5")
+            _, spread = _get_synthetic_rating(inputs.ebit, inputs.interest_expense)
+            cod_pretax = inputs.risk_free_rate + spread
+        stable = _compute_stable_state(modified, {"cost_of_debt_pretax": cod_pretax})
+        modified.stable_roc = stable["wacc"] * Decimal("1.5")
 
     else:
         # "custom" or unknown -- return as-is
         pass
 
     return modified
+
+
+def compute_scenarios(
+    inputs: DCFInputs,
+    scenarios: Sequence[str],
+    sector_avg_reinvestment_rate: Decimal = Decimal("0"),
+    sector_avg_roc: Decimal = Decimal("0"),
+) -> dict[str, DCFResult]:
+    """
+    Value several scenario presets of the same inputs side by side.
+
+    Presets only change stable-state assumptions, so the base year is
+    computed once and shared; each scenario then resolves its stable state
+    once and runs the projection, terminal and bridge stages.
+
+    Returns results keyed by scenario, in the order given.
+
+    Raises:
+        DCFError: If inputs are invalid (e.g., negative EBIT).
+    """
+    if inputs.shares_outstanding <= Decimal("0"):
+        raise DCFError("Shares outstanding must be positive.")
+
+    base = _compute_base_year(inputs)
+
+    results: dict[str, DCFResult] = {}
+    for scenario in scenarios:
+        modified = apply_scenario(
+            inputs,
+            scenario,
+            sector_avg_reinvestment_rate=sector_avg_reinvestment_rate,
+            sector_avg_roc=sector_avg_roc,
+            base=base,
+        )
+        stable = _compute_stable_state(modified, base)
+        projections = _compute_projections(modified, base, stable)
+        terminal = _compute_terminal_value(modified, base, projections, stable)
+        stages = {
+            "base_year": base,
+            "stable_state": stable,
+            "projections": projections,
+            "terminal": terminal,
+            "equity_bridge": _compute_valuation(modified, projections, terminal),
+        }
+        results[scenario] = _build_result(modified, scenario, stages)
+    return results
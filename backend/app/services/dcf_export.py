@@ -0,0 +1,83 @@
+"""
+Bulk export of stored DCF valuations as CSV or JSON Lines.
+
+Pure formatting module with ZERO database access: it turns an async stream
+of run records (DCFService.export_runs) into text chunks, one per run, so a
+StreamingResponse never holds more than one run in memory.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+from app.services.dcf_outputs import BRIDGE_FIELDS, PROJECTION_FIELDS
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+# CSV: one row per (run, forecast year); run-level columns repeat per year
+RUN_COLUMNS = (
+    "run_id",
+    "symbol",
+    "run_name",
+    "scenario",
+    "is_default",
+    "computed_at",
+    "source_fiscal_date",
+    "current_price",
+    "value_per_share",
+    "implied_upside",
+    "verdict",
+)
+
+TERMINAL_FIELDS = (
+    "terminal_growth",
+    "terminal_roc",
+    "terminal_wacc",
+    "terminal_reinvestment_rate",
+    "terminal_fcff",
+    "terminal_value",
+    "pv_terminal",
+)
+
+_BRIDGE_COLUMNS = tuple(f for f in BRIDGE_FIELDS if f != "value_per_share")
+
+CSV_COLUMNS = RUN_COLUMNS + TERMINAL_FIELDS + _BRIDGE_COLUMNS + PROJECTION_FIELDS
+
+
+def csv_rows(record: dict) -> list[list]:
+    """Flatten one run record into CSV rows (a single row if it has no projections)."""
+    terminal = record.get("terminal") or {}
+    bridge = record.get("equity_bridge") or {}
+    prefix = (
+        [record.get(c) for c in RUN_COLUMNS]
+        + [terminal.get(f) for f in TERMINAL_FIELDS]
+        + [bridge.get(f) for f in _BRIDGE_COLUMNS]
+    )
+    projections = record.get("projections") or [{}]
+    return [prefix + [p.get(f) for f in PROJECTION_FIELDS] for p in projections]
+
+
+async def export_chunks(
+    records: AsyncIterator[dict], format: str
+) -> AsyncIterator[str]:
+    """Serialize run records incrementally; yields one text chunk per run."""
+    if format == "jsonl":
+        async for record in records:
+            yield json.dumps(record, default=str) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+    async for record in records:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(csv_rows(record))
+        yield buffer.getvalue()
@@ -0,0 +1,100 @@
+"""
+Storage format for DcfValuation.outputs.
+
+The API shape (DCFService._format_result) repeats every projection field
+name once per forecast year. Stored rows use a compact, versioned form
+instead:
+
+  version 1 (legacy)  the API shape as-is
+  version 2           "projections" is a struct of arrays
+                      ({"year": [1, 2, ...], "fcff": [...], ...}) and
+                      "equity_bridge" is a numeric vector ordered as
+                      BRIDGE_FIELDS
+
+Readers call expand_outputs(), which accepts either version.
+"""
+
+OUTPUTS_FORMAT_VERSION = 2
+
+PROJECTION_FIELDS = (
+    "year",
+    "growth_rate",
+    "revenue",
+    "ebit",
+    "ebit_after_tax",
+    "reinvestment_rate",
+    "reinvestment",
+    "fcff",
+    "beta",
+    "cost_of_equity",
+    "debt_ratio",
+    "wacc",
+    "roc",
+    "pv_factor",
+    "pv_fcff",
+)
+
+BRIDGE_FIELDS = (
+    "enterprise_value",
+    "plus_cash",
+    "minus_debt",
+    "minus_minority_interests",
+    "minus_preferred_stock",
+    "equity_value",
+    "shares_outstanding",
+    "value_per_share",
+)
+
+
+def compact_outputs(outputs: dict) -> dict:
+    """API-shaped outputs -> compact stored form (current version)."""
+    projections = outputs.get("projections") or []
+    bridge = outputs.get("equity_bridge") or {}
+    return {
+        **outputs,
+        "format_version": OUTPUTS_FORMAT_VERSION,
+        "projections": {
+            field: [p.get(field) for p in projections] for field in PROJECTION_FIELDS
+        },
+        "equity_bridge": [bridge.get(field) for field in BRIDGE_FIELDS],
+    }
+
+
+def expand_outputs(stored: dict) -> dict:
+    """Stored outputs of any format version -> API shape.
+
+    Null entries are dropped: they stand for keys that the row had before
+    it was compacted (older runs stored no shares_outstanding or
+    value_per_share in equity_bridge), so the expanded dict keeps the
+    row's original shape.
+    """
+    version = stored.get("format_version", 1)
+    if version == 1:
+        return stored
+
+    outputs = {k: v for k, v in stored.items() if k != "format_version"}
+
+    columns = stored.get("projections") or {}
+    years = len(columns.get("year") or [])
+    outputs["projections"] = [
+        {
+            field: values[i]
+            for field, values in columns.items()
+            if i < len(values) and values[i] is not None
+        }
+        for i in range(years)
+    ]
+    outputs["equity_bridge"] = {
+        field: value
+        for field, value in zip(BRIDGE_FIELDS, stored.get("equity_bridge") or [])
+        if value is not None
+    }
+    return outputs
+
+
+def projection_columns(stored: dict) -> dict[str, list]:
+    """Projection struct-of-arrays from stored outputs of any format version."""
+    if stored.get("format_version", 1) >= 2:
+        return stored.get("projections") or {}
+    projections = stored.get("projections") or []
+    return {field: [p.get(field) for p in projections] for field in PROJECTION_FIELDS}
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.dcf_service import DCFService
+
+logger = logging.getLogger(__name__)
+
+
+class DefaultRevaluator:
+    """Background job that refreshes stale default DCF valuations after
+    the data they depend on changes (a DGS10 rate change, updated
+    Damodaran reference rows), so no visitor pays the recompute latency."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_workers: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self.last_report: Optional[dict] = None
+        self._pending: set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Triggers
+    # ------------------------------------------------------------------
+
+    def notify(self, reason: str) -> None:
+        """Request a revaluation pass. Requests arriving while a pass is
+        running are coalesced into a single follow-up pass."""
+        logger.info("DCF revaluation requested: %s", reason)
+        self._pending.add(reason)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+
+    async def wait(self) -> None:
+        """Wait for the current (and any follow-up) pass to finish."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    # ------------------------------------------------------------------
+    # Job
+    # ------------------------------------------------------------------
+
+    async def _drain(self) -> None:
+        while self._pending:
+            reasons = sorted(self._pending)
+            self._pending.clear()
+            await self.run_once(reasons)
+
+    async def run_once(self, reasons: Optional[list[str]] = None) -> Optional[dict]:
+        """Run one revaluation pass; failures are logged, never raised."""
+        async with self.session_factory() as session:
+            try:
+                report = await DCFService(session).revalue_stale_defaults(
+                    max_workers=self.max_workers
+                )
+            except Exception:
+                logger.exception("DCF revaluation failed (%s)", reasons)
+                return None
+        self.last_report = report
+        logger.info(
+            "DCF revaluation (%s): %d of %d defaults stale, %d refreshed, "
+            "%d rebuilt, %d failed in %.3fs",
+            ", ".join(reasons or []),
+            report["stale"],
+            report["checked"],
+            report["refreshed"],
+            report["rebuilt"],
+            report["failed"],
+            report["elapsed_seconds"],
+        )
+        return report
+
+    def stop(self) -> None:
+        """Cancel a running pass."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._pending.clear()
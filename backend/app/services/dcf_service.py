@@ -1,57 +1,74 @@
 """DCF orchestration service: gathers data, checks eligibility, runs engine, manages saved runs."""
 
+import asyncio
+import hashlib
 import logging
-from datetime import date, datetime, timezone
+import math
+import os
+import secrets
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Executor
+from dataclasses import dataclass, fields, replace
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
-from typing import Optional
+from typing import AsyncIterator, NamedTuple, Optional, Sequence
 
-from sqlalchemy import select, delete
+import numpy as np
+from sqlalchemy import delete, func, insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.dcf import (
     CountryRiskPremium,
     DamodaranIndustry,
     DcfAuditLog,
     DcfValuation,
+    SectorMapping,
 )
 from app.models.shared import FredSeries
-from app.models.stocks import PriceHistory, Stock
+from app.models.stocks import FinancialStatement, PriceHistory, Stock
+from app.services.dcf_analytics import (
+    DEFAULT_SIMULATION_SPREADS,
+    attribute_change,
+    compute_sensitivity_grid,
+    compute_tornado,
+    grid_axis,
+    grid_centers,
+    simulate_dcf,
+    simulation_centers,
+    solve_implied,
+    summarize_distribution,
+    value_path,
+)
+from app.services.dcf_batch import (
+    ERROR_NEGATIVE_EBIT,
+    ERROR_NON_POSITIVE_SHARES,
+    ERROR_TERMINAL_DENOMINATOR,
+    compute_dcf_batch,
+)
 from app.services.dcf_engine import (
     DCFError,
     DCFInputs,
+    DCFResult,
+    DCFStageGraph,
     compute_dcf,
+    compute_scenarios,
     compute_sensitivity_matrix,
     apply_scenario,
 )
+from app.services.dcf_outputs import (
+    PROJECTION_FIELDS,
+    compact_outputs,
+    expand_outputs,
+    projection_columns,
+)
+from app.services.memo import AsyncLRUCache
 from app.services.sector_mapping import SectorMappingResult, sector_mapping_service
-from app.services.ttm import TTMService
+from app.services.ttm import STATEMENT_TYPES, TTMService
 
 logger = logging.getLogger(__name__)
 
-# Twelve Data JSONB field names
-_INCOME_FIELDS = {
-    "revenue": "revenue",
-    "ebit": "operating_income",
-    "pretax_income": "income_before_tax",
-    "tax_provision": "income_tax_expense",
-    "interest_expense": "interest_expense",
-}
-
-_CASHFLOW_FIELDS = {
-    "capex": "capital_expenditure",
-    "depreciation": "depreciation_and_amortization",
-}
-
-_BALANCE_FIELDS = {
-    "total_debt": "total_debt",
-    "cash": "cash_and_cash_equivalents",
-    "book_equity": "total_shareholders_equity",
-    "current_assets": "current_assets",
-    "current_liabilities": "current_liabilities",
-    "shares_outstanding": "shares_outstanding",
-    "minority_interest": "minority_interest",
-}
-
 
 class DCFEligibilityError(Exception):
     """Raised when a stock is not eligible for DCF valuation."""
@@ -62,15 +79,221 @@ class DCFEligibilityError(Exception):
         super().__init__(detail)
 
 
-def _safe_decimal(data: dict, key: str, default: Decimal = Decimal("0")) -> Decimal:
-    """Extract a value from JSONB data and convert to Decimal safely."""
-    val = data.get(key)
-    if val is None:
-        return default
-    try:
-        return Decimal(str(val))
-    except Exception:
-        return default
+def _verdict(upside: float) -> str:
+    """Plain-English verdict for an implied upside (±15% band is fair value)."""
+    if upside > 0.15:
+        return "undervalued"
+    if upside < -0.15:
+        return "overvalued"
+    return "fairly valued"
+
+
+def _finite(value: float, digits: int = 4) -> Optional[float]:
+    """Round a float for JSON; NaN/inf (an invalid valuation) become None."""
+    return round(float(value), digits) if math.isfinite(value) else None
+
+
+# Stage graphs kept between compute_custom calls so a slider move only reruns
+# the stages its override touches. Graphs belong to one client: each set is
+# keyed by an opaque stage token returned with the result and echoed back
+# (the live WebSocket holds its own set per connection instead), so clients
+# editing the same stock never overwrite each other's stages. LRU-bounded.
+_STAGE_GRAPH_CACHE_SIZE = 256
+StageGraphs = dict[tuple[int, str], DCFStageGraph]
+_stage_graphs: "OrderedDict[str, StageGraphs]" = OrderedDict()
+
+
+def _get_stage_graphs(stage_token: Optional[str]) -> tuple[str, StageGraphs]:
+    """Return a client's stage graphs, issuing a new token if unknown or evicted."""
+    graphs = _stage_graphs.pop(stage_token, None) if stage_token else None
+    if graphs is None:
+        stage_token, graphs = secrets.token_urlsafe(18), {}
+    _stage_graphs[stage_token] = graphs
+    while len(_stage_graphs) > _STAGE_GRAPH_CACHE_SIZE:
+        _stage_graphs.popitem(last=False)
+    return stage_token, graphs
+
+
+class StockRef(NamedTuple):
+    """The Stock attributes cached snapshots need, detached from any session."""
+
+    id: int
+    symbol: str
+    name: Optional[str]
+
+
+@dataclass(frozen=True)
+class InputSnapshot:
+    """
+    A stock's baseline DCFInputs (no overrides, no scenario) and the data
+    they were built from, for one data version. Shared read-only; derive
+    run inputs with dataclasses.replace.
+    """
+
+    token: str
+    fingerprint: str
+    stock: StockRef
+    sector: SectorMappingResult
+    ttm: dict
+    inputs: DCFInputs
+
+    @property
+    def fiscal_date(self) -> Optional[str]:
+        return self.ttm.get("period_end")
+
+
+# Baseline input snapshots keyed by an opaque token derived from (stock_id,
+# data fingerprint). Clients echo the token back on slider recomputes to skip
+# data gathering; the TTL bounds how stale a token-addressed snapshot can get.
+_SNAPSHOT_CACHE_SIZE = 1024
+_SNAPSHOT_TTL_SECONDS = 300
+_snapshots: AsyncLRUCache[InputSnapshot] = AsyncLRUCache(
+    _SNAPSHOT_CACHE_SIZE, ttl=_SNAPSHOT_TTL_SECONDS
+)
+
+
+def _snapshot_token(stock_id: int, fingerprint: str) -> str:
+    return hashlib.sha256(f"{stock_id}:{fingerprint}".encode()).hexdigest()[:24]
+
+
+@dataclass(frozen=True)
+class ValuationArtifact:
+    """
+    A stock's moderate default valuation and the data it was built from.
+    Shared read-only between endpoints; callers must not mutate it.
+    """
+
+    fingerprint: str
+    sector: SectorMappingResult
+    ttm: dict
+    inputs: DCFInputs
+    result: DCFResult
+
+    @property
+    def fiscal_date(self) -> Optional[str]:
+        return self.ttm.get("period_end")
+
+
+# Default valuations keyed by (stock_id, data fingerprint), so the summary,
+# sensitivity and default endpoints fired together by the DCF page share one
+# computation. A new fingerprint simply misses; stale keys age out of the LRU.
+_ARTIFACT_CACHE_SIZE = 512
+_artifacts: AsyncLRUCache[ValuationArtifact] = AsyncLRUCache(_ARTIFACT_CACHE_SIZE)
+
+# Surfaces of defaults just persisted, keyed like _artifacts. Persisting
+# deletes then inserts the default row, so concurrent misses for one stock
+# (compute_default and get_sensitivity fired together) must single-flight
+# through here or both inserts land and the stock gets two defaults. The
+# short TTL only has to cover such a burst.
+_PERSIST_TTL_SECONDS = 60.0
+_persisted: AsyncLRUCache[dict] = AsyncLRUCache(
+    _ARTIFACT_CACHE_SIZE, ttl=_PERSIST_TTL_SECONDS
+)
+
+
+_BATCH_ERROR_DETAILS = {
+    ERROR_NEGATIVE_EBIT: "EBIT must be positive for FCFF DCF valuation.",
+    ERROR_NON_POSITIVE_SHARES: "Shares outstanding must be positive.",
+    ERROR_TERMINAL_DENOMINATOR: "Terminal WACC must exceed the stable growth rate.",
+}
+
+SCENARIO_PRESETS = ("conservative", "moderate", "optimistic")
+
+# Rows fetched per round trip by the export's server-side cursor
+_EXPORT_BATCH_SIZE = 200
+
+
+# Bump when the stored default outputs change shape so old rows are recomputed.
+_FINGERPRINT_VERSION = 2
+
+
+def _latest_rate_subquery():
+    """Scalar subquery: value of the latest DGS10 observation."""
+    return (
+        select(FredSeries.value)
+        .where(FredSeries.series_id == "DGS10")
+        .order_by(FredSeries.observation_date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _default_fingerprint(
+    fiscal_date,
+    rate,
+    price_date,
+    mapping_id,
+    industry_id,
+    damodaran_updated_at,
+    country_updated_at,
+) -> str:
+    """
+    Digest of the data versions a default valuation is computed from: latest
+    quarterly statement, latest DGS10 value (a new observation at the same
+    rate changes nothing), latest price, sector mapping and the Damodaran
+    industry / country rows it reads.
+    """
+    parts = (
+        _FINGERPRINT_VERSION,
+        fiscal_date,
+        rate,
+        price_date,
+        mapping_id,
+        industry_id,
+        damodaran_updated_at,
+        country_updated_at,
+    )
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+# WACC x growth grid steps of the sensitivity surfaces stored with every
+# default valuation (both span base WACC +/- 2% and growth 0..risk-free)
+SENSITIVITY_STEPS = {
+    "standard": Decimal("0.005"),
+    "dense": Decimal("0.001"),
+}
+
+
+def _sensitivity_surfaces(inputs: DCFInputs, result: DCFResult) -> dict:
+    """JSON-safe sensitivity matrices for a valuation, one per SENSITIVITY_STEPS."""
+    surfaces = {}
+    for density, step in SENSITIVITY_STEPS.items():
+        matrix = compute_sensitivity_matrix(inputs, result, step=step)
+        surfaces[density] = {
+            "wacc_values": [float(v) for v in matrix["wacc_values"]],
+            "growth_values": [float(v) for v in matrix["growth_values"]],
+            "matrix": [[float(c) for c in row] for row in matrix["matrix"]],
+            "base_wacc": float(matrix["base_wacc"]),
+            "base_growth": float(matrix["base_growth"]),
+            "base_value": float(result.value_per_share),
+        }
+    return surfaces
+
+
+# Jobs per thread hop when default valuations are recomputed inside the API
+# worker (no executor): small, so the GIL is handed back often.
+_BACKGROUND_CHUNK_SIZE = 4
+
+
+def _compute_default_chunk(
+    jobs: list[tuple[int, DCFInputs]],
+) -> list[tuple[int, Optional[DCFResult], Optional[dict], Optional[str]]]:
+    """
+    Executor worker: run the moderate default valuation and its
+    sensitivity surfaces for a chunk of (stock_id, inputs) pairs. Returns
+    (stock_id, result, surfaces, error) per job. Module-level so a process
+    pool can pickle it.
+    """
+    out: list[tuple[int, Optional[DCFResult], Optional[dict], Optional[str]]] = []
+    for stock_id, inputs in jobs:
+        try:
+            result = compute_dcf(inputs, scenario="moderate")
+        except DCFError as e:
+            out.append((stock_id, None, None, str(e)))
+            continue
+        out.append((stock_id, result, _sensitivity_surfaces(inputs, result), None))
+    return out
 
 
 class DCFService:
@@ -147,74 +370,204 @@ class DCFService:
             str(row.country_risk_premium)
         )
 
+    async def _get_default_state(
+        self, stock: Stock, stored_column=DcfValuation.outputs
+    ) -> tuple[str, bool, Optional[dict]]:
+        """
+        Current data fingerprint for the stock's default valuation, whether
+        its sector mapping exists yet, and the stored default's
+        `stored_column` (outputs, or the sensitivity surfaces) if it was
+        computed from the same data. One round trip.
+        """
+        mapping = (
+            select(
+                SectorMapping.id.label("mapping_id"),
+                SectorMapping.damodaran_industry_id,
+                DamodaranIndustry.updated_at,
+            )
+            .outerjoin(
+                DamodaranIndustry,
+                DamodaranIndustry.id == SectorMapping.damodaran_industry_id,
+            )
+            .where(
+                SectorMapping.twelvedata_sector == (stock.sector or ""),
+                SectorMapping.twelvedata_industry == (stock.industry or ""),
+            )
+            .subquery()
+        )
+        stored = (
+            select(DcfValuation.fingerprint, stored_column.label("stored"))
+            .where(
+                DcfValuation.stock_id == stock.id,
+                DcfValuation.is_default.is_(True),
+            )
+            .order_by(DcfValuation.computed_at.desc())
+            .limit(1)
+            .subquery()
+        )
+        result = await self.session.execute(
+            select(
+                select(func.max(FinancialStatement.fiscal_date))
+                .where(
+                    FinancialStatement.stock_id == stock.id,
+                    FinancialStatement.period == "quarterly",
+                )
+                .scalar_subquery(),
+                _latest_rate_subquery(),
+                select(func.max(PriceHistory.date))
+                .where(PriceHistory.stock_id == stock.id)
+                .scalar_subquery(),
+                select(mapping.c.mapping_id).scalar_subquery(),
+                select(mapping.c.damodaran_industry_id).scalar_subquery(),
+                select(mapping.c.updated_at).scalar_subquery(),
+                select(CountryRiskPremium.updated_at)
+                .where(CountryRiskPremium.country == "United States")
+                .scalar_subquery(),
+                select(stored.c.fingerprint).scalar_subquery(),
+                select(stored.c.stored).scalar_subquery(),
+            )
+        )
+        *components, stored_fingerprint, stored_value = result.one()
+        fingerprint = _default_fingerprint(*components)
+        mapped = components[3] is not None
+        if stored_fingerprint != fingerprint or stored_value is None:
+            return fingerprint, mapped, None
+        if stored_column is DcfValuation.outputs:
+            stored_value = expand_outputs(stored_value)
+        return fingerprint, mapped, stored_value
+
+    async def _get_default_fingerprints(
+        self, stocks: Sequence[Stock]
+    ) -> dict[int, str]:
+        """Data fingerprints for many stocks' default valuations."""
+        if not stocks:
+            return {}
+        stock_ids = [stock.id for stock in stocks]
+
+        fiscal_dates = await self._get_latest_fiscal_dates(stock_ids)
+        price_dates = dict(
+            (
+                await self.session.execute(
+                    select(PriceHistory.stock_id, func.max(PriceHistory.date))
+                    .where(PriceHistory.stock_id.in_(stock_ids))
+                    .group_by(PriceHistory.stock_id)
+                )
+            ).all()
+        )
+        rate, country_updated_at = (
+            await self.session.execute(
+                select(
+                    _latest_rate_subquery(),
+                    select(CountryRiskPremium.updated_at)
+                    .where(CountryRiskPremium.country == "United States")
+                    .scalar_subquery(),
+                )
+            )
+        ).one()
+
+        pairs = {(stock.sector or "", stock.industry or "") for stock in stocks}
+        mapping_rows = await self.session.execute(
+            select(
+                SectorMapping.twelvedata_sector,
+                SectorMapping.twelvedata_industry,
+                SectorMapping.id,
+                SectorMapping.damodaran_industry_id,
+                DamodaranIndustry.updated_at,
+            )
+            .outerjoin(
+                DamodaranIndustry,
+                DamodaranIndustry.id == SectorMapping.damodaran_industry_id,
+            )
+            .where(
+                tuple_(
+                    SectorMapping.twelvedata_sector,
+                    SectorMapping.twelvedata_industry,
+                ).in_(pairs)
+            )
+        )
+        mappings = {(row[0], row[1]): row[2:] for row in mapping_rows.all()}
+
+        return {
+            stock.id: _default_fingerprint(
+                fiscal_dates.get(stock.id),
+                rate,
+                price_dates.get(stock.id),
+                *mappings.get(
+                    (stock.sector or "", stock.industry or ""), (None, None, None)
+                ),
+                country_updated_at,
+            )
+            for stock in stocks
+        }
+
+    async def _get_latest_fiscal_dates(
+        self, stock_ids: Sequence[int]
+    ) -> dict[int, date]:
+        """Latest quarterly statement date per stock (absent when none)."""
+        result = await self.session.execute(
+            select(
+                FinancialStatement.stock_id,
+                func.max(FinancialStatement.fiscal_date),
+            )
+            .where(
+                FinancialStatement.stock_id.in_(stock_ids),
+                FinancialStatement.period == "quarterly",
+            )
+            .group_by(FinancialStatement.stock_id)
+        )
+        return dict(result.all())
+
+    async def _get_current_prices(self, stock_ids: Sequence[int]) -> dict[int, Decimal]:
+        """Latest close for many stocks from one DISTINCT ON query."""
+        if not stock_ids:
+            return {}
+        result = await self.session.execute(
+            select(PriceHistory.stock_id, PriceHistory.close)
+            .where(PriceHistory.stock_id.in_(stock_ids))
+            .distinct(PriceHistory.stock_id)
+            .order_by(PriceHistory.stock_id, PriceHistory.date.desc())
+        )
+        return {
+            stock_id: Decimal(str(close))
+            for stock_id, close in result.all()
+            if close is not None
+        }
+
     # ------------------------------------------------------------------
     # Extract financials from TTM JSONB
     # ------------------------------------------------------------------
 
     def _extract_financials(self, ttm: dict) -> dict:
-        """Extract DCF-relevant fields from TTM result."""
-        income = ttm.get("income", {})
-        cashflow = ttm.get("cash_flow", {})
-        balance = ttm.get("balance_sheet", {})
-
-        # Try multiple possible key names for each field
-        revenue = _safe_decimal(income, "revenue")
-        ebit = _safe_decimal(income, "operating_income")
-        if ebit == 0:
-            ebit = _safe_decimal(income, "ebit")
-        pretax_income = _safe_decimal(income, "income_before_tax")
-        if pretax_income == 0:
-            pretax_income = _safe_decimal(income, "pretax_income")
-        tax_provision = _safe_decimal(income, "income_tax_expense")
-        if tax_provision == 0:
-            tax_provision = _safe_decimal(income, "tax_provision")
-        interest_expense = _safe_decimal(income, "interest_expense")
-
-        capex = abs(_safe_decimal(cashflow, "capital_expenditure"))
-        if capex == 0:
-            capex = abs(_safe_decimal(cashflow, "capital_expenditures"))
-        depreciation = _safe_decimal(cashflow, "depreciation_and_amortization")
-        if depreciation == 0:
-            depreciation = _safe_decimal(cashflow, "depreciation")
-
-        total_debt = _safe_decimal(balance, "total_debt")
-        if total_debt == 0:
-            short = _safe_decimal(balance, "short_term_debt")
-            long = _safe_decimal(balance, "long_term_debt")
-            total_debt = short + long
-
-        cash = _safe_decimal(balance, "cash_and_cash_equivalents")
-        if cash == 0:
-            cash = _safe_decimal(balance, "cash_and_short_term_investments")
-        book_equity = _safe_decimal(balance, "total_shareholders_equity")
-        if book_equity == 0:
-            book_equity = _safe_decimal(balance, "stockholders_equity")
-
-        current_assets = _safe_decimal(balance, "current_assets")
-        current_liabilities = _safe_decimal(balance, "current_liabilities")
-        shares = _safe_decimal(balance, "shares_outstanding")
-        if shares == 0:
-            shares = _safe_decimal(balance, "common_shares_outstanding")
-
-        minority = _safe_decimal(balance, "minority_interest")
+        """
+        DCF-relevant fields from the TTM canonical facts (aliases were
+        resolved at ingest, see financial_facts). Missing facts are 0.
+        """
+        facts = ttm.get("facts", {})
+
+        def fact(name: str) -> Decimal:
+            value = facts.get(name)
+            return Decimal(str(value)) if value is not None else Decimal("0")
+
+        current_assets = fact("current_assets")
+        current_liabilities = fact("current_liabilities")
 
         # Working capital change: we use current balance sheet WC.
         # For TTM, working_capital_change is approximated from balance sheet.
         working_capital = current_assets - current_liabilities
 
         return {
-            "revenue": revenue,
-            "ebit": ebit,
-            "pretax_income": pretax_income,
-            "tax_provision": tax_provision,
-            "interest_expense": interest_expense,
-            "capex": capex,
-            "depreciation": depreciation,
-            "total_debt": total_debt,
-            "cash": cash,
-            "book_equity": book_equity,
-            "shares_outstanding": shares,
-            "minority_interest": minority,
+            "revenue": fact("revenue"),
+            "ebit": fact("operating_income"),
+            "pretax_income": fact("pretax_income"),
+            "tax_provision": fact("income_tax"),
+            "interest_expense": fact("interest_expense"),
+            "capex": abs(fact("capex")),
+            "depreciation": fact("depreciation"),
+            "total_debt": fact("total_debt"),
+            "cash": fact("cash"),
+            "book_equity": fact("total_equity"),
+            "shares_outstanding": fact("shares_outstanding"),
+            "minority_interest": fact("minority_interest"),
             "working_capital": working_capital,
         }
 
@@ -230,10 +583,25 @@ class DCFService:
         overrides: Optional[dict] = None,
     ) -> DCFInputs:
         """Build DCFInputs from gathered data and optional user overrides."""
-        fin = self._extract_financials(ttm)
         risk_free = await self._get_risk_free_rate()
         price = await self._get_current_price(stock.id)
         erp, crp = await self._get_country_risk()
+        return self._assemble_inputs(
+            ttm, sector, price, risk_free, erp, crp, overrides=overrides
+        )
+
+    def _assemble_inputs(
+        self,
+        ttm: dict,
+        sector: SectorMappingResult,
+        price: Decimal,
+        risk_free: Decimal,
+        erp: Decimal,
+        crp: Decimal,
+        overrides: Optional[dict] = None,
+    ) -> DCFInputs:
+        """Build DCFInputs from already-fetched market data (no queries)."""
+        fin = self._extract_financials(ttm)
 
         # Working capital change: approximate as 0 for base year (more precise
         # would require comparing two quarters' WC, but this is a v1 simplification)
@@ -262,41 +630,67 @@ class DCFService:
             minority_interests=fin["minority_interest"],
         )
 
-        # Apply user overrides
-        if overrides:
-            if overrides.get("forecast_years") is not None:
-                inputs.forecast_years = overrides["forecast_years"]
-            if overrides.get("stable_growth_rate") is not None:
-                inputs.stable_growth_rate = Decimal(
-                    str(overrides["stable_growth_rate"])
-                )
-            if overrides.get("stable_roc") is not None:
-                inputs.stable_roc = Decimal(str(overrides["stable_roc"]))
-            if overrides.get("stable_beta") is not None:
-                inputs.stable_beta = Decimal(str(overrides["stable_beta"]))
-            if overrides.get("stable_debt_to_equity") is not None:
-                inputs.stable_debt_to_equity = Decimal(
-                    str(overrides["stable_debt_to_equity"])
-                )
-            if overrides.get("risk_free_rate") is not None:
-                inputs.risk_free_rate = Decimal(str(overrides["risk_free_rate"]))
-            if overrides.get("equity_risk_premium") is not None:
-                inputs.equity_risk_premium = Decimal(
-                    str(overrides["equity_risk_premium"])
-                )
-            if overrides.get("marginal_tax_rate") is not None:
-                inputs.marginal_tax_rate = Decimal(str(overrides["marginal_tax_rate"]))
+        return self._apply_overrides(inputs, overrides)
 
-        return inputs
+    @staticmethod
+    def _apply_overrides(inputs: DCFInputs, overrides: Optional[dict]) -> DCFInputs:
+        """Return a copy of `inputs` with user slider overrides applied."""
+        if not overrides:
+            return inputs
+
+        changes = {}
+        if overrides.get("forecast_years") is not None:
+            changes["forecast_years"] = overrides["forecast_years"]
+        for field in (
+            "stable_growth_rate",
+            "stable_roc",
+            "stable_beta",
+            "stable_debt_to_equity",
+            "risk_free_rate",
+            "equity_risk_premium",
+            "marginal_tax_rate",
+        ):
+            if overrides.get(field) is not None:
+                changes[field] = Decimal(str(overrides[field]))
+        return replace(inputs, **changes) if changes else inputs
 
     # ------------------------------------------------------------------
-    # Core operations
+    # Cached snapshots and artifacts
     # ------------------------------------------------------------------
 
-    async def compute_default(self, symbol: str) -> dict:
-        """Compute or retrieve the default (system) DCF valuation."""
+    async def _get_input_snapshot(
+        self, symbol: str, token: Optional[str] = None
+    ) -> InputSnapshot:
+        """
+        The baseline input snapshot for `symbol`. A live `token` from an
+        earlier call skips every query; otherwise the current data version is
+        looked up and its snapshot built at most once.
+        """
+        if token is not None:
+            snapshot = _snapshots.get(token)
+            if snapshot is not None and snapshot.stock.symbol == symbol.upper():
+                return snapshot
+
         stock = await self._get_stock(symbol)
+        fingerprint, mapped, _ = await self._get_default_state(stock)
+        return await self._get_snapshot(stock, fingerprint, mapped)
+
+    async def _get_snapshot(
+        self, stock: Stock, fingerprint: str, mapped: bool
+    ) -> InputSnapshot:
+        token = _snapshot_token(stock.id, fingerprint)
+        return await _snapshots.get_or_compute(
+            token,
+            lambda: self._build_input_snapshot(stock, fingerprint, mapped, token),
+        )
+
+    async def _build_input_snapshot(
+        self, stock: Stock, fingerprint: str, mapped: bool, token: str
+    ) -> InputSnapshot:
         sector = await sector_mapping_service.get_mapping(self.session, stock)
+        if not mapped:
+            # get_mapping just created the mapping row the fingerprint reads
+            fingerprint, _, _ = await self._get_default_state(stock)
 
         if not sector.is_eligible:
             raise DCFEligibilityError(
@@ -306,10 +700,33 @@ class DCFService:
 
         ttm = await self._get_ttm(stock.id)
         inputs = await self._build_inputs(stock, ttm, sector)
+        return InputSnapshot(
+            token=token,
+            fingerprint=fingerprint,
+            stock=StockRef(stock.id, stock.symbol, stock.name),
+            sector=sector,
+            ttm=ttm,
+            inputs=inputs,
+        )
+
+    async def _get_default_artifact(
+        self, stock: Stock, fingerprint: str, mapped: bool
+    ) -> ValuationArtifact:
+        """The stock's default valuation, computed once per data fingerprint."""
+        return await _artifacts.get_or_compute(
+            (stock.id, fingerprint),
+            lambda: self._build_default_artifact(stock, fingerprint, mapped),
+        )
+
+    async def _build_default_artifact(
+        self, stock: Stock, fingerprint: str, mapped: bool
+    ) -> ValuationArtifact:
+        snapshot = await self._get_snapshot(stock, fingerprint, mapped)
+        sector = snapshot.sector
 
         # Apply moderate scenario defaults
         inputs = apply_scenario(
-            inputs,
+            snapshot.inputs,
             "moderate",
             sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
             sector_avg_roc=Decimal(str(sector.avg_roc)),
@@ -320,44 +737,75 @@ class DCFService:
         except DCFError as e:
             raise DCFEligibilityError("negative_ebit", str(e))
 
-        # Get fiscal date from TTM
-        fiscal_date = ttm.get("period_end")
-
-        # Persist default valuation
-        await self._save_valuation(
-            stock=stock,
-            sector=sector,
-            fiscal_date=fiscal_date,
-            inputs=inputs,
-            result=result,
-            is_default=True,
-            user_id=None,
-            run_name=None,
+        return ValuationArtifact(
+            snapshot.fingerprint, sector, snapshot.ttm, inputs, result
         )
 
-        return self._format_result(stock, result, fiscal_date, inputs)
+    async def _gather_inputs(
+        self, symbol: str, scenario: Optional[str] = "moderate"
+    ) -> tuple[StockRef, SectorMappingResult, dict, DCFInputs]:
+        """
+        Baseline inputs for an eligible stock from its cached snapshot,
+        adjusted for `scenario` unless it is None.
+        """
+        snapshot = await self._get_input_snapshot(symbol)
+        stock, sector, ttm = snapshot.stock, snapshot.sector, snapshot.ttm
+        inputs = snapshot.inputs
+        if scenario is not None:
+            inputs = apply_scenario(
+                inputs,
+                scenario,
+                sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
+                sector_avg_roc=Decimal(str(sector.avg_roc)),
+            )
+        return stock, sector, ttm, inputs
+
+    # ------------------------------------------------------------------
+    # Core operations
+    # ------------------------------------------------------------------
+
+    async def compute_default(self, symbol: str) -> dict:
+        """
+        Retrieve the default (system) DCF valuation, recomputing it only when
+        the underlying data has changed since it was stored.
+        """
+        stock = await self._get_stock(symbol)
+        fingerprint, mapped, stored = await self._get_default_state(stock)
+        if stored is not None:
+            return stored
+
+        artifact = await self._get_default_artifact(stock, fingerprint, mapped)
+        await self._persist_default(stock, artifact)
+
+        return self._format_result(
+            stock, artifact.result, artifact.fiscal_date, artifact.inputs
+        )
 
     async def compute_custom(
         self,
         symbol: str,
         overrides: dict,
         scenario: Optional[str] = None,
+        snapshot_token: Optional[str] = None,
+        stage_token: Optional[str] = None,
+        stage_graphs: Optional[StageGraphs] = None,
     ) -> dict:
-        """Compute an ephemeral custom DCF run (not saved)."""
-        stock = await self._get_stock(symbol)
-        sector = await sector_mapping_service.get_mapping(self.session, stock)
-
-        if not sector.is_eligible:
-            raise DCFEligibilityError(
-                sector.rejection_reason or "ineligible",
-                f"Stock not eligible for DCF: {sector.rejection_reason}",
-            )
-
-        ttm = await self._get_ttm(stock.id)
-        inputs = await self._build_inputs(stock, ttm, sector, overrides)
+        """
+        Compute an ephemeral custom DCF run (not saved).
+
+        The response carries a `snapshot_token`; passing it back on the next
+        call reuses the cached baseline inputs, so a slider move costs only
+        the override application and the engine run. It also carries a
+        `stage_token` addressing this client's stage graphs, so only the
+        stages the override touches rerun. Callers with their own lifetime
+        (a WebSocket connection) pass `stage_graphs` instead and get no token.
+        """
+        snapshot = await self._get_input_snapshot(symbol, snapshot_token)
+        stock, sector = snapshot.stock, snapshot.sector
+        inputs = self._apply_overrides(snapshot.inputs, overrides)
 
         effective_scenario = scenario or overrides.get("scenario", "custom")
-        if effective_scenario in ("conservative", "moderate", "optimistic"):
+        if effective_scenario in SCENARIO_PRESETS:
             inputs = apply_scenario(
                 inputs,
                 effective_scenario,
@@ -365,13 +813,22 @@ class DCFService:
                 sector_avg_roc=Decimal(str(sector.avg_roc)),
             )
 
+        if stage_graphs is None:
+            stage_token, stage_graphs = _get_stage_graphs(stage_token)
+        else:
+            stage_token = None
+        graph = stage_graphs.setdefault((stock.id, effective_scenario), DCFStageGraph())
         try:
-            result = compute_dcf(inputs, scenario=effective_scenario)
+            result = graph.compute(inputs, scenario=effective_scenario)
         except DCFError as e:
             raise DCFEligibilityError("negative_ebit", str(e))
 
-        fiscal_date = ttm.get("period_end")
-        return self._format_result(stock, result, fiscal_date, inputs)
+        formatted = self._format_result(stock, result, snapshot.fiscal_date, inputs)
+        formatted["stages_run"] = graph.stages_run
+        formatted["snapshot_token"] = snapshot.token
+        if stage_token is not None:
+            formatted["stage_token"] = stage_token
+        return formatted
 
     async def save_run(
         self,
@@ -394,7 +851,7 @@ class DCFService:
         inputs = await self._build_inputs(stock, ttm, sector, overrides)
 
         scenario = overrides.get("scenario", "custom")
-        if scenario in ("conservative", "moderate", "optimistic"):
+        if scenario in SCENARIO_PRESETS:
             inputs = apply_scenario(
                 inputs,
                 scenario,
@@ -428,23 +885,32 @@ class DCFService:
     async def list_runs(self, symbol: str, user_id: str) -> list[dict]:
         """List saved DCF runs for a stock by a user."""
         stock = await self._get_stock(symbol)
+        # Summary columns only: served from the covering index, no JSONB
         result = await self.session.execute(
-            select(DcfValuation)
+            select(
+                DcfValuation.id,
+                DcfValuation.run_name,
+                DcfValuation.scenario,
+                DcfValuation.value_per_share,
+                DcfValuation.implied_upside,
+                DcfValuation.computed_at,
+                DcfValuation.source_fiscal_date,
+            )
             .where(
-                DcfValuation.stock_id == stock.id,
                 DcfValuation.user_id == user_id,
+                DcfValuation.stock_id == stock.id,
                 DcfValuation.is_saved.is_(True),
             )
             .order_by(DcfValuation.computed_at.desc())
         )
-        runs = result.scalars().all()
+        runs = result.all()
         return [
             {
                 "id": r.id,
                 "run_name": r.run_name or "Untitled",
-                "scenario": r.outputs.get("scenario", "custom"),
-                "value_per_share": r.outputs.get("value_per_share", 0),
-                "implied_upside": r.outputs.get("implied_upside", 0),
+                "scenario": r.scenario or "custom",
+                "value_per_share": float(r.value_per_share or 0),
+                "implied_upside": float(r.implied_upside or 0),
                 "computed_at": str(r.computed_at),
                 "source_fiscal_date": str(r.source_fiscal_date)
                 if r.source_fiscal_date
@@ -469,9 +935,160 @@ class DCFService:
         return {
             "run_id": run.id,
             "run_name": run.run_name,
-            **run.outputs,
+            **expand_outputs(run.outputs),
         }
 
+    async def compare_runs(
+        self, symbol: str, run_ids: Sequence[int], user_id: str
+    ) -> dict:
+        """
+        Align the projections of several saved runs and attribute each run's
+        value-per-share difference from the first run to its changed inputs.
+        """
+        stock = await self._get_stock(symbol)
+        result = await self.session.execute(
+            select(
+                DcfValuation.id,
+                DcfValuation.run_name,
+                DcfValuation.scenario,
+                DcfValuation.value_per_share,
+                DcfValuation.computed_at,
+                DcfValuation.inputs,
+                DcfValuation.outputs,
+            ).where(
+                DcfValuation.id.in_(run_ids),
+                DcfValuation.stock_id == stock.id,
+                DcfValuation.user_id == user_id,
+            )
+        )
+        rows = {r.id: r for r in result.all()}
+        missing = [run_id for run_id in run_ids if run_id not in rows]
+        if missing:
+            raise DCFEligibilityError(
+                "not_found",
+                f"DCF run(s) {', '.join(map(str, missing))} not found.",
+            )
+        runs = [rows[run_id] for run_id in run_ids]
+
+        # Projections aligned on forecast year (None where a run is shorter)
+        columns = [projection_columns(run.outputs) for run in runs]
+        years = sorted({y for c in columns for y in c.get("year") or []})
+        aligned = []
+        for run, c in zip(runs, columns):
+            index = {y: i for i, y in enumerate(c.get("year") or [])}
+            aligned.append(
+                {
+                    "run_id": run.id,
+                    **{
+                        field: [
+                            c[field][index[y]] if y in index and field in c else None
+                            for y in years
+                        ]
+                        for field in PROJECTION_FIELDS
+                        if field != "year"
+                    },
+                }
+            )
+
+        # Drivers a legacy run did not store are held at the base run's
+        # value and reported as unknown rather than attributed
+        base = runs[0]
+        base_inputs = self._deserialize_inputs(base.inputs)
+        base_unknown = self._unknown_input_fields(base.inputs)
+        attribution = []
+        for run in runs[1:]:
+            unknown = base_unknown | self._unknown_input_fields(run.inputs)
+            attribution.append(
+                {
+                    "base_run_id": base.id,
+                    "run_id": run.id,
+                    **attribute_change(
+                        base_inputs,
+                        self._deserialize_inputs(run.inputs),
+                        order=[
+                            f.name for f in fields(DCFInputs) if f.name not in unknown
+                        ],
+                    ),
+                    "unknown_fields": sorted(unknown),
+                }
+            )
+
+        return {
+            "symbol": stock.symbol,
+            "runs": [
+                {
+                    "id": run.id,
+                    "run_name": run.run_name or "Untitled",
+                    "scenario": run.scenario or "custom",
+                    "value_per_share": (
+                        float(run.value_per_share)
+                        if run.value_per_share is not None
+                        else None
+                    ),
+                    "computed_at": str(run.computed_at),
+                }
+                for run in runs
+            ],
+            "years": years,
+            "projections": aligned,
+            "attribution": attribution,
+        }
+
+    async def export_runs(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream stored valuations as full run records.
+
+        With ``user_id`` these are the user's saved runs, otherwise every
+        default valuation (the valuation history). Rows are read through a
+        server-side cursor in batches of _EXPORT_BATCH_SIZE, so memory use
+        does not grow with the export size.
+        """
+        query = (
+            select(
+                DcfValuation.id,
+                Stock.symbol,
+                DcfValuation.run_name,
+                DcfValuation.scenario,
+                DcfValuation.is_default,
+                DcfValuation.computed_at,
+                DcfValuation.source_fiscal_date,
+                DcfValuation.inputs,
+                DcfValuation.outputs,
+            )
+            .join(Stock, Stock.id == DcfValuation.stock_id)
+            .order_by(Stock.symbol, DcfValuation.computed_at, DcfValuation.id)
+            .execution_options(yield_per=_EXPORT_BATCH_SIZE)
+        )
+        if user_id is not None:
+            query = query.where(
+                DcfValuation.user_id == user_id, DcfValuation.is_saved.is_(True)
+            )
+        else:
+            query = query.where(DcfValuation.is_default.is_(True))
+        if symbols:
+            query = query.where(Stock.symbol.in_([s.upper() for s in symbols]))
+
+        result = await self.session.stream(query)
+        async for row in result:
+            outputs = expand_outputs(row.outputs)
+            yield {
+                **outputs,
+                "run_id": row.id,
+                "symbol": row.symbol,
+                "run_name": row.run_name,
+                "scenario": row.scenario or outputs.get("scenario"),
+                "is_default": row.is_default,
+                "computed_at": str(row.computed_at),
+                "source_fiscal_date": str(row.source_fiscal_date)
+                if row.source_fiscal_date
+                else None,
+                "inputs": row.inputs,
+            }
+
     async def delete_run(self, symbol: str, run_id: int, user_id: str) -> bool:
         """Delete a saved DCF run."""
         stock = await self._get_stock(symbol)
@@ -489,40 +1106,174 @@ class DCFService:
         await self.session.commit()
         return result.rowcount > 0
 
-    async def get_sensitivity(self, symbol: str) -> dict:
-        """Compute sensitivity matrix for the default valuation."""
+    async def get_sensitivity(self, symbol: str, density: str = "standard") -> dict:
+        """
+        WACC x growth sensitivity matrix of the default valuation.
+
+        Served from the surfaces stored with the default valuation when its
+        fingerprint is current; otherwise the default is recomputed and
+        persisted together with fresh surfaces.
+        """
         stock = await self._get_stock(symbol)
-        sector = await sector_mapping_service.get_mapping(self.session, stock)
+        fingerprint, mapped, surfaces = await self._get_default_state(
+            stock, DcfValuation.sensitivity
+        )
+        if surfaces is None or density not in surfaces:
+            artifact = await self._get_default_artifact(stock, fingerprint, mapped)
+            surfaces = await self._persist_default(stock, artifact)
+        return surfaces[density]
 
-        if not sector.is_eligible:
-            raise DCFEligibilityError(
-                sector.rejection_reason or "ineligible",
-                f"Stock not eligible for DCF: {sector.rejection_reason}",
+    async def get_scenarios(
+        self,
+        symbol: str,
+        scenarios: tuple[str, ...] = ("conservative", "moderate", "optimistic"),
+    ) -> dict:
+        """Value several scenario presets side by side from one data-gathering pass."""
+        stock, sector, ttm, inputs = await self._gather_inputs(symbol, scenario=None)
+
+        try:
+            results = compute_scenarios(
+                inputs,
+                scenarios,
+                sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
+                sector_avg_roc=Decimal(str(sector.avg_roc)),
             )
+        except DCFError as e:
+            raise DCFEligibilityError("negative_ebit", str(e))
 
-        ttm = await self._get_ttm(stock.id)
-        inputs = await self._build_inputs(stock, ttm, sector)
-        inputs = apply_scenario(
-            inputs,
-            "moderate",
-            sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
-            sector_avg_roc=Decimal(str(sector.avg_roc)),
-        )
+        fiscal_date = ttm.get("period_end")
+        return {
+            "symbol": stock.symbol,
+            "current_price": float(inputs.current_price),
+            "scenarios": [
+                self._format_result(stock, result, fiscal_date, inputs)
+                for result in results.values()
+            ],
+        }
+
+    async def get_sensitivity_grid(
+        self, symbol: str, axes: list[dict], resolution: int = 25
+    ) -> dict:
+        """
+        Value per share over a grid of 2-3 inputs around the default valuation.
+
+        Each axis is a dict with "field" and optional "min"/"max" bounds.
+        """
+        _, _, _, inputs = await self._gather_inputs(symbol, "moderate")
 
         try:
-            result = compute_dcf(inputs, scenario="moderate")
+            baseline = compute_dcf(inputs, scenario="moderate")
+            grid_axes = [
+                (
+                    axis["field"],
+                    grid_axis(
+                        inputs,
+                        axis["field"],
+                        resolution,
+                        axis.get("min"),
+                        axis.get("max"),
+                    ),
+                )
+                for axis in axes
+            ]
+            values = await asyncio.to_thread(
+                compute_sensitivity_grid, inputs, grid_axes
+            )
         except DCFError as e:
             raise DCFEligibilityError("negative_ebit", str(e))
 
-        matrix = compute_sensitivity_matrix(inputs, result)
+        centers = grid_centers(inputs)
+        return {
+            "axes": [
+                {
+                    "field": field,
+                    "values": [round(float(v), 6) for v in axis_values],
+                    "base": centers[field],
+                }
+                for field, axis_values in grid_axes
+            ],
+            "values": np.where(np.isfinite(values), np.round(values, 2), None).tolist(),
+            "base_value": float(baseline.value_per_share),
+            "resolution": resolution,
+        }
+
+    async def get_implied(
+        self,
+        symbol: str,
+        solve_for: str,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+    ) -> dict:
+        """Reverse DCF: the value of `solve_for` that justifies the current price."""
+        stock, _, _, inputs = await self._gather_inputs(symbol, "moderate")
+
+        try:
+            baseline = compute_dcf(inputs, scenario="moderate")
+        except DCFError as e:
+            raise DCFEligibilityError("negative_ebit", str(e))
+
+        try:
+            solution = solve_implied(inputs, solve_for, low=low, high=high)
+        except DCFError as e:
+            raise DCFEligibilityError("no_solution", str(e))
 
         return {
-            "wacc_values": [float(v) for v in matrix["wacc_values"]],
-            "growth_values": [float(v) for v in matrix["growth_values"]],
-            "matrix": [[float(c) for c in row] for row in matrix["matrix"]],
-            "base_wacc": float(matrix["base_wacc"]),
-            "base_growth": float(matrix["base_growth"]),
-            "base_value": float(result.value_per_share),
+            "symbol": stock.symbol,
+            "current_price": float(inputs.current_price),
+            "base_value": float(baseline.value_per_share),
+            **solution,
+        }
+
+    async def get_tornado(self, symbol: str, shock: float = 0.10) -> dict:
+        """Rank every input by the value-per-share move of a +/- shock."""
+        stock, _, _, inputs = await self._gather_inputs(symbol, "moderate")
+
+        try:
+            baseline = compute_dcf(inputs, scenario="moderate")
+        except DCFError as e:
+            raise DCFEligibilityError("negative_ebit", str(e))
+
+        return {
+            "symbol": stock.symbol,
+            "current_price": float(inputs.current_price),
+            "base_value": float(baseline.value_per_share),
+            "shock": shock,
+            "bars": compute_tornado(inputs, shock),
+        }
+
+    async def run_simulation(
+        self,
+        symbol: str,
+        draws: int = 10_000,
+        spreads: Optional[dict] = None,
+        distribution: str = "normal",
+        seed: Optional[int] = None,
+        bins: int = 40,
+    ) -> dict:
+        """Monte Carlo distribution of value per share around the default valuation."""
+        stock, _, _, inputs = await self._gather_inputs(symbol, "moderate")
+        spreads = {**DEFAULT_SIMULATION_SPREADS, **(spreads or {})}
+
+        try:
+            baseline = compute_dcf(inputs, scenario="moderate")
+            # Vectorized, but still CPU-bound: keep it off the event loop.
+            values = await asyncio.to_thread(
+                simulate_dcf, inputs, draws, spreads, distribution, seed
+            )
+            distribution_summary = summarize_distribution(
+                values, float(inputs.current_price), bins
+            )
+        except DCFError as e:
+            raise DCFEligibilityError("negative_ebit", str(e))
+
+        return {
+            "symbol": stock.symbol,
+            "current_price": float(inputs.current_price),
+            "base_value": float(baseline.value_per_share),
+            "distribution": distribution,
+            "centers": simulation_centers(inputs),
+            "spreads": spreads,
+            **distribution_summary,
         }
 
     async def get_sector_context(self, symbol: str) -> dict:
@@ -561,36 +1312,13 @@ class DCFService:
     async def get_summary(self, symbol: str) -> dict:
         """Generate plain-English valuation summary."""
         stock = await self._get_stock(symbol)
-        sector = await sector_mapping_service.get_mapping(self.session, stock)
-
-        if not sector.is_eligible:
-            raise DCFEligibilityError(
-                sector.rejection_reason or "ineligible",
-                f"Stock not eligible for DCF: {sector.rejection_reason}",
-            )
-
-        ttm = await self._get_ttm(stock.id)
-        inputs = await self._build_inputs(stock, ttm, sector)
-        inputs = apply_scenario(
-            inputs,
-            "moderate",
-            sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
-            sector_avg_roc=Decimal(str(sector.avg_roc)),
-        )
-
-        try:
-            result = compute_dcf(inputs, scenario="moderate")
-        except DCFError as e:
-            raise DCFEligibilityError("negative_ebit", str(e))
+        fingerprint, mapped, _ = await self._get_default_state(stock)
+        artifact = await self._get_default_artifact(stock, fingerprint, mapped)
+        sector, inputs, result = artifact.sector, artifact.inputs, artifact.result
 
         # Build verdict
         upside = float(result.implied_upside)
-        if upside > 0.15:
-            verdict = "undervalued"
-        elif upside < -0.15:
-            verdict = "overvalued"
-        else:
-            verdict = "fairly valued"
+        verdict = _verdict(upside)
 
         vps = float(result.value_per_share)
         price = float(inputs.current_price)
@@ -647,10 +1375,583 @@ class DCFService:
             "risk_factors": risk_factors,
         }
 
+    # ------------------------------------------------------------------
+    # Valuation history
+    # ------------------------------------------------------------------
+
+    async def get_history(self, symbol: str, years: int = 10) -> dict:
+        """
+        Default (moderate) value per share at each past quarter end, plus
+        daily values until the next quarter end.
+
+        Each quarter's TTM base year is built once from the statements up
+        to that fiscal date, with the DGS10 and price as of that date. Daily
+        values keep the quarter's fundamentals and risk-free rate and move
+        only the price-driven terms (market cap, D/E, WACC weights), all
+        days of a quarter in one vectorized evaluation. Damodaran and
+        country data are today's (no history is stored for them).
+        """
+        stock = await self._get_stock(symbol)
+        sector = await sector_mapping_service.get_mapping(self.session, stock)
+        if not sector.is_eligible:
+            raise DCFEligibilityError(
+                sector.rejection_reason or "ineligible",
+                f"Stock not eligible for DCF: {sector.rejection_reason}",
+            )
+        erp, crp = await self._get_country_risk()
+
+        start = date.today() - timedelta(days=365 * years)
+        # A year of earlier statements for the first quarters' trailing sums
+        statements = (
+            (
+                await self.session.execute(
+                    select(FinancialStatement)
+                    .where(
+                        FinancialStatement.stock_id == stock.id,
+                        FinancialStatement.period == "quarterly",
+                        FinancialStatement.statement_type.in_(STATEMENT_TYPES),
+                        FinancialStatement.fiscal_date >= start - timedelta(days=366),
+                    )
+                    .options(selectinload(FinancialStatement.facts))
+                    .order_by(FinancialStatement.fiscal_date)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        rates = (
+            await self.session.execute(
+                select(FredSeries.observation_date, FredSeries.value)
+                .where(
+                    FredSeries.series_id == "DGS10",
+                    FredSeries.observation_date >= start - timedelta(days=31),
+                )
+                .order_by(FredSeries.observation_date)
+            )
+        ).all()
+        prices = (
+            await self.session.execute(
+                select(PriceHistory.date, PriceHistory.close)
+                .where(
+                    PriceHistory.stock_id == stock.id,
+                    PriceHistory.date >= start - timedelta(days=31),
+                )
+                .order_by(PriceHistory.date)
+            )
+        ).all()
+
+        by_type: dict[str, list[FinancialStatement]] = defaultdict(list)
+        for statement in statements:
+            by_type[statement.statement_type].append(statement)
+        income_dates = [s.fiscal_date for s in by_type["income"]]
+
+        rate_dates = np.array([r[0] for r in rates], dtype="datetime64[D]")
+        rate_values = np.array([float(r[1]) / 100 for r in rates])
+        price_dates = np.array([p[0] for p in prices], dtype="datetime64[D]")
+        price_values = np.array([float(p[1]) for p in prices])
+
+        def as_of(dates: np.ndarray, on: date) -> int:
+            """Index of the last observation on or before `on` (-1 if none)."""
+            return int(np.searchsorted(dates, np.datetime64(on, "D"), side="right")) - 1
+
+        quarters: list[dict] = []
+        daily_dates: list[np.ndarray] = []
+        daily_prices: list[np.ndarray] = []
+        daily_values: list[np.ndarray] = []
+        for k, quarter_end in enumerate(income_dates):
+            if quarter_end < start or k < 3:
+                continue  # a full trailing year is needed
+            rate_idx = as_of(rate_dates, quarter_end)
+            price_idx = as_of(price_dates, quarter_end)
+            if rate_idx < 0 or price_idx < 0:
+                continue
+
+            ttm = TTMService.build_ttm(
+                {
+                    stmt_type: [
+                        s for s in reversed(rows) if s.fiscal_date <= quarter_end
+                    ][:4]
+                    for stmt_type, rows in by_type.items()
+                }
+            )
+            risk_free = Decimal(str(rate_values[rate_idx]))
+            price = Decimal(str(price_values[price_idx]))
+            inputs = apply_scenario(
+                self._assemble_inputs(ttm, sector, price, risk_free, erp, crp),
+                "moderate",
+                sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
+                sector_avg_roc=Decimal(str(sector.avg_roc)),
+            )
+
+            # Trading days from this quarter end up to the next one
+            next_end = income_dates[k + 1] if k + 1 < len(income_dates) else None
+            window = price_dates > np.datetime64(quarter_end, "D")
+            if next_end is not None:
+                window &= price_dates < np.datetime64(next_end, "D")
+            path = value_path(
+                inputs,
+                np.concatenate(([price_values[price_idx]], price_values[window])),
+            )
+
+            quarters.append(
+                {
+                    "fiscal_date": str(quarter_end),
+                    "price": float(price),
+                    "risk_free_rate": float(risk_free),
+                    "value_per_share": _finite(path["value_per_share"][0]),
+                    "implied_upside": _finite(path["implied_upside"][0]),
+                    "wacc": _finite(path["wacc"][0]),
+                }
+            )
+            daily_dates.append(price_dates[window])
+            daily_prices.append(price_values[window])
+            daily_values.append(path["value_per_share"][1:])
+
+        if not quarters:
+            raise DCFEligibilityError(
+                "missing_financials",
+                "Not enough quarterly statements, rates and prices for a history.",
+            )
+
+        dates = np.concatenate(daily_dates)
+        return {
+            "symbol": stock.symbol,
+            "scenario": "moderate",
+            "quarters": quarters,
+            "daily": {
+                "dates": [str(d) for d in dates],
+                "price": np.concatenate(daily_prices).round(4).tolist(),
+                "value_per_share": [_finite(v) for v in np.concatenate(daily_values)],
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # Batch valuation
+    # ------------------------------------------------------------------
+
+    async def compute_batch(self, items: Sequence[dict]) -> list[dict]:
+        """
+        Value many (symbol, overrides, scenario) items in one pass.
+
+        Stocks, sector mappings, TTM quarters and latest prices are each
+        loaded with one set-based query for all symbols, and every valid
+        item is evaluated together by the vectorized engine. Results come
+        back in request order; an item that cannot be valued carries an
+        ``error`` ({reason, detail}) instead of failing the whole batch.
+        Nothing is persisted.
+        """
+        symbols = sorted({item["symbol"].upper() for item in items})
+        result = await self.session.execute(
+            select(Stock).where(Stock.symbol.in_(symbols))
+        )
+        stocks = {stock.symbol: stock for stock in result.scalars().all()}
+
+        sectors = await sector_mapping_service.get_mappings(
+            self.session, list(stocks.values())
+        )
+        eligible_ids = [
+            stock.id for stock in stocks.values() if sectors[stock.id].is_eligible
+        ]
+        ttms = await TTMService(self.session).compute_ttm_many(eligible_ids)
+        prices = await self._get_current_prices(eligible_ids)
+        risk_free = await self._get_risk_free_rate()
+        erp, crp = await self._get_country_risk()
+
+        baselines: dict[int, DCFInputs] = {}
+        results: list[dict] = []
+        runs: dict[int, DCFInputs] = {}  # item index -> inputs to value
+        for i, item in enumerate(items):
+            symbol = item["symbol"].upper()
+            overrides = item.get("overrides") or {}
+            scenario = item.get("scenario") or overrides.get("scenario", "custom")
+            results.append({"symbol": symbol, "scenario": scenario, "error": None})
+
+            stock = stocks.get(symbol)
+            try:
+                if stock is None:
+                    raise DCFEligibilityError(
+                        "missing_stock", f"Stock '{symbol}' not found in database."
+                    )
+                sector = sectors[stock.id]
+                if not sector.is_eligible:
+                    raise DCFEligibilityError(
+                        sector.rejection_reason or "ineligible",
+                        f"Stock not eligible for DCF: {sector.rejection_reason}",
+                    )
+                if stock.id not in ttms:
+                    raise DCFEligibilityError(
+                        "missing_financials",
+                        "No quarterly financial data available for TTM computation.",
+                    )
+                if stock.id not in prices:
+                    raise DCFEligibilityError(
+                        "missing_price", "No price data available."
+                    )
+            except DCFEligibilityError as e:
+                results[i]["error"] = {"reason": e.reason, "detail": e.detail}
+                continue
+
+            if stock.id not in baselines:
+                baselines[stock.id] = self._assemble_inputs(
+                    ttms[stock.id], sector, prices[stock.id], risk_free, erp, crp
+                )
+            inputs = self._apply_overrides(baselines[stock.id], overrides)
+            if scenario in SCENARIO_PRESETS:
+                inputs = apply_scenario(
+                    inputs,
+                    scenario,
+                    sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
+                    sector_avg_roc=Decimal(str(sector.avg_roc)),
+                )
+            runs[i] = inputs
+
+        batch = compute_dcf_batch(list(runs.values()))
+        for (i, inputs), row in zip(runs.items(), batch.to_rows()):
+            if row["error"] is not None:
+                results[i]["error"] = {
+                    "reason": row["error"],
+                    "detail": _BATCH_ERROR_DETAILS.get(row["error"], row["error"]),
+                }
+                continue
+            results[i].update(
+                current_price=float(inputs.current_price),
+                value_per_share=row["value_per_share"],
+                implied_upside=row["implied_upside"],
+                verdict=_verdict(row["implied_upside"]),
+                enterprise_value=row["enterprise_value"],
+                equity_value=row["equity_value"],
+                wacc=row["wacc"],
+                expected_growth=row["expected_growth"],
+                terminal_growth=row["terminal_growth"],
+            )
+        return results
+
+    # ------------------------------------------------------------------
+    # Universe revaluation
+    # ------------------------------------------------------------------
+
+    async def revalue_universe(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> dict:
+        """
+        Recompute and persist the default valuation for every stock (or the
+        given symbols) in one job.
+
+        Data is gathered with a handful of set-based queries, the engine
+        runs in `executor` (batch scripts pass a process pool; without one,
+        small chunks run one at a time off the event loop), and results are
+        bulk-inserted. Stocks that cannot be valued are reported with the
+        same reasons the API uses (financial_firm, low_confidence,
+        missing_financials, missing_price, negative_ebit) instead of
+        aborting the job.
+        """
+        started = time.perf_counter()
+
+        query = select(Stock).order_by(Stock.symbol)
+        if symbols:
+            query = query.where(Stock.symbol.in_([s.upper() for s in symbols]))
+        stocks = list((await self.session.execute(query)).scalars().all())
+
+        failures: list[dict] = []
+
+        def fail(stock: Stock, reason: str, detail: str) -> None:
+            failures.append(
+                {"symbol": stock.symbol, "reason": reason, "detail": detail}
+            )
+
+        if symbols:
+            found = {stock.symbol for stock in stocks}
+            for symbol in symbols:
+                if symbol.upper() not in found:
+                    failures.append(
+                        {
+                            "symbol": symbol.upper(),
+                            "reason": "missing_stock",
+                            "detail": f"Stock '{symbol}' not found in database.",
+                        }
+                    )
+
+        # Mappings first (they may be created here), then fingerprint the data
+        # versions before reading the data itself
+        sectors = await sector_mapping_service.get_mappings(self.session, stocks)
+        fingerprints = await self._get_default_fingerprints(stocks)
+        risk_free = await self._get_risk_free_rate()
+        erp, crp = await self._get_country_risk()
+
+        eligible = []
+        for stock in stocks:
+            sector = sectors[stock.id]
+            if sector.is_eligible:
+                eligible.append(stock)
+            else:
+                reason = sector.rejection_reason or "ineligible"
+                fail(stock, reason, f"Stock not eligible for DCF: {reason}")
+
+        stock_ids = [stock.id for stock in eligible]
+        ttms = await TTMService(self.session).compute_ttm_many(stock_ids)
+        prices = await self._get_current_prices(stock_ids)
+
+        jobs: list[tuple[int, DCFInputs]] = []
+        prepared: dict[int, tuple[Stock, dict, DCFInputs]] = {}
+        for stock in eligible:
+            ttm = ttms.get(stock.id)
+            if ttm is None:
+                fail(
+                    stock,
+                    "missing_financials",
+                    "No quarterly financial data available for TTM computation.",
+                )
+                continue
+            price = prices.get(stock.id)
+            if price is None:
+                fail(stock, "missing_price", "No price data available.")
+                continue
+            sector = sectors[stock.id]
+            inputs = self._assemble_inputs(ttm, sector, price, risk_free, erp, crp)
+            inputs = apply_scenario(
+                inputs,
+                "moderate",
+                sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
+                sector_avg_roc=Decimal(str(sector.avg_roc)),
+            )
+            jobs.append((stock.id, inputs))
+            prepared[stock.id] = (stock, ttm.get("period_end"), inputs)
+
+        valued = []
+        for stock_id, result, surfaces, error in await self._run_default_jobs(
+            jobs, max_workers, executor
+        ):
+            stock, fiscal_date, inputs = prepared[stock_id]
+            if result is None:
+                fail(stock, "negative_ebit", error)
+                continue
+            valued.append(
+                (stock, sectors[stock_id], fiscal_date, inputs, result, surfaces)
+            )
+
+        await self._save_default_valuations(valued, fingerprints)
+
+        return {
+            "total": len(stocks)
+            + sum(1 for f in failures if f["reason"] == "missing_stock"),
+            "valued": len(valued),
+            "failed": len(failures),
+            "failures": sorted(failures, key=lambda f: f["symbol"]),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    async def revalue_stale_defaults(
+        self,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> dict:
+        """
+        Recompute only the stored default valuations whose data fingerprint
+        no longer matches, e.g. after the DGS10 rate moves (every default)
+        or a Damodaran update (defaults mapped to the changed rows).
+
+        A stale default computed from the stock's current quarterly
+        statements keeps its stored inputs: only the market and reference
+        fields (price, risk-free rate, ERP/CRP, industry beta and averages)
+        are refreshed and the moderate scenario reapplied, so no TTM is
+        rebuilt. The rest are handed to revalue_universe.
+        """
+        started = time.perf_counter()
+
+        rows = (
+            await self.session.execute(
+                select(Stock, DcfValuation.fingerprint, DcfValuation.source_fiscal_date)
+                .join(DcfValuation, DcfValuation.stock_id == Stock.id)
+                .where(DcfValuation.is_default.is_(True))
+                .order_by(Stock.symbol)
+            )
+        ).all()
+        fingerprints = await self._get_default_fingerprints([row[0] for row in rows])
+        stale = [
+            (stock, fiscal_date)
+            for stock, stored, fiscal_date in rows
+            if fingerprints[stock.id] != stored
+        ]
+
+        # Stored inputs are reusable when the statements behind them are
+        # still the latest and every DCFInputs field was stored
+        latest = await self._get_latest_fiscal_dates([s.id for s, _ in stale])
+        candidates = [
+            stock.id
+            for stock, fiscal_date in stale
+            if fiscal_date is not None and latest.get(stock.id) == fiscal_date
+        ]
+        reusable: dict[int, DCFInputs] = {}
+        if candidates:
+            stored_inputs = await self.session.execute(
+                select(DcfValuation.stock_id, DcfValuation.inputs).where(
+                    DcfValuation.stock_id.in_(candidates),
+                    DcfValuation.is_default.is_(True),
+                )
+            )
+            reusable = {
+                stock_id: self._deserialize_inputs(data)
+                for stock_id, data in stored_inputs.all()
+                if not self._unknown_input_fields(data)
+            }
+
+        refresh = [stock for stock, _ in stale if stock.id in reusable]
+        rebuild = [stock for stock, _ in stale if stock.id not in reusable]
+
+        failures: list[dict] = []
+        valued = []
+        if refresh:
+            sectors = await sector_mapping_service.get_mappings(self.session, refresh)
+            risk_free = await self._get_risk_free_rate()
+            erp, crp = await self._get_country_risk()
+            prices = await self._get_current_prices([stock.id for stock in refresh])
+
+            jobs: list[tuple[int, DCFInputs]] = []
+            prepared: dict[int, tuple[Stock, str, DCFInputs]] = {}
+            fiscal_dates = dict(stale)
+            for stock in refresh:
+                sector = sectors[stock.id]
+                price = prices.get(stock.id)
+                if not sector.is_eligible or price is None:
+                    # Eligibility or price changed too: take the full path
+                    rebuild.append(stock)
+                    continue
+                inputs = replace(
+                    reusable[stock.id],
+                    current_price=price,
+                    risk_free_rate=risk_free,
+                    equity_risk_premium=erp,
+                    country_risk_premium=crp,
+                    unlevered_beta=sector.unlevered_beta,
+                    sector_avg_debt_to_equity=sector.avg_debt_to_equity,
+                    sector_avg_roc=Decimal(str(sector.avg_roc)),
+                )
+                inputs = apply_scenario(
+                    inputs,
+                    "moderate",
+                    sector_avg_reinvestment_rate=Decimal(str(sector.avg_roc)),
+                    sector_avg_roc=Decimal(str(sector.avg_roc)),
+                )
+                jobs.append((stock.id, inputs))
+                prepared[stock.id] = (stock, str(fiscal_dates[stock]), inputs)
+
+            for stock_id, result, surfaces, error in await self._run_default_jobs(
+                jobs, max_workers, executor
+            ):
+                stock, fiscal_date, inputs = prepared[stock_id]
+                if result is None:
+                    failures.append(
+                        {
+                            "symbol": stock.symbol,
+                            "reason": "negative_ebit",
+                            "detail": error,
+                        }
+                    )
+                    continue
+                valued.append(
+                    (stock, sectors[stock_id], fiscal_date, inputs, result, surfaces)
+                )
+            await self._save_default_valuations(valued, fingerprints)
+
+        rebuilt = {"valued": 0, "failures": []}
+        if rebuild:
+            rebuilt = await self.revalue_universe(
+                [stock.symbol for stock in rebuild],
+                max_workers=max_workers,
+                executor=executor,
+            )
+        failures.extend(rebuilt["failures"])
+
+        return {
+            "checked": len(rows),
+            "stale": len(stale),
+            "refreshed": len(valued),
+            "rebuilt": rebuilt["valued"],
+            "failed": len(failures),
+            "failures": sorted(failures, key=lambda f: f["symbol"]),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    @staticmethod
+    async def _run_default_jobs(
+        jobs: list[tuple[int, DCFInputs]],
+        max_workers: Optional[int],
+        executor: Optional[Executor] = None,
+    ) -> list[tuple[int, Optional[DCFResult], Optional[dict], Optional[str]]]:
+        """
+        Value (stock_id, inputs) jobs with the moderate default and its
+        sensitivity surfaces.
+
+        With an `executor` (batch scripts pass a process pool) the jobs are
+        split into chunks sized by `max_workers` (default: CPU count) and
+        run in parallel. Without one this is a background pass inside the
+        API worker: the engine is pure Python and holds the GIL, so chunks
+        of _BACKGROUND_CHUNK_SIZE jobs run one at a time on a single thread
+        and request handling gets the interpreter back between them. A
+        process pool is never created here: forking a worker with a
+        running event loop and open connections is unsafe.
+        """
+        outcomes: list[
+            tuple[int, Optional[DCFResult], Optional[dict], Optional[str]]
+        ] = []
+        if not jobs:
+            return outcomes
+        if executor is None:
+            for i in range(0, len(jobs), _BACKGROUND_CHUNK_SIZE):
+                chunk = jobs[i : i + _BACKGROUND_CHUNK_SIZE]
+                outcomes.extend(await asyncio.to_thread(_compute_default_chunk, chunk))
+            return outcomes
+
+        workers = max_workers or os.cpu_count() or 1
+        size = max(1, math.ceil(len(jobs) / (workers * 4)))
+        chunks = [jobs[i : i + size] for i in range(0, len(jobs), size)]
+        loop = asyncio.get_running_loop()
+        for chunk_outcomes in await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, _compute_default_chunk, chunk)
+                for chunk in chunks
+            )
+        ):
+            outcomes.extend(chunk_outcomes)
+        return outcomes
+
     # ------------------------------------------------------------------
     # Persistence
     # ------------------------------------------------------------------
 
+    async def _persist_default(self, stock: Stock, artifact: ValuationArtifact) -> dict:
+        """
+        Store `artifact` as the stock's default valuation together with its
+        sensitivity surfaces (so both share one fingerprint); returns the
+        surfaces. Runs once per (stock, fingerprint) in this process:
+        concurrent callers share the first caller's write.
+        """
+
+        async def persist() -> dict:
+            surfaces = await asyncio.to_thread(
+                _sensitivity_surfaces, artifact.inputs, artifact.result
+            )
+            await self._save_valuation(
+                stock=stock,
+                sector=artifact.sector,
+                fiscal_date=artifact.fiscal_date,
+                inputs=artifact.inputs,
+                result=artifact.result,
+                is_default=True,
+                user_id=None,
+                run_name=None,
+                fingerprint=artifact.fingerprint,
+                sensitivity=surfaces,
+            )
+            return surfaces
+
+        return await _persisted.get_or_compute(
+            (stock.id, artifact.fingerprint), persist
+        )
+
     async def _save_valuation(
         self,
         stock: Stock,
@@ -661,6 +1962,8 @@ class DCFService:
         is_default: bool,
         user_id: Optional[str],
         run_name: Optional[str],
+        fingerprint: Optional[str] = None,
+        sensitivity: Optional[dict] = None,
     ) -> DcfValuation:
         """Persist a DCF valuation to the database."""
         if is_default:
@@ -683,7 +1986,10 @@ class DCFService:
             run_name=run_name,
             is_saved=not is_default,
             inputs=self._serialize_inputs(inputs),
-            outputs=outputs,
+            outputs=compact_outputs(outputs),
+            fingerprint=fingerprint,
+            sensitivity=sensitivity,
+            **self._summary_columns(result),
         )
         self.session.add(valuation)
         await self.session.flush()
@@ -700,6 +2006,67 @@ class DCFService:
 
         return valuation
 
+    async def _save_default_valuations(
+        self,
+        valued: Sequence[
+            tuple[Stock, SectorMappingResult, Optional[str], DCFInputs, DCFResult, dict]
+        ],
+        fingerprints: dict[int, str],
+    ) -> None:
+        """
+        Replace the default valuations of many stocks: one DELETE, one
+        multi-row INSERT ... RETURNING, one audit-log INSERT, one commit.
+        """
+        if not valued:
+            return
+
+        await self.session.execute(
+            delete(DcfValuation).where(
+                DcfValuation.stock_id.in_([stock.id for stock, *_ in valued]),
+                DcfValuation.is_default.is_(True),
+            )
+        )
+
+        rows = []
+        for stock, sector, fiscal_date, inputs, result, surfaces in valued:
+            rows.append(
+                {
+                    "stock_id": stock.id,
+                    "damodaran_industry_id": sector.damodaran_industry_id,
+                    "source_fiscal_date": date.fromisoformat(fiscal_date)
+                    if fiscal_date
+                    else None,
+                    "model_type": "fcff",
+                    "is_default": True,
+                    "user_id": None,
+                    "run_name": None,
+                    "is_saved": False,
+                    "inputs": self._serialize_inputs(inputs),
+                    "outputs": compact_outputs(
+                        self._format_result(stock, result, fiscal_date, inputs)
+                    ),
+                    "fingerprint": fingerprints.get(stock.id),
+                    "sensitivity": surfaces,
+                    **self._summary_columns(result),
+                }
+            )
+        inserted = await self.session.execute(
+            insert(DcfValuation).returning(DcfValuation.id), rows
+        )
+
+        await self.session.execute(
+            insert(DcfAuditLog),
+            [
+                {
+                    "dcf_valuation_id": valuation_id,
+                    "event": "computed",
+                    "details": {"scenario": "moderate", "user_id": None},
+                }
+                for valuation_id in inserted.scalars().all()
+            ],
+        )
+        await self.session.commit()
+
     # ------------------------------------------------------------------
     # Formatting
     # ------------------------------------------------------------------
@@ -713,12 +2080,7 @@ class DCFService:
     ) -> dict:
         """Convert DCFResult to API-friendly dict."""
         upside = float(result.implied_upside)
-        if upside > 0.15:
-            verdict = "undervalued"
-        elif upside < -0.15:
-            verdict = "overvalued"
-        else:
-            verdict = "fairly valued"
+        verdict = _verdict(upside)
 
         now = datetime.now(timezone.utc)
 
@@ -781,9 +2143,11 @@ class DCFService:
                 "terminal_value": float(result.terminal_value),
                 "pv_terminal": float(result.pv_terminal),
             },
-            "equity_bridge": result.equity_bridge
-            if isinstance(result.equity_bridge, dict)
-            else {},
+            "equity_bridge": {
+                **{k: float(v) for k, v in result.equity_bridge.items()},
+                "shares_outstanding": float(inputs.shares_outstanding) if inputs else 0,
+                "value_per_share": float(result.value_per_share),
+            },
             "scenario": result.scenario,
             "forecast_years": result.forecast_years,
             "source_fiscal_date": fiscal_date or str(date.today()),
@@ -796,34 +2160,72 @@ class DCFService:
             else 0,
         }
 
+    @staticmethod
+    def _summary_columns(result: DCFResult) -> dict:
+        """
+        Headline results stored in typed columns alongside `outputs`.
+
+        A value the column's NUMERIC precision cannot hold (degenerate
+        inputs, NaN/inf) is stored as NULL rather than failing the INSERT,
+        which would abort a whole universe batch; `outputs` keeps the
+        engine's figure.
+        """
+        columns = {"scenario": result.scenario}
+        for name in ("value_per_share", "implied_upside", "wacc", "terminal_growth"):
+            value = getattr(result, name)
+            column_type = DcfValuation.__table__.c[name].type
+            limit = 10 ** (column_type.precision - column_type.scale)
+            if value is not None and not (
+                math.isfinite(value) and abs(round(value, column_type.scale)) < limit
+            ):
+                logger.warning(
+                    "DCF %s %r out of range for NUMERIC(%d,%d), stored as NULL",
+                    name,
+                    value,
+                    column_type.precision,
+                    column_type.scale,
+                )
+                value = None
+            columns[name] = value
+        return columns
+
     @staticmethod
     def _serialize_inputs(inputs: DCFInputs) -> dict:
         """Serialize DCFInputs to JSON-safe dict for JSONB storage."""
-        return {
-            "revenue": float(inputs.revenue),
-            "ebit": float(inputs.ebit),
-            "tax_provision": float(inputs.tax_provision),
-            "pretax_income": float(inputs.pretax_income),
-            "capex": float(inputs.capex),
-            "depreciation": float(inputs.depreciation),
-            "working_capital_change": float(inputs.working_capital_change),
-            "interest_expense": float(inputs.interest_expense),
-            "total_debt": float(inputs.total_debt),
-            "cash_and_equivalents": float(inputs.cash_and_equivalents),
-            "book_value_equity": float(inputs.book_value_equity),
-            "shares_outstanding": float(inputs.shares_outstanding),
-            "current_price": float(inputs.current_price),
-            "risk_free_rate": float(inputs.risk_free_rate),
-            "equity_risk_premium": float(inputs.equity_risk_premium),
-            "country_risk_premium": float(inputs.country_risk_premium),
-            "unlevered_beta": float(inputs.unlevered_beta),
-            "sector_avg_debt_to_equity": float(inputs.sector_avg_debt_to_equity),
-            "sector_avg_roc": float(inputs.sector_avg_roc),
-            "forecast_years": inputs.forecast_years,
-            "stable_growth_rate": float(inputs.stable_growth_rate)
-            if inputs.stable_growth_rate
-            else None,
-            "stable_roc": float(inputs.stable_roc) if inputs.stable_roc else None,
-            "stable_beta": float(inputs.stable_beta),
-            "marginal_tax_rate": float(inputs.marginal_tax_rate),
-        }
+        data = {}
+        for f in fields(DCFInputs):
+            value = getattr(inputs, f.name)
+            if value is None or f.name == "forecast_years":
+                data[f.name] = value
+            else:
+                data[f.name] = float(value)
+        return data
+
+    @staticmethod
+    def _deserialize_inputs(data: dict) -> DCFInputs:
+        """
+        Rebuild DCFInputs from stored JSONB; absent keys take the defaults.
+        See _unknown_input_fields for the drivers that makes a guess.
+        """
+        values = {}
+        for f in fields(DCFInputs):
+            value = data.get(f.name)
+            if value is None:
+                continue
+            values[f.name] = (
+                int(value) if f.name == "forecast_years" else Decimal(str(value))
+            )
+        return DCFInputs(**values)
+
+    @staticmethod
+    def _unknown_input_fields(data: dict) -> set[str]:
+        """
+        Drivers whose stored value is not known. Rows saved before every
+        DCFInputs field was serialized lack some keys (filled from defaults
+        on load) and stored a zero optional as null, so in such a row every
+        absent or null field is unknown; complete rows have none.
+        """
+        names = [f.name for f in fields(DCFInputs)]
+        if all(name in data for name in names):
+            return set()
+        return {name for name in names if data.get(name) is None}
@@ -0,0 +1,117 @@
+"""
+Canonical numeric facts resolved from raw Twelve Data statement JSONB.
+
+Twelve Data names the same line item differently across companies and
+endpoints (operating_income vs ebit, capital_expenditure vs
+capital_expenditures, ...) and returns numbers as strings. Aliases are
+resolved and values parsed once, at ingest (StockDataService writes the
+result to financial_facts); TTM aggregation, ratios and DCF read the
+canonical facts instead of the JSONB.
+
+Pure module with ZERO database access.
+"""
+
+import math
+from typing import Mapping, Optional, Sequence
+
+# Canonical fact -> JSONB keys to try, in order of preference
+FACT_ALIASES: dict[str, dict[str, tuple[str, ...]]] = {
+    "income": {
+        "revenue": ("revenue", "total_revenue"),
+        "cost_of_revenue": ("cost_of_revenue", "cost_of_goods_sold"),
+        "gross_profit": ("gross_profit",),
+        "operating_income": ("operating_income", "ebit"),
+        "pretax_income": ("income_before_tax", "pretax_income"),
+        "income_tax": ("income_tax_expense", "tax_provision"),
+        "interest_expense": ("interest_expense",),
+        "net_income": ("net_income", "net_income_applicable_to_common_shares"),
+    },
+    "cash_flow": {
+        "capex": ("capital_expenditure", "capital_expenditures"),
+        "depreciation": ("depreciation_and_amortization", "depreciation"),
+    },
+    "balance_sheet": {
+        "total_assets": ("total_assets",),
+        "total_equity": (
+            "total_shareholders_equity",
+            "stockholders_equity",
+            "total_equity",
+        ),
+        "total_debt": ("total_debt",),
+        "current_assets": ("current_assets",),
+        "current_liabilities": ("current_liabilities",),
+        "inventory": ("inventory",),
+        "cash": ("cash_and_cash_equivalents", "cash_and_short_term_investments"),
+        "shares_outstanding": ("shares_outstanding", "common_shares_outstanding"),
+        "minority_interest": ("minority_interest",),
+    },
+}
+
+# Flow facts are summed over the TTM window; balance sheet facts are
+# point-in-time and come from the latest quarter only.
+FLOW_STATEMENTS = ("income", "cash_flow")
+
+
+def parse_number(value) -> Optional[float]:
+    """Convert a value to float if possible, return None otherwise."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _resolve(data: Mapping, aliases: Sequence[str]) -> Optional[float]:
+    """
+    First alias holding a non-zero number; a zero is kept only if no later
+    alias has a non-zero value (providers often report 0 under one name and
+    the real figure under another). None if no alias is numeric.
+    """
+    zero = None
+    for key in aliases:
+        number = parse_number(data.get(key))
+        if number is None or not math.isfinite(number):
+            continue
+        if number != 0:
+            return number
+        zero = number
+    return zero
+
+
+def normalize_statement(statement_type: str, data: Mapping) -> dict[str, float]:
+    """Canonical facts present in one statement's raw JSONB."""
+    facts = {}
+    for fact, aliases in FACT_ALIASES.get(statement_type, {}).items():
+        number = _resolve(data, aliases)
+        if number is not None:
+            facts[fact] = number
+
+    if statement_type == "balance_sheet" and not facts.get("total_debt"):
+        short = _resolve(data, ("short_term_debt",))
+        long = _resolve(data, ("long_term_debt",))
+        if short or long:
+            facts["total_debt"] = (short or 0.0) + (long or 0.0)
+    return facts
+
+
+def ttm_facts(quarters: Mapping[str, Sequence[Mapping[str, float]]]) -> dict:
+    """
+    TTM facts from per-quarter facts keyed by statement type, newest first.
+
+    Flow facts are summed across the quarters (a fact missing from a
+    quarter counts as 0); balance sheet facts come from the latest quarter.
+    """
+    result: dict = {}
+    for stmt_type, facts in quarters.items():
+        if not facts:
+            continue
+        if stmt_type in FLOW_STATEMENTS:
+            for quarter in facts:
+                for fact, value in quarter.items():
+                    result[fact] = result.get(fact, 0.0) + value
+        else:
+            result.update(facts[0])
+    return result
@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Callable, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
@@ -23,9 +23,12 @@ class FredScheduler:
         self,
         client: FredClient,
         session_factory: async_sessionmaker[AsyncSession],
+        on_rate_change: Optional[Callable[[], None]] = None,
     ):
         self.client = client
         self.session_factory = session_factory
+        # Called when the stored DGS10 value (the DCF risk-free rate) changes
+        self.on_rate_change = on_rate_change
         self.latest_values: dict[str, dict] = {}
         self._task: Optional[asyncio.Task] = None
 
@@ -53,6 +56,10 @@ class FredScheduler:
         async with self.session_factory() as session:
             try:
                 service = FredDataService(self.client, session)
+                # Stored rate before this fetch (from the DB on startup)
+                previous_rate = self.latest_values.get("DGS10")
+                if previous_rate is None:
+                    previous_rate = await service.get_latest_value("DGS10")
                 results = await service.fetch_daily_update()
                 logger.info("FRED scheduler: fetch_daily_update returned %s", results)
 
@@ -70,6 +77,7 @@ class FredScheduler:
                         logger.warning("FRED scheduler: no data for %s", series_id)
 
                 self._compute_spread(now)
+                self._notify_rate_change(previous_rate)
                 logger.info(
                     "FRED scheduler: cache populated with %d entries",
                     len(self.latest_values),
@@ -77,6 +85,19 @@ class FredScheduler:
             except Exception:
                 logger.exception("FRED scheduler: fetch_and_cache failed")
 
+    def _notify_rate_change(self, previous: Optional[dict]) -> None:
+        """Fire on_rate_change if the stored DGS10 value moved. A new
+        observation at the same rate (or a restart) changes no valuation."""
+        current = self.latest_values.get("DGS10")
+        if self.on_rate_change is None or current is None:
+            return
+        if previous is not None and previous["value"] == current["value"]:
+            return
+        logger.info(
+            "FRED scheduler: DGS10 moved to %s (%s)", current["value"], current["date"]
+        )
+        self.on_rate_change()
+
     def _compute_spread(self, now: datetime) -> None:
         """Compute SPREAD_2S10S = DGS10 - DGS2 and store in the cache."""
         dgs10 = self.latest_values.get("DGS10")
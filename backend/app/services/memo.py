@@ -0,0 +1,100 @@
+"""In-process async memoization: LRU-bounded, optional TTL, single-flight."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class AsyncLRUCache(Generic[V]):
+    """
+    LRU cache for values produced by coroutines.
+
+    ``get_or_compute`` runs ``compute`` at most once per key at a time:
+    concurrent callers for a key that is already being computed await the
+    same result instead of starting their own (single-flight). Failures are
+    propagated to every waiter and never cached.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self._pending: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        """Return the cached value for ``key`` (refreshing its recency) or ``default``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop every entry (or those whose key matches ``predicate``); returns the count."""
+        if predicate is None:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+        stale = [key for key in self._entries if predicate(key)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    async def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[V]]
+    ) -> V:
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The caller computing the value was cancelled: take over.
+                if pending.cancelled() and not _current_task_cancelling():
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody is waiting
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._pending.pop(key, None)
+
+
+def _current_task_cancelling() -> bool:
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
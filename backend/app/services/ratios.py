@@ -1,21 +1,11 @@
 """Compute financial ratios on-the-fly from TTM income + latest balance sheet.
 
-All ratios are computed — never stored. Missing inputs yield None for that ratio.
+All ratios are computed — never stored. Inputs are the TTM canonical facts
+(aliases resolved at ingest, see financial_facts). Missing inputs yield None
+for that ratio.
 """
 
-from typing import Any, Optional
-
-
-def _safe_get(data: dict, *keys) -> Optional[float]:
-    """Try multiple keys in order, returning the first numeric value found."""
-    for key in keys:
-        val = data.get(key)
-        if val is not None:
-            try:
-                return float(val)
-            except (ValueError, TypeError):
-                continue
-    return None
+from typing import Optional
 
 
 def compute_ratios(
@@ -28,7 +18,7 @@ def compute_ratios(
     Parameters
     ----------
     ttm : dict
-        TTM snapshot with "income", "balance_sheet", and optionally "cash_flow" dicts.
+        TTM snapshot (TTMService) with its canonical "facts" dict.
     current_price : float or None
         Current stock price (for valuation ratios). None => valuation ratios are null.
     shares_outstanding : float or None
@@ -39,61 +29,35 @@ def compute_ratios(
     dict[str, Optional[float]]
         Flat dict of ratio name -> value (or None if not computable).
     """
-    income: dict[str, Any] = ttm.get("income", {})
-    balance: dict[str, Any] = ttm.get("balance_sheet", {})
-    cash_flow: dict[str, Any] = ttm.get("cash_flow", {})
+    facts: dict[str, float] = ttm.get("facts", {})
 
     # --- Extract raw inputs ---
-    revenue = _safe_get(income, "revenue", "total_revenue")
-    gross_profit = _safe_get(income, "gross_profit")
-    operating_income = _safe_get(income, "operating_income", "ebit")
-    net_income = _safe_get(
-        income, "net_income", "net_income_applicable_to_common_shares"
-    )
-    interest_expense = _safe_get(income, "interest_expense")
-    cost_of_revenue = _safe_get(income, "cost_of_revenue", "cost_of_goods_sold")
-
-    total_assets = _safe_get(balance, "total_assets")
-    total_equity = _safe_get(
-        balance,
-        "total_shareholders_equity",
-        "stockholders_equity",
-        "total_equity",
-    )
-    total_debt = _safe_get(balance, "total_debt")
-    if total_debt is None:
-        short = _safe_get(balance, "short_term_debt") or 0
-        long = _safe_get(balance, "long_term_debt") or 0
-        if short or long:
-            total_debt = short + long
-
-    current_assets = _safe_get(balance, "current_assets")
-    current_liabilities = _safe_get(balance, "current_liabilities")
-    inventory = _safe_get(balance, "inventory")
-    cash = _safe_get(
-        balance,
-        "cash_and_cash_equivalents",
-        "cash_and_short_term_investments",
-    )
+    revenue = facts.get("revenue")
+    gross_profit = facts.get("gross_profit")
+    operating_income = facts.get("operating_income")
+    net_income = facts.get("net_income")
+    interest_expense = facts.get("interest_expense")
+    cost_of_revenue = facts.get("cost_of_revenue")
+
+    total_assets = facts.get("total_assets")
+    total_equity = facts.get("total_equity")
+    total_debt = facts.get("total_debt")
+
+    current_assets = facts.get("current_assets")
+    current_liabilities = facts.get("current_liabilities")
+    inventory = facts.get("inventory")
+    cash = facts.get("cash")
 
     shares = shares_outstanding
     if shares is None:
-        shares = _safe_get(
-            balance,
-            "shares_outstanding",
-            "common_shares_outstanding",
-        )
+        shares = facts.get("shares_outstanding")
 
     # Derived: gross profit from revenue - COGS if not directly available
     if gross_profit is None and revenue is not None and cost_of_revenue is not None:
         gross_profit = revenue - cost_of_revenue
 
     # EBITDA: operating income + depreciation/amortisation
-    depreciation = _safe_get(
-        cash_flow,
-        "depreciation_and_amortization",
-        "depreciation",
-    )
+    depreciation = facts.get("depreciation")
     ebitda: Optional[float] = None
     if operating_income is not None and depreciation is not None:
         ebitda = operating_income + depreciation
@@ -111,8 +75,8 @@ def compute_ratios(
     roic: Optional[float] = None
     if operating_income is not None and total_equity is not None:
         # Approximate tax rate from income data
-        pretax = _safe_get(income, "income_before_tax", "pretax_income")
-        tax_expense = _safe_get(income, "income_tax_expense", "tax_provision")
+        pretax = facts.get("pretax_income")
+        tax_expense = facts.get("income_tax")
         tax_rate = 0.0
         if pretax and tax_expense and pretax > 0:
             tax_rate = tax_expense / pretax
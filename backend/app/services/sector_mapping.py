@@ -5,7 +5,7 @@ import re
 from dataclasses import dataclass
 from decimal import Decimal
 from difflib import SequenceMatcher
-from typing import Optional
+from typing import Optional, Sequence
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -147,6 +147,43 @@ class SectorMappingService:
             is_financial=is_financial,
         )
 
+    async def get_mappings(
+        self, session: AsyncSession, stocks: Sequence[Stock]
+    ) -> dict[int, SectorMappingResult]:
+        """
+        Get mappings for many stocks, keyed by stock id.
+
+        Existing mappings are loaded in one query; only stocks whose
+        sector/industry pair has never been mapped fall back to get_mapping.
+        """
+        result = await session.execute(
+            select(SectorMapping, DamodaranIndustry).join(
+                DamodaranIndustry,
+                SectorMapping.damodaran_industry_id == DamodaranIndustry.id,
+            )
+        )
+        existing = {
+            (row[0].twelvedata_sector, row[0].twelvedata_industry): row
+            for row in result.all()
+        }
+
+        mappings: dict[int, SectorMappingResult] = {}
+        for stock in stocks:
+            td_sector = stock.sector or ""
+            td_industry = stock.industry or ""
+            row = existing.get((td_sector, td_industry))
+            if row is None:
+                mappings[stock.id] = await self.get_mapping(session, stock)
+                continue
+            mapping_row, dam_industry = row
+            mappings[stock.id] = self._build_result(
+                dam_industry=dam_industry,
+                confidence=float(mapping_row.match_confidence or 0),
+                manually_verified=mapping_row.manually_verified,
+                is_financial=self.is_financial_company(td_sector, td_industry),
+            )
+        return mappings
+
     async def fuzzy_match(
         self, session: AsyncSession, td_sector: str, td_industry: str
     ) -> tuple[int, float]:
@@ -5,18 +5,21 @@ from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.stocks import (
     Dividend,
     EarningsCalendar,
+    FinancialFact,
     FinancialStatement,
     PriceHistory,
     Stock,
     StockSplit,
 )
+from app.services.financial_facts import normalize_statement
+from app.services.ttm import TTMService
 from app.services.twelvedata import TwelveDataClient
 
 logger = logging.getLogger(__name__)
@@ -183,11 +186,13 @@ class StockDataService:
         period: str,
         rows: list[dict],
     ) -> int:
-        """Upsert a batch of financial statement rows."""
+        """Upsert a batch of financial statement rows and their canonical
+        facts (aliases resolved and numbers parsed once, here)."""
         if not rows:
             return 0
 
         count = 0
+        facts: dict[int, dict[str, float]] = {}
         for row in rows:
             fiscal_date_str = row.get("fiscal_date")
             if not fiscal_date_str:
@@ -208,10 +213,32 @@ class StockDataService:
                     "data": stmt.excluded.data,
                     "fetched_at": datetime.now(timezone.utc),
                 },
-            )
-            await self.session.execute(stmt)
+            ).returning(FinancialStatement.id)
+            result = await self.session.execute(stmt)
+            facts[result.scalar_one()] = normalize_statement(statement_type, row)
             count += 1
 
+        if facts:
+            # Replace, not merge: a restated row may drop a line item
+            await self.session.execute(
+                delete(FinancialFact).where(FinancialFact.statement_id.in_(facts))
+            )
+            fact_rows = [
+                {
+                    "statement_id": statement_id,
+                    "fact": fact,
+                    "value": Decimal(str(value)),
+                }
+                for statement_id, statement_facts in facts.items()
+                for fact, value in statement_facts.items()
+            ]
+            if fact_rows:
+                await self.session.execute(insert(FinancialFact), fact_rows)
+
+        if count and period == "quarterly":
+            # Keep the cached TTM in step with the statements it derives from
+            await TTMService(self.session).rebuild_snapshot(stock_id)
+
         await self.session.commit()
         return count
 
@@ -1,19 +1,54 @@
-from typing import Optional
+import logging
+import math
+from collections import defaultdict
+from typing import Mapping, Optional, Sequence
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+import numpy as np
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
 
-from app.models.stocks import FinancialStatement
+from app.database import async_session
+from app.models.stocks import FinancialStatement, TtmSnapshot
+from app.services.financial_facts import FLOW_STATEMENTS, parse_number, ttm_facts
+
+logger = logging.getLogger(__name__)
 
 STATEMENT_TYPES = ("income", "balance_sheet", "cash_flow")
-FLOW_STATEMENTS = ("income", "cash_flow")
+
+# ttm_snapshots column holding the latest quarter used, per statement type
+_DATE_COLUMNS = {
+    "income": "income_date",
+    "balance_sheet": "balance_sheet_date",
+    "cash_flow": "cash_flow_date",
+}
+
+# Quarters summed into one TTM value
+TTM_WINDOW = 4
 
 
 class TTMService:
-    """Compute trailing-twelve-month financials from the latest 4 quarterly records."""
+    """
+    Compute trailing-twelve-month financials from the latest 4 quarterly records.
 
-    def __init__(self, session: AsyncSession):
+    Results are cached per stock in ttm_snapshots. StockDataService rebuilds
+    a stock's snapshot in the same transaction that upserts its quarterly
+    statements. Reads also check each snapshot against the latest quarterly
+    fiscal_date per statement type, so statements written any other way
+    turn it into a miss that is rebuilt from financial_statements and
+    committed in its own short transaction (`session_factory`), so reads
+    warm the cache without touching the caller's transaction.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        session_factory: async_sessionmaker[AsyncSession] = async_session,
+    ):
         self.session = session
+        self.session_factory = session_factory
 
     async def compute_ttm(self, stock_id: int) -> Optional[dict]:
         """
@@ -21,7 +56,105 @@ class TTMService:
 
         - Income and cash flow: sum numeric fields across the latest 4 quarters.
         - Balance sheet: use only the most recent quarter (point-in-time).
+        - "facts": the same aggregation over the canonical numeric facts
+          resolved at ingest (see financial_facts), for computation; the raw
+          per-statement dicts are kept for display.
         - Returns None if no quarterly data exists for any statement type.
+
+        A miss is written back to ttm_snapshots in a separate transaction.
+        """
+        cached = await self._load_snapshots([stock_id])
+        if stock_id in cached:
+            return cached[stock_id]
+
+        quarters = await self._fetch_latest_quarters(stock_id)
+        ttm = self.build_ttm(quarters)
+        if ttm is not None:
+            await self._fill_snapshots({stock_id: (quarters, ttm)})
+        return ttm
+
+    async def compute_ttm_many(self, stock_ids: Sequence[int]) -> dict[int, dict]:
+        """
+        TTM snapshots for many stocks, keyed by stock_id.
+
+        One set-based query fetches every stock's latest quarters; each is
+        then aggregated exactly as compute_ttm would, and misses are written
+        back in one separate transaction. Stocks without quarterly data are
+        absent from the result.
+        """
+        if not stock_ids:
+            return {}
+        snapshots = await self._load_snapshots(stock_ids)
+        missing = [stock_id for stock_id in stock_ids if stock_id not in snapshots]
+        if not missing:
+            return snapshots
+
+        quarters = await self._fetch_latest_quarters_many(missing)
+        built: dict[int, tuple[dict, dict]] = {}
+        for stock_id, by_type in quarters.items():
+            ttm = self.build_ttm(by_type)
+            if ttm is not None:
+                built[stock_id] = (by_type, ttm)
+                snapshots[stock_id] = ttm
+        if built:
+            await self._fill_snapshots(built)
+        return snapshots
+
+    async def rebuild_snapshot(self, stock_id: int) -> Optional[dict]:
+        """
+        Recompute and store a stock's cached TTM from financial_statements.
+
+        Called after quarterly statements are upserted, inside the same
+        transaction; does not commit. Removes the snapshot if the stock no
+        longer has quarterly data.
+        """
+        quarters = await self._fetch_latest_quarters(stock_id)
+        ttm = self.build_ttm(quarters)
+        if ttm is None:
+            await self.session.execute(
+                delete(TtmSnapshot).where(TtmSnapshot.stock_id == stock_id)
+            )
+        else:
+            await self._store_snapshots({stock_id: (quarters, ttm)}, replace=True)
+        return ttm
+
+    async def compute_ttm_history(self, stock_id: int) -> Optional[dict]:
+        """
+        Rolling TTM series for every income and cash-flow field: one value
+        per quarter end that has a full trailing year of quarters.
+
+        Returns None if the stock has no quarterly flow statements.
+        """
+        result = await self.session.execute(
+            select(FinancialStatement)
+            .where(
+                FinancialStatement.stock_id == stock_id,
+                FinancialStatement.statement_type.in_(FLOW_STATEMENTS),
+                FinancialStatement.period == "quarterly",
+            )
+            .order_by(
+                FinancialStatement.statement_type,
+                FinancialStatement.fiscal_date.asc(),
+            )
+        )
+        quarters: dict[str, list[FinancialStatement]] = defaultdict(list)
+        for statement in result.scalars().all():
+            quarters[statement.statement_type].append(statement)
+        if not quarters:
+            return None
+        return self.build_ttm_history(quarters)
+
+    @classmethod
+    def build_ttm(
+        cls, quarters: Mapping[str, Sequence[FinancialStatement]]
+    ) -> Optional[dict]:
+        """
+        Aggregate already-fetched quarterly statements into a TTM snapshot.
+
+        `quarters` maps statement type to its latest quarters, newest first,
+        with their `facts` loaded (selectinload). Shared by compute_ttm,
+        compute_ttm_many and callers that fetch quarters themselves (e.g.
+        point-in-time history).
         """
         result: dict = {}
         quarters_used = 0
@@ -29,7 +162,7 @@ class TTMService:
         period_end = None
 
         for stmt_type in STATEMENT_TYPES:
-            statements = await self._fetch_quarters(stock_id, stmt_type)
+            statements = quarters.get(stmt_type)
 
             if not statements:
                 continue
@@ -45,7 +178,7 @@ class TTMService:
             data_dicts = [s.data for s in statements]
 
             if stmt_type in FLOW_STATEMENTS:
-                result[stmt_type] = self._sum_numeric_fields(data_dicts)
+                result[stmt_type] = cls._sum_numeric_fields(data_dicts)
             else:
                 # Balance sheet: point-in-time snapshot, use most recent quarter only.
                 result[stmt_type] = dict(data_dicts[0])
@@ -53,28 +186,258 @@ class TTMService:
         if not result:
             return None
 
+        result["facts"] = ttm_facts(
+            {
+                stmt_type: [
+                    {f.fact: float(f.value) for f in s.facts} for s in statements
+                ]
+                for stmt_type, statements in quarters.items()
+            }
+        )
         result["quarters_used"] = quarters_used
         result["period_start"] = period_start
         result["period_end"] = period_end
 
         return result
 
-    async def _fetch_quarters(
-        self, stock_id: int, statement_type: str, limit: int = 4
-    ) -> list[FinancialStatement]:
-        """Return the latest `limit` quarterly records for the given statement type."""
-        stmt = (
-            select(FinancialStatement)
+    @staticmethod
+    def build_ttm_history(
+        quarters: Mapping[str, Sequence[FinancialStatement]],
+    ) -> dict:
+        """
+        Rolling TTM sums from quarterly flow statements, oldest first.
+
+        Each statement's JSONB is parsed once into a (quarter x field)
+        matrix; the window total is then carried forward by adding the
+        quarter entering it and subtracting the one leaving, so the cost is
+        linear in the number of quarters. Per window, a field follows
+        _sum_numeric_fields: unparseable values count as 0, and the total is
+        None when no quarter in the window has a number for it. Fields that
+        are never numeric (e.g. currency) are omitted.
+
+        Returns, per statement type, columnar series:
+        {"period_start": [...], "period_end": [...], "fields": {name: [...]}}.
+        """
+        history: dict = {}
+        for stmt_type in FLOW_STATEMENTS:
+            statements = quarters.get(stmt_type) or []
+            series: dict = {"period_start": [], "period_end": [], "fields": {}}
+            history[stmt_type] = series
+            if len(statements) < TTM_WINDOW:
+                continue
+
+            columns: dict[str, int] = {}
+            rows: list[dict[int, float]] = []
+            for statement in statements:
+                row: dict[int, float] = {}
+                for key, value in statement.data.items():
+                    number = parse_number(value)
+                    # A NaN/inf would poison every later window of the running sum
+                    if number is not None and math.isfinite(number):
+                        row[columns.setdefault(key, len(columns))] = number
+                rows.append(row)
+
+            values = np.zeros((len(statements), len(columns)))
+            present = np.zeros((len(statements), len(columns)), dtype=np.int64)
+            for i, row in enumerate(rows):
+                if row:
+                    idx = list(row)
+                    values[i, idx] = list(row.values())
+                    present[i, idx] = 1
+
+            windows = len(statements) - TTM_WINDOW + 1
+            totals = np.empty((windows, len(columns)))
+            counts = np.empty((windows, len(columns)), dtype=np.int64)
+            total = values[:TTM_WINDOW].sum(axis=0)
+            count = present[:TTM_WINDOW].sum(axis=0)
+            totals[0], counts[0] = total, count
+            for w in range(1, windows):
+                entering, leaving = w + TTM_WINDOW - 1, w - 1
+                total += values[entering] - values[leaving]
+                count += present[entering] - present[leaving]
+                totals[w], counts[w] = total, count
+
+            series["period_start"] = [str(s.fiscal_date) for s in statements[:windows]]
+            series["period_end"] = [
+                str(s.fiscal_date) for s in statements[TTM_WINDOW - 1 :]
+            ]
+            for key, j in columns.items():
+                series["fields"][key] = [
+                    _json_number(t) if c else None
+                    for t, c in zip(totals[:, j].tolist(), counts[:, j].tolist())
+                ]
+        return history
+
+    # ------------------------------------------------------------------
+    # Snapshot cache
+    # ------------------------------------------------------------------
+
+    async def _load_snapshots(self, stock_ids: Sequence[int]) -> dict[int, dict]:
+        """
+        Current cached TTM snapshots for the given stocks.
+
+        A snapshot is returned only if its per-type dates still match the
+        latest quarterly fiscal_date of each statement type (an index-only
+        max() per stock), so quarters written without a rebuild (a backfill,
+        a manual fix) make it a miss instead of being served stale.
+        """
+        latest = (
+            select(
+                FinancialStatement.stock_id,
+                *(
+                    func.max(FinancialStatement.fiscal_date)
+                    .filter(FinancialStatement.statement_type == stmt_type)
+                    .label(column)
+                    for stmt_type, column in _DATE_COLUMNS.items()
+                ),
+            )
             .where(
-                FinancialStatement.stock_id == stock_id,
-                FinancialStatement.statement_type == statement_type,
+                FinancialStatement.stock_id.in_(stock_ids),
                 FinancialStatement.period == "quarterly",
             )
-            .order_by(FinancialStatement.fiscal_date.desc())
-            .limit(limit)
+            .group_by(FinancialStatement.stock_id)
+            .subquery()
+        )
+        result = await self.session.execute(
+            select(TtmSnapshot.stock_id, TtmSnapshot.data)
+            .join(latest, latest.c.stock_id == TtmSnapshot.stock_id)
+            .where(
+                TtmSnapshot.stock_id.in_(stock_ids),
+                *(
+                    getattr(TtmSnapshot, column).is_not_distinct_from(latest.c[column])
+                    for column in _DATE_COLUMNS.values()
+                ),
+            )
+        )
+        return dict(result.all())
+
+    async def _fill_snapshots(
+        self,
+        built: Mapping[int, tuple[Mapping[str, Sequence[FinancialStatement]], dict]],
+    ) -> None:
+        """
+        Persist read-path fills in their own short transaction: the caller's
+        session is left untouched (read endpoints never commit it). Best
+        effort; a failed write only means the next read misses again.
+        """
+        try:
+            async with self.session_factory() as session:
+                await TTMService(session)._store_snapshots(built)
+                await session.commit()
+        except SQLAlchemyError:
+            logger.warning(
+                "Could not store TTM snapshots for %s", sorted(built), exc_info=True
+            )
+
+    async def _store_snapshots(
+        self,
+        built: Mapping[int, tuple[Mapping[str, Sequence[FinancialStatement]], dict]],
+        replace: bool = False,
+    ) -> None:
+        """
+        Write snapshots keyed by stock_id to (quarters, ttm).
+
+        Ingest rebuilds (replace=True) always overwrite. Read-path fills
+        only replace a row built from other quarters; if a fill races an
+        ingest and writes older quarters, the next read sees the date
+        mismatch and rebuilds.
+        """
+        rows = [
+            {
+                "stock_id": stock_id,
+                **{
+                    column: _latest_date(quarters, stmt_type)
+                    for stmt_type, column in _DATE_COLUMNS.items()
+                },
+                "data": ttm,
+            }
+            for stock_id, (quarters, ttm) in built.items()
+        ]
+        stmt = pg_insert(TtmSnapshot).values(rows)
+        where = None
+        if not replace:
+            where = or_(
+                *(
+                    stmt.excluded[c].is_distinct_from(getattr(TtmSnapshot, c))
+                    for c in _DATE_COLUMNS.values()
+                )
+            )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TtmSnapshot.stock_id],
+            set_={
+                **{c: stmt.excluded[c] for c in _DATE_COLUMNS.values()},
+                "data": stmt.excluded.data,
+                "computed_at": func.now(),
+            },
+            where=where,
+        )
+        await self.session.execute(stmt)
+
+    # ------------------------------------------------------------------
+    # Quarterly statements
+    # ------------------------------------------------------------------
+
+    async def _fetch_latest_quarters(
+        self, stock_id: int, limit: int = 4
+    ) -> dict[str, list[FinancialStatement]]:
+        """Return the latest `limit` quarterly records of every statement type,
+        keyed by type and newest first, from a single query."""
+        quarters = await self._fetch_latest_quarters_many([stock_id], limit)
+        return quarters.get(stock_id, {})
+
+    async def _fetch_latest_quarters_many(
+        self, stock_ids: Sequence[int], limit: int = 4
+    ) -> dict[int, dict[str, list[FinancialStatement]]]:
+        """
+        Latest `limit` quarters of every statement type for many stocks,
+        keyed by stock_id then statement type, newest first.
+
+        ROW_NUMBER() over (stock, statement type) ranks quarters by fiscal
+        date, so the whole set comes back from one query regardless of how
+        many stocks or statement types are requested.
+        """
+        rn = (
+            func.row_number()
+            .over(
+                partition_by=(
+                    FinancialStatement.stock_id,
+                    FinancialStatement.statement_type,
+                ),
+                order_by=FinancialStatement.fiscal_date.desc(),
+            )
+            .label("rn")
+        )
+        latest = (
+            select(FinancialStatement.id, rn)
+            .where(
+                FinancialStatement.stock_id.in_(stock_ids),
+                FinancialStatement.statement_type.in_(STATEMENT_TYPES),
+                FinancialStatement.period == "quarterly",
+            )
+            .subquery()
+        )
+        stmt = (
+            select(FinancialStatement)
+            .join(latest, FinancialStatement.id == latest.c.id)
+            .where(latest.c.rn <= limit)
+            .order_by(
+                FinancialStatement.stock_id,
+                FinancialStatement.statement_type,
+                FinancialStatement.fiscal_date.desc(),
+            )
+            .options(selectinload(FinancialStatement.facts))
+            # Statements are upserted with Core inserts; refresh any rows this
+            # session already holds so a snapshot rebuild sees the new data.
+            .execution_options(populate_existing=True)
         )
         result = await self.session.execute(stmt)
-        return list(result.scalars().all())
+
+        quarters: dict[int, dict[str, list[FinancialStatement]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        for statement in result.scalars().all():
+            quarters[statement.stock_id][statement.statement_type].append(statement)
+        return {stock_id: dict(by_type) for stock_id, by_type in quarters.items()}
 
     @staticmethod
     def _sum_numeric_fields(statements: list[dict]) -> dict:
@@ -88,32 +451,24 @@ class TTMService:
         if not statements:
             return {}
 
-        # Collect all keys across every quarter.
-        all_keys: list[str] = []
-        seen: set[str] = set()
-        for d in statements:
-            for k in d:
-                if k not in seen:
-                    all_keys.append(k)
-                    seen.add(k)
+        # Gather each key's values across quarters (first-seen key order).
+        columns: dict[str, list] = {}
+        for i, d in enumerate(statements):
+            for key, value in d.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [None] * len(statements)
+                column[i] = value
 
         result: dict = {}
 
-        for key in all_keys:
-            values = [d.get(key) for d in statements]
-
-            # Determine whether this field is numeric by checking if *any* quarter
-            # has a value that can be interpreted as a number.
-            is_numeric = any(_to_float(v) is not None for v in values if v is not None)
-
-            if is_numeric:
-                total = 0.0
-                for v in values:
-                    parsed = _to_float(v)
-                    if parsed is not None:
-                        total += parsed
-                # Preserve int type when there is no fractional component.
-                result[key] = int(total) if total == int(total) else total
+        for key, values in columns.items():
+            # A field is numeric if *any* quarter has a value that can be
+            # interpreted as a number; each value is parsed exactly once.
+            numbers = [n for n in map(parse_number, values) if n is not None]
+
+            if numbers:
+                result[key] = _json_number(sum(numbers))
             else:
                 # Non-numeric: take from most recent quarter.
                 result[key] = values[0]
@@ -121,13 +476,11 @@ class TTMService:
         return result
 
 
-def _to_float(value) -> Optional[float]:
-    """Convert a value to float if possible, return None otherwise."""
-    if isinstance(value, (int, float)):
-        return float(value)
-    if isinstance(value, str):
-        try:
-            return float(value)
-        except ValueError:
-            return None
-    return None
+def _latest_date(quarters: Mapping[str, Sequence[FinancialStatement]], stmt_type: str):
+    statements = quarters.get(stmt_type)
+    return statements[0].fiscal_date if statements else None
+
+
+def _json_number(total: float):
+    """Preserve int type when there is no fractional component."""
+    return int(total) if total == int(total) else total
@@ -0,0 +1,67 @@
+"""Backfill ttm_snapshots for every stock with quarterly statements.
+
+Run after upgrading past the ttm_snapshots / financial_facts migrations
+(which leave the cache empty) so no read pays the rebuild.  Snapshots that
+are already current are skipped, so running the script twice is safe.
+
+Usage:
+    cd backend && python -m scripts.rebuild_ttm_snapshots [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.stocks import FinancialStatement
+from app.services.ttm import TTMService
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_snapshots(session: AsyncSession, batch_size: int = 200) -> dict:
+    """Build missing or stale TTM snapshots in batches of `batch_size` stocks.
+
+    Returns a summary dict with stocks/snapshots counts.
+    """
+    result = await session.execute(
+        select(FinancialStatement.stock_id)
+        .where(FinancialStatement.period == "quarterly")
+        .distinct()
+        .order_by(FinancialStatement.stock_id)
+    )
+    stock_ids = result.scalars().all()
+
+    snapshots = 0
+    for start in range(0, len(stock_ids), batch_size):
+        batch = stock_ids[start : start + batch_size]
+        snapshots += len(await TTMService(session).compute_ttm_many(batch))
+        # Drop the batch's statements from the identity map
+        session.expunge_all()
+        logger.info("TTM snapshots: %d/%d stocks", start + len(batch), len(stock_ids))
+
+    return {"stocks": len(stock_ids), "snapshots": snapshots}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--batch-size", type=int, default=200, help="Stocks per query batch"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    async with async_session() as session:
+        result = await rebuild_snapshots(session, batch_size=args.batch_size)
+    logger.info(
+        "TTM snapshot backfill complete: %d snapshots for %d stocks",
+        result["snapshots"],
+        result["stocks"],
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""Revalue the default DCF for every stock in one batch job.
+
+Gathers inputs with set-based queries, runs the engine in a process pool,
+bulk-inserts the new default valuations and logs a per-stock failure
+report.  Pass symbols to limit the run to a subset.
+
+Usage:
+    cd backend && python -m scripts.revalue_universe [SYMBOL ...] [--workers N]
+"""
+
+import argparse
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from app.database import async_session
+from app.services.dcf_service import DCFService
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("symbols", nargs="*", help="Limit the run to these symbols")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        async with async_session() as session:
+            report = await DCFService(session).revalue_universe(
+                symbols=args.symbols or None,
+                max_workers=args.workers,
+                executor=pool,
+            )
+
+    for failure in report["failures"]:
+        logger.warning(
+            "%-8s %-20s %s", failure["symbol"], failure["reason"], failure["detail"]
+        )
+    logger.info(
+        "Revaluation complete: %d/%d valued, %d failed in %.1fs",
+        report["valued"],
+        report["total"],
+        report["failed"],
+        report["elapsed_seconds"],
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
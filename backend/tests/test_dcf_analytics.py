@@ -0,0 +1,381 @@
+"""
+Tests for DCF analytics built on the vectorized engine.
+
+Pure computation tests — no database, no async.
+"""
+
+import dataclasses
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.services.dcf_analytics import (
+    DEFAULT_SIMULATION_SPREADS,
+    SIMULATION_DISTRIBUTIONS,
+    attribute_change,
+    compute_sensitivity_grid,
+    compute_tornado,
+    grid_axis,
+    grid_centers,
+    simulate_dcf,
+    simulation_centers,
+    solve_implied,
+    summarize_distribution,
+    value_path,
+)
+from app.services.dcf_engine import DCFError, DCFInputs, compute_dcf
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def sample_inputs():
+    """A typical mid-cap company with moderate growth and leverage."""
+    return DCFInputs(
+        revenue=Decimal("50000"),
+        ebit=Decimal("8000"),
+        tax_provision=Decimal("1600"),
+        pretax_income=Decimal("7500"),
+        capex=Decimal("3000"),
+        depreciation=Decimal("1500"),
+        working_capital_change=Decimal("200"),
+        interest_expense=Decimal("500"),
+        total_debt=Decimal("10000"),
+        cash_and_equivalents=Decimal("5000"),
+        book_value_equity=Decimal("30000"),
+        shares_outstanding=Decimal("1000"),
+        current_price=Decimal("50"),
+        risk_free_rate=Decimal("0.04"),
+        equity_risk_premium=Decimal("0.05"),
+        country_risk_premium=Decimal("0.00"),
+        unlevered_beta=Decimal("1.10"),
+        sector_avg_debt_to_equity=Decimal("0.30"),
+        sector_avg_roc=Decimal("0.12"),
+        stable_growth_rate=Decimal("0.03"),
+    )
+
+
+# ===========================================================================
+# Monte Carlo simulation
+# ===========================================================================
+
+
+class TestSimulation:
+    """simulate_dcf samples stable-state inputs around the baseline."""
+
+    def test_zero_spread_reproduces_baseline(self, sample_inputs):
+        spreads = {name: 0.0 for name in DEFAULT_SIMULATION_SPREADS}
+        values = simulate_dcf(sample_inputs, draws=100, spreads=spreads)
+        expected = float(compute_dcf(sample_inputs).value_per_share)
+        assert values.shape == (100,)
+        assert values == pytest.approx(np.full(100, expected), abs=0.01)
+
+    def test_seed_is_deterministic(self, sample_inputs):
+        first = simulate_dcf(sample_inputs, draws=500, seed=7)
+        second = simulate_dcf(sample_inputs, draws=500, seed=7)
+        np.testing.assert_array_equal(first, second)
+
+    @pytest.mark.parametrize("distribution", SIMULATION_DISTRIBUTIONS)
+    def test_distributions_center_on_baseline(self, sample_inputs, distribution):
+        values = simulate_dcf(
+            sample_inputs, draws=20_000, distribution=distribution, seed=1
+        )
+        expected = float(compute_dcf(sample_inputs).value_per_share)
+        assert np.nanmedian(values) == pytest.approx(expected, rel=0.05)
+
+    def test_unknown_distribution_raises(self, sample_inputs):
+        with pytest.raises(DCFError, match="Unknown distribution"):
+            simulate_dcf(sample_inputs, draws=10, distribution="cauchy")
+
+    def test_centers_resolve_engine_defaults(self, sample_inputs):
+        """Unset stable ROC falls back to the stable WACC, as in compute_dcf."""
+        centers = simulation_centers(sample_inputs)
+        result = compute_dcf(sample_inputs)
+        assert centers["stable_growth_rate"] == pytest.approx(0.03)
+        assert centers["stable_roc"] == pytest.approx(float(result.terminal_roc))
+
+
+class TestSummarizeDistribution:
+    """Percentiles, histogram and probability of upside."""
+
+    def test_summary_shape(self, sample_inputs):
+        values = simulate_dcf(sample_inputs, draws=2_000, seed=3)
+        summary = summarize_distribution(values, current_price=50.0, bins=20)
+
+        assert summary["draws"] == 2_000
+        assert len(summary["histogram"]["counts"]) == 20
+        assert len(summary["histogram"]["bin_edges"]) == 21
+        assert sum(summary["histogram"]["counts"]) == summary["valid_draws"]
+        percentiles = list(summary["percentiles"].values())
+        assert percentiles == sorted(percentiles)
+        assert 0.0 <= summary["probability_of_upside"] <= 1.0
+
+    def test_invalid_draws_are_excluded(self):
+        values = np.array([10.0, np.nan, 30.0, np.nan])
+        summary = summarize_distribution(values, current_price=20.0, bins=2)
+        assert summary["valid_draws"] == 2
+        assert summary["mean"] == 20.0
+        assert summary["probability_of_upside"] == 0.5
+
+    def test_all_invalid_raises(self):
+        with pytest.raises(DCFError):
+            summarize_distribution(np.array([np.nan, np.nan]), current_price=1.0)
+
+
+# ===========================================================================
+# Sensitivity grid
+# ===========================================================================
+
+
+class TestSensitivityGrid:
+    """compute_sensitivity_grid evaluates the Cartesian product of its axes."""
+
+    def test_cells_match_decimal_engine(self, sample_inputs):
+        betas = grid_axis(sample_inputs, "stable_beta", 4)
+        premiums = grid_axis(sample_inputs, "equity_risk_premium", 3)
+        grid = compute_sensitivity_grid(
+            sample_inputs,
+            [("stable_beta", betas), ("equity_risk_premium", premiums)],
+        )
+        assert grid.shape == (4, 3)
+        for i, beta in enumerate(betas):
+            for j, erp in enumerate(premiums):
+                expected = compute_dcf(
+                    dataclasses.replace(
+                        sample_inputs,
+                        stable_beta=Decimal(str(beta)),
+                        equity_risk_premium=Decimal(str(erp)),
+                    )
+                )
+                assert grid[i, j] == pytest.approx(
+                    float(expected.value_per_share), abs=0.01
+                )
+
+    def test_three_dimensional_grid(self, sample_inputs):
+        axes = [
+            (field, grid_axis(sample_inputs, field, 5))
+            for field in ("stable_growth_rate", "stable_roc", "risk_free_rate")
+        ]
+        grid = compute_sensitivity_grid(sample_inputs, axes)
+        assert grid.shape == (5, 5, 5)
+
+    def test_axis_centered_on_resolved_baseline(self, sample_inputs):
+        """Default ranges are centered on the baseline, defaults resolved."""
+        centers = grid_centers(sample_inputs)
+        assert centers["stable_debt_to_equity"] == pytest.approx(0.30)
+        axis = grid_axis(sample_inputs, "stable_roc", 5)
+        assert axis[2] == pytest.approx(centers["stable_roc"])
+
+    def test_growth_axis_defaults_to_zero_through_risk_free(self, sample_inputs):
+        axis = grid_axis(sample_inputs, "stable_growth_rate", 9)
+        assert axis[0] == 0.0
+        assert axis[-1] == pytest.approx(0.04)
+
+    def test_explicit_bounds(self, sample_inputs):
+        axis = grid_axis(sample_inputs, "stable_beta", 3, low=0.8, high=1.2)
+        assert list(axis) == pytest.approx([0.8, 1.0, 1.2])
+
+    def test_unknown_field_raises(self, sample_inputs):
+        with pytest.raises(DCFError, match="Cannot vary"):
+            grid_axis(sample_inputs, "revenue", 5)
+
+    def test_duplicate_axes_raise(self, sample_inputs):
+        axis = grid_axis(sample_inputs, "stable_beta", 3)
+        with pytest.raises(DCFError, match="distinct"):
+            compute_sensitivity_grid(
+                sample_inputs, [("stable_beta", axis), ("stable_beta", axis)]
+            )
+
+
+# ===========================================================================
+# Reverse DCF
+# ===========================================================================
+
+
+class TestSolveImplied:
+    """solve_implied finds the input that values the stock at a target price."""
+
+    @pytest.mark.parametrize("solve_for", ["expected_growth", "stable_roc", "wacc"])
+    def test_solution_hits_target(self, sample_inputs, solve_for):
+        solution = solve_implied(sample_inputs, solve_for)
+        assert solution["value_at_solution"] == pytest.approx(50.0, abs=1e-4)
+        assert solution["evaluations"] < 30
+
+    def test_stable_roc_matches_decimal_engine(self, sample_inputs):
+        solution = solve_implied(sample_inputs, "stable_roc", target_price=60.0)
+        implied = Decimal(str(solution["implied_value"]))
+        result = compute_dcf(dataclasses.replace(sample_inputs, stable_roc=implied))
+        assert float(result.value_per_share) == pytest.approx(60.0, abs=0.01)
+
+    def test_stable_growth_with_excess_returns(self, sample_inputs):
+        """Growth only moves value when stable ROC exceeds the stable WACC."""
+        inputs = dataclasses.replace(sample_inputs, stable_roc=Decimal("0.15"))
+        solution = solve_implied(inputs, "stable_growth_rate", target_price=90.0)
+        implied = Decimal(str(solution["implied_value"]))
+        result = compute_dcf(dataclasses.replace(inputs, stable_growth_rate=implied))
+        assert float(result.value_per_share) == pytest.approx(90.0, abs=0.01)
+        assert solution["bracket"][1] == pytest.approx(0.04)  # capped at risk-free
+
+    def test_baseline_wacc_reproduces_engine_value(self, sample_inputs):
+        """Solving for the engine's own value returns the engine's own WACC."""
+        expected = compute_dcf(sample_inputs)
+        solution = solve_implied(
+            sample_inputs, "wacc", target_price=float(expected.value_per_share)
+        )
+        assert solution["baseline_value"] == pytest.approx(float(expected.wacc))
+        assert solution["implied_value"] == pytest.approx(
+            float(expected.wacc), abs=1e-5
+        )
+
+    def test_no_solution_in_bracket_raises(self, sample_inputs):
+        with pytest.raises(DCFError, match="No stable_roc"):
+            solve_implied(sample_inputs, "stable_roc", target_price=10_000.0)
+
+    def test_unknown_variable_raises(self, sample_inputs):
+        with pytest.raises(DCFError, match="Cannot solve"):
+            solve_implied(sample_inputs, "revenue")
+
+
+# ===========================================================================
+# Tornado
+# ===========================================================================
+
+
+class TestTornado:
+    """compute_tornado shocks every numeric input in one batch."""
+
+    def test_covers_every_numeric_field(self, sample_inputs):
+        bars = compute_tornado(sample_inputs)
+        declared = {f.name for f in dataclasses.fields(DCFInputs)}
+        assert {bar["field"] for bar in bars} == declared
+
+    def test_ranked_by_impact(self, sample_inputs):
+        impacts = [bar["impact"] for bar in compute_tornado(sample_inputs)]
+        assert impacts == sorted(impacts, reverse=True)
+
+    def test_changes_match_decimal_engine(self, sample_inputs):
+        base = float(compute_dcf(sample_inputs).value_per_share)
+        bar = next(b for b in compute_tornado(sample_inputs) if b["field"] == "ebit")
+        shocked = compute_dcf(dataclasses.replace(sample_inputs, ebit=Decimal("8800")))
+        assert bar["high_input"] == pytest.approx(8800.0)
+        assert bar["high_change"] == pytest.approx(
+            float(shocked.value_per_share) - base, abs=0.01
+        )
+
+    def test_optional_fields_shock_resolved_default(self, sample_inputs):
+        """stable_roc is None in the fixture; it is shocked around stable WACC."""
+        bars = {b["field"]: b for b in compute_tornado(sample_inputs, shock=0.2)}
+        roc = bars["stable_roc"]
+        assert roc["base_input"] == pytest.approx(
+            float(compute_dcf(sample_inputs).terminal_roc), abs=1e-8
+        )
+        assert roc["low_input"] == pytest.approx(roc["base_input"] * 0.8)
+
+    def test_forecast_years_moves_whole_years(self, sample_inputs):
+        short = dataclasses.replace(sample_inputs, forecast_years=7)
+        bars = {b["field"]: b for b in compute_tornado(short, shock=0.01)}
+        assert bars["forecast_years"]["low_input"] == 6
+        assert bars["forecast_years"]["high_input"] == 8
+
+    def test_forecast_years_stays_in_supported_range(self, sample_inputs):
+        """At the 10-year maximum the upper side does not move."""
+        bars = {b["field"]: b for b in compute_tornado(sample_inputs, shock=0.5)}
+        years = bars["forecast_years"]
+        assert (years["low_input"], years["high_input"]) == (5, 10)
+        assert years["high_change"] == 0.0
+        assert years["low_change"] is not None
+
+
+# ===========================================================================
+# Attribution
+# ===========================================================================
+
+
+class TestAttribution:
+    """attribute_change substitutes differing inputs one at a time."""
+
+    def test_steps_sum_to_total(self, sample_inputs):
+        target = dataclasses.replace(
+            sample_inputs,
+            ebit=Decimal("9000"),
+            stable_beta=Decimal("1.2"),
+            stable_roc=Decimal("0.10"),
+        )
+        result = attribute_change(sample_inputs, target)
+        assert [s["field"] for s in result["steps"]] == [
+            "ebit",
+            "stable_roc",
+            "stable_beta",
+        ]
+        assert result["start_value"] == pytest.approx(
+            float(compute_dcf(sample_inputs).value_per_share), abs=0.01
+        )
+        assert result["end_value"] == pytest.approx(
+            float(compute_dcf(target).value_per_share), abs=0.01
+        )
+        assert sum(s["change"] for s in result["steps"]) == pytest.approx(
+            result["total_change"], abs=1e-3
+        )
+
+    def test_first_step_matches_decimal_engine(self, sample_inputs):
+        target = dataclasses.replace(
+            sample_inputs, ebit=Decimal("9000"), forecast_years=5
+        )
+        step = attribute_change(sample_inputs, target)["steps"][0]
+        shocked = compute_dcf(dataclasses.replace(sample_inputs, ebit=Decimal("9000")))
+        assert step["field"] == "ebit"
+        assert step["value"] == pytest.approx(float(shocked.value_per_share), abs=0.01)
+
+    def test_optional_default_reported_as_none(self, sample_inputs):
+        target = dataclasses.replace(sample_inputs, stable_roc=Decimal("0.10"))
+        (step,) = attribute_change(sample_inputs, target)["steps"]
+        assert step["from_input"] is None
+        assert step["to_input"] == pytest.approx(0.10)
+
+    def test_identical_inputs_have_no_steps(self, sample_inputs):
+        result = attribute_change(sample_inputs, sample_inputs)
+        assert result["steps"] == []
+        assert result["total_change"] == 0
+
+    def test_custom_order(self, sample_inputs):
+        target = dataclasses.replace(
+            sample_inputs, ebit=Decimal("9000"), stable_beta=Decimal("1.2")
+        )
+        result = attribute_change(sample_inputs, target, order=["stable_beta", "ebit"])
+        assert [s["field"] for s in result["steps"]] == ["stable_beta", "ebit"]
+
+    def test_unknown_field_raises(self, sample_inputs):
+        with pytest.raises(DCFError, match="Cannot attribute"):
+            attribute_change(sample_inputs, sample_inputs, order=["wacc"])
+
+
+# ===========================================================================
+# Price paths
+# ===========================================================================
+
+
+class TestValuePath:
+    """value_path revalues fixed fundamentals along a price series."""
+
+    def test_matches_decimal_engine_at_each_price(self, sample_inputs):
+        prices = [40.0, 50.0, 65.5]
+        path = value_path(sample_inputs, prices)
+        assert path["value_per_share"].shape == (3,)
+        for price, value in zip(prices, path["value_per_share"]):
+            expected = compute_dcf(
+                dataclasses.replace(sample_inputs, current_price=Decimal(str(price)))
+            )
+            assert value == pytest.approx(float(expected.value_per_share), abs=0.01)
+
+    def test_price_moves_wacc_weights(self, sample_inputs):
+        path = value_path(sample_inputs, [20.0, 200.0])
+        # A higher market cap lowers the debt weight and raises the WACC
+        assert path["wacc"][1] > path["wacc"][0]
+
+    def test_invalid_inputs_are_nan(self, sample_inputs):
+        inputs = dataclasses.replace(sample_inputs, ebit=Decimal("-1"))
+        assert np.isnan(value_path(inputs, [50.0])["value_per_share"]).all()
@@ -0,0 +1,207 @@
+"""
+Tests for the vectorized DCF engine.
+
+Pure computation tests — no database, no async.
+Checks the float64 batch engine against the Decimal engine (compute_dcf)
+within the documented tolerance, plus per-row error reporting.
+"""
+
+import dataclasses
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.services.dcf_batch import (
+    BATCH_RTOL,
+    ERROR_NEGATIVE_EBIT,
+    ERROR_NON_POSITIVE_SHARES,
+    ERROR_TERMINAL_DENOMINATOR,
+    compute_dcf_batch,
+    evaluate_batch,
+    pack_inputs,
+)
+from app.services.dcf_engine import DCFInputs, apply_scenario, compute_dcf
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def sample_inputs():
+    """A typical mid-cap company with moderate growth and leverage."""
+    return DCFInputs(
+        revenue=Decimal("50000"),
+        ebit=Decimal("8000"),
+        tax_provision=Decimal("1600"),
+        pretax_income=Decimal("7500"),
+        capex=Decimal("3000"),
+        depreciation=Decimal("1500"),
+        working_capital_change=Decimal("200"),
+        interest_expense=Decimal("500"),
+        total_debt=Decimal("10000"),
+        cash_and_equivalents=Decimal("5000"),
+        book_value_equity=Decimal("30000"),
+        shares_outstanding=Decimal("1000"),
+        current_price=Decimal("50"),
+        risk_free_rate=Decimal("0.04"),
+        equity_risk_premium=Decimal("0.05"),
+        country_risk_premium=Decimal("0.00"),
+        unlevered_beta=Decimal("1.10"),
+        sector_avg_debt_to_equity=Decimal("0.30"),
+        sector_avg_roc=Decimal("0.12"),
+        stable_growth_rate=Decimal("0.03"),
+    )
+
+
+def _variants(base: DCFInputs) -> list[DCFInputs]:
+    """A spread of inputs exercising every branch of the engine."""
+    return [
+        base,
+        apply_scenario(base, "conservative"),
+        apply_scenario(base, "moderate"),
+        apply_scenario(base, "optimistic"),
+        dataclasses.replace(base, forecast_years=5),
+        dataclasses.replace(base, interest_expense=Decimal("0")),
+        dataclasses.replace(base, interest_expense=Decimal("4000")),  # low coverage
+        dataclasses.replace(base, pretax_income=Decimal("0")),
+        dataclasses.replace(base, tax_provision=Decimal("-100")),
+        dataclasses.replace(base, total_debt=Decimal("0")),
+        dataclasses.replace(base, stable_debt_to_equity=Decimal("1.5")),
+        dataclasses.replace(base, stable_roc=Decimal("0.15")),
+        dataclasses.replace(base, book_value_equity=Decimal("-20000")),
+    ]
+
+
+# ===========================================================================
+# Agreement with the Decimal engine
+# ===========================================================================
+
+
+class TestAgreementWithDecimalEngine:
+    """The batch engine must reproduce compute_dcf row by row."""
+
+    def test_value_per_share_matches(self, sample_inputs):
+        variants = _variants(sample_inputs)
+        batch = compute_dcf_batch(variants)
+        for i, inputs in enumerate(variants):
+            expected = compute_dcf(inputs)
+            actual = round(float(batch.value_per_share[i]), 2)
+            assert actual == pytest.approx(
+                float(expected.value_per_share), rel=BATCH_RTOL, abs=0.01
+            ), f"variant {i}"
+
+    def test_intermediate_outputs_match(self, sample_inputs):
+        variants = _variants(sample_inputs)
+        batch = compute_dcf_batch(variants)
+        for i, inputs in enumerate(variants):
+            expected = compute_dcf(inputs)
+            assert float(batch.wacc[i]) == pytest.approx(float(expected.wacc), rel=1e-9)
+            assert float(batch.terminal_wacc[i]) == pytest.approx(
+                float(expected.terminal_wacc), rel=1e-9
+            )
+            assert float(batch.pv_terminal[i]) == pytest.approx(
+                float(expected.pv_terminal), rel=1e-9
+            )
+            assert float(batch.pv_operating_cashflows[i]) == pytest.approx(
+                float(expected.pv_operating_cashflows), rel=1e-9
+            )
+
+    def test_implied_upside_matches(self, sample_inputs):
+        batch = compute_dcf_batch([sample_inputs])
+        expected = compute_dcf(sample_inputs)
+        assert round(float(batch.implied_upside[0]), 4) == pytest.approx(
+            float(expected.implied_upside), abs=1e-4
+        )
+
+    def test_mixed_forecast_years_in_one_batch(self, sample_inputs):
+        """Rows with different horizons are padded, not truncated."""
+        five = dataclasses.replace(sample_inputs, forecast_years=5)
+        batch = compute_dcf_batch([sample_inputs, five])
+        alone = compute_dcf_batch([five])
+        assert batch.value_per_share[1] == pytest.approx(alone.value_per_share[0])
+
+
+# ===========================================================================
+# Error handling and result table
+# ===========================================================================
+
+
+class TestBatchErrors:
+    """Invalid rows are reported per row instead of raising."""
+
+    def test_error_codes(self, sample_inputs):
+        rows = [
+            sample_inputs,
+            dataclasses.replace(sample_inputs, ebit=Decimal("-10")),
+            dataclasses.replace(sample_inputs, shares_outstanding=Decimal("0")),
+            dataclasses.replace(
+                sample_inputs,
+                stable_roc=None,
+                stable_beta=Decimal("0"),
+                equity_risk_premium=Decimal("0"),
+                risk_free_rate=Decimal("0.01"),
+                stable_growth_rate=Decimal("0.01"),
+                interest_expense=Decimal("0"),
+                stable_debt_to_equity=Decimal("0"),
+            ),
+        ]
+        batch = compute_dcf_batch(rows)
+        assert batch.errors == [
+            None,
+            ERROR_NEGATIVE_EBIT,
+            ERROR_NON_POSITIVE_SHARES,
+            ERROR_TERMINAL_DENOMINATOR,
+        ]
+        assert list(batch.ok) == [True, False, False, False]
+        assert np.isnan(batch.value_per_share[1:]).all()
+
+    def test_empty_batch(self):
+        batch = compute_dcf_batch([])
+        assert len(batch) == 0
+        assert batch.to_rows() == []
+
+    def test_to_rows(self, sample_inputs):
+        bad = dataclasses.replace(sample_inputs, ebit=Decimal("0"))
+        rows = compute_dcf_batch([sample_inputs, bad]).to_rows()
+        assert rows[0]["error"] is None
+        assert rows[0]["value_per_share"] == float(
+            compute_dcf(sample_inputs).value_per_share
+        )
+        assert rows[1] == {"error": ERROR_NEGATIVE_EBIT}
+
+
+class TestBroadcasting:
+    """evaluate_batch accepts scalars broadcast against per-row arrays."""
+
+    def test_vary_one_field(self, sample_inputs):
+        packed = pack_inputs([sample_inputs])
+        packed["stable_growth_rate"] = np.array([0.02, 0.03])
+        out = evaluate_batch(packed)
+        assert out["value_per_share"].shape == (2,)
+        expected = compute_dcf(sample_inputs)
+        assert out["value_per_share"][1] == pytest.approx(
+            float(expected.value_per_share), abs=0.01
+        )
+        assert out["value_per_share"][0] < out["value_per_share"][1]
+
+    def test_wacc_shift_and_growth_override(self, sample_inputs):
+        """Solver hooks: a zero shift / the engine's own growth change nothing."""
+        packed = pack_inputs([sample_inputs])
+        base = evaluate_batch(packed)
+
+        shifted = evaluate_batch({**packed, "wacc_shift": np.array([0.0, 0.01])})
+        assert shifted["value_per_share"][0] == pytest.approx(
+            base["value_per_share"][0]
+        )
+        assert shifted["wacc"][1] == pytest.approx(base["wacc"][0] + 0.01)
+        assert shifted["value_per_share"][1] < base["value_per_share"][0]
+
+        overridden = evaluate_batch(
+            {**packed, "expected_growth": base["expected_growth"]}
+        )
+        assert overridden["value_per_share"][0] == pytest.approx(
+            base["value_per_share"][0]
+        )
@@ -8,8 +8,11 @@ Validates the two-stage FCFF valuation model against:
   - Edge cases
   - Sensitivity matrix
   - Scenario presets
+  - Incremental stage graph
 """
 
+import dataclasses
+
 import pytest
 from decimal import Decimal
 
@@ -17,7 +20,11 @@ from app.services.dcf_engine import (
     DCFInputs,
     DCFResult,
     DCFError,
+    DCFStageGraph,
+    DCF_STAGES,
+    STAGE_FIELDS,
     compute_dcf,
+    compute_scenarios,
     compute_sensitivity_matrix,
     apply_scenario,
     _lever_beta,
@@ -591,6 +598,16 @@ class TestSensitivityMatrix:
             f"(diff={diff_pct:.2%})"
         )
 
+    def test_sensitivity_dense_step_refines_standard_grid(self, sample_inputs):
+        """A finer step covers the same range and agrees at the shared points."""
+        result = compute_dcf(sample_inputs)
+        standard = compute_sensitivity_matrix(sample_inputs, result)
+        dense = compute_sensitivity_matrix(sample_inputs, result, step=Decimal("0.001"))
+        assert len(dense["wacc_values"]) == 41
+        assert dense["wacc_values"][0] == standard["wacc_values"][0]
+        assert dense["wacc_values"][-1] == standard["wacc_values"][-1]
+        assert dense["matrix"][5][5] == standard["matrix"][1][1]
+
     def test_sensitivity_wacc_monotonic(self, sample_inputs):
         """Higher WACC should generally yield lower value per share (for a given growth)."""
         result = compute_dcf(sample_inputs)
@@ -679,6 +696,37 @@ class TestScenarioPresets:
         moderate_result = compute_dcf(moderate_inputs, scenario="moderate")
         assert conservative_result.value_per_share <= moderate_result.value_per_share
 
+    def test_apply_scenario_does_not_mutate_inputs(self, sample_inputs):
+        original = dataclasses.replace(sample_inputs)
+        apply_scenario(sample_inputs, "optimistic")
+        assert sample_inputs == original
+
+    def test_optimistic_roc_same_with_precomputed_base(self, sample_inputs):
+        """Passing the base year reuses its cost of debt without changing the ROC."""
+        from app.services.dcf_engine import _compute_base_year
+
+        base = _compute_base_year(sample_inputs)
+        with_base = apply_scenario(sample_inputs, "optimistic", base=base)
+        without = apply_scenario(sample_inputs, "optimistic")
+        assert with_base.stable_roc == without.stable_roc
+
+
+class TestComputeScenarios:
+    """compute_scenarios shares the base year across presets."""
+
+    def test_matches_individual_runs(self, sample_inputs):
+        names = ["conservative", "moderate", "optimistic"]
+        results = compute_scenarios(sample_inputs, names)
+        assert list(results) == names
+        for name in names:
+            expected = compute_dcf(apply_scenario(sample_inputs, name), scenario=name)
+            assert results[name] == expected
+
+    def test_negative_ebit_raises(self, sample_inputs):
+        sample_inputs.ebit = Decimal("-100")
+        with pytest.raises(DCFError):
+            compute_scenarios(sample_inputs, ["moderate"])
+
 
 # ===========================================================================
 # 6. Full DCF Integration Tests
@@ -754,3 +802,79 @@ class TestFullDCF:
         result = compute_dcf(sample_inputs)
         assert len(result.projections) == 5
         assert result.forecast_years == 5
+
+
+# ===========================================================================
+# 7. Incremental Stage Graph
+# ===========================================================================
+
+
+class TestStageGraph:
+    """DCFStageGraph reruns only the stages an input change touches."""
+
+    def test_first_compute_runs_every_stage(self, sample_inputs):
+        graph = DCFStageGraph()
+        graph.compute(sample_inputs)
+        assert graph.stages_run == list(DCF_STAGES)
+
+    def test_unchanged_inputs_run_nothing(self, sample_inputs):
+        graph = DCFStageGraph()
+        first = graph.compute(sample_inputs)
+        second = graph.compute(dataclasses.replace(sample_inputs))
+        assert graph.stages_run == []
+        assert second == first
+
+    def test_stable_growth_skips_base_year(self, sample_inputs):
+        graph = DCFStageGraph()
+        graph.compute(sample_inputs)
+        changed = dataclasses.replace(sample_inputs, stable_growth_rate=Decimal("0.02"))
+        result = graph.compute(changed)
+        assert graph.stages_run == [
+            "stable_state",
+            "projections",
+            "terminal",
+            "equity_bridge",
+        ]
+        assert result == compute_dcf(changed)
+
+    def test_bridge_only_change(self, sample_inputs):
+        graph = DCFStageGraph()
+        graph.compute(sample_inputs)
+        changed = dataclasses.replace(sample_inputs, minority_interests=Decimal("250"))
+        result = graph.compute(changed)
+        assert graph.stages_run == ["equity_bridge"]
+        assert result == compute_dcf(changed)
+
+    def test_identical_stage_output_stops_propagation(self, sample_inputs):
+        """Growth above the risk-free cap resolves to the same stable state."""
+        graph = DCFStageGraph()
+        graph.compute(
+            dataclasses.replace(sample_inputs, stable_growth_rate=Decimal("0.05"))
+        )
+        graph.compute(
+            dataclasses.replace(sample_inputs, stable_growth_rate=Decimal("0.06"))
+        )
+        assert graph.stages_run == ["stable_state"]
+
+    def test_mutating_caller_inputs_is_detected(self, sample_inputs):
+        graph = DCFStageGraph()
+        graph.compute(sample_inputs)
+        sample_inputs.stable_beta = Decimal("1.2")
+        result = graph.compute(sample_inputs)
+        assert "stable_state" in graph.stages_run
+        assert result == compute_dcf(sample_inputs)
+
+    def test_error_resets_cache(self, sample_inputs):
+        graph = DCFStageGraph()
+        graph.compute(sample_inputs)
+        with pytest.raises(DCFError):
+            graph.compute(dataclasses.replace(sample_inputs, ebit=Decimal("-1")))
+        graph.compute(sample_inputs)
+        assert graph.stages_run == list(DCF_STAGES)
+
+    def test_every_input_field_feeds_a_stage(self):
+        """New DCFInputs fields must be wired into STAGE_FIELDS."""
+        used = set().union(*STAGE_FIELDS.values())
+        declared = {f.name for f in dataclasses.fields(DCFInputs)}
+        # sector_avg_roc is carried for reference only; the engine never reads it
+        assert declared - used == {"sector_avg_roc"}
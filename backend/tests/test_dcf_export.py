@@ -0,0 +1,71 @@
+"""
+Tests for streaming DCF run export formatting.
+
+Pure computation tests — no database.
+"""
+
+import csv
+import io
+import json
+
+from app.services.dcf_export import CSV_COLUMNS, csv_rows, export_chunks
+
+
+def _record(run_id, years=2):
+    return {
+        "run_id": run_id,
+        "symbol": "AAPL",
+        "run_name": "Bull case",
+        "scenario": "custom",
+        "is_default": False,
+        "computed_at": "2024-07-01 12:00:00",
+        "source_fiscal_date": "2024-06-30",
+        "current_price": 175.0,
+        "value_per_share": 201.5,
+        "implied_upside": 0.1514,
+        "verdict": "undervalued",
+        "terminal": {"terminal_growth": 0.03, "pv_terminal": 1_000_000.0},
+        "equity_bridge": {"enterprise_value": 3_000_000.0, "value_per_share": 201.5},
+        "projections": [
+            {"year": y, "fcff": 100.0 * y, "pv_fcff": 90.0 * y}
+            for y in range(1, years + 1)
+        ],
+        "inputs": {"revenue": 400000.0},
+    }
+
+
+async def _records(*records):
+    for record in records:
+        yield record
+
+
+def test_csv_rows_one_per_projection_year():
+    rows = csv_rows(_record(7, years=3))
+    assert len(rows) == 3
+    assert all(len(row) == len(CSV_COLUMNS) for row in rows)
+    first = dict(zip(CSV_COLUMNS, rows[0]))
+    assert first["run_id"] == 7
+    assert first["terminal_growth"] == 0.03
+    assert first["enterprise_value"] == 3_000_000.0
+    assert [dict(zip(CSV_COLUMNS, r))["year"] for r in rows] == [1, 2, 3]
+
+
+def test_csv_rows_without_projections_keeps_the_run():
+    record = _record(7)
+    record["projections"] = []
+    assert len(csv_rows(record)) == 1
+
+
+async def test_csv_export_yields_header_then_one_chunk_per_run():
+    chunks = [c async for c in export_chunks(_records(_record(1), _record(2)), "csv")]
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == list(CSV_COLUMNS)
+    assert [row[0] for row in rows[1:]] == ["1", "1", "2", "2"]
+
+
+async def test_jsonl_export_one_line_per_run():
+    chunks = [c async for c in export_chunks(_records(_record(1), _record(2)), "jsonl")]
+    lines = "".join(chunks).splitlines()
+    assert [json.loads(line)["run_id"] for line in lines] == [1, 2]
+    assert json.loads(lines[0])["projections"][1]["fcff"] == 200.0
@@ -0,0 +1,102 @@
+"""
+Tests for the compact DcfValuation.outputs storage format.
+
+Pure computation tests — no database, no async.
+"""
+
+import json
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.schemas.dcf import DCFResult
+from app.services.dcf_engine import DCFInputs, compute_dcf
+from app.services.dcf_outputs import (
+    BRIDGE_FIELDS,
+    OUTPUTS_FORMAT_VERSION,
+    PROJECTION_FIELDS,
+    compact_outputs,
+    expand_outputs,
+    projection_columns,
+)
+from app.services.dcf_service import DCFService
+
+
+@pytest.fixture
+def api_outputs():
+    """API-shaped outputs as produced by DCFService._format_result."""
+    inputs = DCFInputs(
+        revenue=Decimal("50000"),
+        ebit=Decimal("8000"),
+        tax_provision=Decimal("1600"),
+        pretax_income=Decimal("7500"),
+        capex=Decimal("3000"),
+        depreciation=Decimal("1500"),
+        working_capital_change=Decimal("200"),
+        interest_expense=Decimal("500"),
+        total_debt=Decimal("10000"),
+        cash_and_equivalents=Decimal("5000"),
+        book_value_equity=Decimal("30000"),
+        shares_outstanding=Decimal("1000"),
+        current_price=Decimal("50"),
+        risk_free_rate=Decimal("0.04"),
+        equity_risk_premium=Decimal("0.05"),
+        country_risk_premium=Decimal("0.00"),
+        unlevered_beta=Decimal("1.10"),
+        sector_avg_debt_to_equity=Decimal("0.30"),
+        sector_avg_roc=Decimal("0.12"),
+        stable_growth_rate=Decimal("0.03"),
+    )
+    stock = MagicMock()
+    stock.symbol = "TEST"
+    stock.name = "Test Co"
+    service = DCFService(MagicMock())
+    return service._format_result(stock, compute_dcf(inputs), "2024-06-30", inputs)
+
+
+def test_round_trip_reproduces_api_shape(api_outputs):
+    assert expand_outputs(compact_outputs(api_outputs)) == api_outputs
+
+
+def test_compact_layout(api_outputs):
+    stored = compact_outputs(api_outputs)
+    assert stored["format_version"] == OUTPUTS_FORMAT_VERSION
+    assert set(stored["projections"]) == set(PROJECTION_FIELDS)
+    assert stored["projections"]["year"] == list(range(1, 11))
+    assert len(stored["equity_bridge"]) == len(BRIDGE_FIELDS)
+    assert len(json.dumps(stored)) < 0.75 * len(json.dumps(api_outputs))
+
+
+def test_expanded_outputs_validate_against_schema(api_outputs):
+    DCFResult.model_validate(expand_outputs(compact_outputs(api_outputs)))
+
+
+def test_legacy_rows_read_unchanged(api_outputs):
+    assert expand_outputs(api_outputs) is api_outputs
+
+
+def test_missing_legacy_keys_stay_missing(api_outputs):
+    """Keys a legacy row never had are not expanded as None."""
+    legacy = {
+        **api_outputs,
+        "projections": [
+            {k: v for k, v in p.items() if k != "roc"}
+            for p in api_outputs["projections"]
+        ],
+        "equity_bridge": {
+            k: v
+            for k, v in api_outputs["equity_bridge"].items()
+            if k not in ("shares_outstanding", "value_per_share")
+        },
+    }
+    stored = compact_outputs(legacy)
+    assert stored["equity_bridge"][-2:] == [None, None]
+    assert expand_outputs(stored) == legacy
+
+
+def test_projection_columns_from_either_version(api_outputs):
+    legacy = projection_columns(api_outputs)
+    compact = projection_columns(compact_outputs(api_outputs))
+    assert legacy == compact
+    assert legacy["fcff"][0] == api_outputs["projections"][0]["fcff"]
@@ -287,6 +287,43 @@ async def test_financials_ttm():
         app.dependency_overrides.clear()
 
 
+async def test_financials_ttm_history():
+    """TTM history returns rolling series via TTMService.compute_ttm_history."""
+    stock = _make_mock_stock()
+    history = {
+        "income": {
+            "period_start": ["2023-03-31"],
+            "period_end": ["2023-12-31"],
+            "fields": {"revenue": [400000]},
+        },
+        "cash_flow": {"period_start": [], "period_end": [], "fields": {}},
+    }
+    mock_db = _make_session_with_side_effects(
+        [
+            _scalar_one_or_none_result(stock),  # stock lookup
+            _scalar_one_or_none_result(None),  # earnings calendar
+        ]
+    )
+
+    app.dependency_overrides[get_session] = _session_override(mock_db)
+
+    try:
+        with patch("app.routers.stocks.TTMService") as MockTTM:
+            mock_ttm_instance = AsyncMock()
+            mock_ttm_instance.compute_ttm_history = AsyncMock(return_value=history)
+            MockTTM.return_value = mock_ttm_instance
+
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://test") as c:
+                resp = await c.get("/api/stocks/AAPL/financials?period=ttm_history")
+
+        assert resp.status_code == 200
+        assert resp.json()["data"]["income"]["fields"]["revenue"] == [400000]
+        mock_ttm_instance.compute_ttm.assert_not_called()
+    finally:
+        app.dependency_overrides.clear()
+
+
 # ---------------------------------------------------------------------------
 # 5. GET /api/stocks/{symbol}/financials?period=invalid — 422
 # ---------------------------------------------------------------------------
@@ -0,0 +1,122 @@
+from datetime import date
+from types import SimpleNamespace
+
+from app.services.financial_facts import (
+    normalize_statement,
+    parse_number,
+    ttm_facts,
+)
+from app.services.ttm import TTMService
+
+# ---------- parse_number ----------
+
+
+def test_parse_number_int():
+    assert parse_number(5) == 5.0
+
+
+def test_parse_number_float():
+    assert parse_number(3.14) == 3.14
+
+
+def test_parse_number_numeric_string():
+    assert parse_number("1234") == 1234.0
+
+
+def test_parse_number_non_numeric_string():
+    assert parse_number("hello") is None
+
+
+def test_parse_number_none():
+    assert parse_number(None) is None
+
+
+# ---------- normalize_statement ----------
+
+
+def test_normalize_income_resolves_aliases_and_parses():
+    facts = normalize_statement(
+        "income",
+        {
+            "total_revenue": "1000",
+            "ebit": "250",
+            "pretax_income": "200",
+            "tax_provision": "40",
+            "currency": "USD",
+        },
+    )
+    assert facts == {
+        "revenue": 1000.0,
+        "operating_income": 250.0,
+        "pretax_income": 200.0,
+        "income_tax": 40.0,
+    }
+
+
+def test_normalize_prefers_non_zero_alias():
+    """A zero under the preferred key falls through to a non-zero alias."""
+    facts = normalize_statement(
+        "cash_flow", {"capital_expenditure": "0", "capital_expenditures": "-120"}
+    )
+    assert facts["capex"] == -120.0
+
+
+def test_normalize_keeps_genuine_zero():
+    facts = normalize_statement("income", {"interest_expense": 0})
+    assert facts == {"interest_expense": 0.0}
+
+
+def test_normalize_total_debt_from_components():
+    facts = normalize_statement(
+        "balance_sheet",
+        {
+            "stockholders_equity": "50000",
+            "short_term_debt": "5000",
+            "long_term_debt": "15000",
+            "common_shares_outstanding": "1000",
+        },
+    )
+    assert facts == {
+        "total_equity": 50000.0,
+        "total_debt": 20000.0,
+        "shares_outstanding": 1000.0,
+    }
+
+
+def test_normalize_unknown_statement_type():
+    assert normalize_statement("segments", {"revenue": "1"}) == {}
+
+
+# ---------- ttm_facts ----------
+
+
+def test_ttm_facts_sums_flows_and_takes_latest_balance():
+    facts = ttm_facts(
+        {
+            "income": [{"revenue": 400.0}, {"revenue": 300.0, "net_income": 30.0}],
+            "balance_sheet": [{"cash": 50.0}, {"cash": 40.0}],
+        }
+    )
+    assert facts == {"revenue": 700.0, "net_income": 30.0, "cash": 50.0}
+
+
+def test_build_ttm_aggregates_loaded_facts():
+    """build_ttm exposes TTM facts built from each statement's stored facts."""
+
+    def statement(fiscal_date, **facts):
+        return SimpleNamespace(
+            fiscal_date=fiscal_date,
+            data={},
+            facts=[SimpleNamespace(fact=k, value=v) for k, v in facts.items()],
+        )
+
+    ttm = TTMService.build_ttm(
+        {
+            "income": [
+                statement(date(2024, 6, 30), revenue=400),
+                statement(date(2024, 3, 31), revenue=300),
+            ],
+            "balance_sheet": [statement(date(2024, 6, 30), total_debt=90)],
+        }
+    )
+    assert ttm["facts"] == {"revenue": 700.0, "total_debt": 90.0}
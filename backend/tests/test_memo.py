@@ -0,0 +1,109 @@
+"""Tests for the async LRU / single-flight memoization helper."""
+
+import asyncio
+
+import pytest
+
+from app.services.memo import AsyncLRUCache
+
+
+async def test_computes_once_and_caches():
+    cache = AsyncLRUCache(maxsize=4)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return "value"
+
+    assert await cache.get_or_compute("k", compute) == "value"
+    assert await cache.get_or_compute("k", compute) == "value"
+    assert calls == 1
+
+
+async def test_concurrent_callers_share_one_computation():
+    cache = AsyncLRUCache(maxsize=4)
+    calls = 0
+    release = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiters = [
+        asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*waiters) == [1, 1, 1]
+    assert calls == 1
+
+
+async def test_failures_propagate_and_are_not_cached():
+    cache = AsyncLRUCache(maxsize=4)
+    release = asyncio.Event()
+
+    async def boom():
+        await release.wait()
+        raise ValueError("boom")
+
+    waiters = [asyncio.create_task(cache.get_or_compute("k", boom)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(cache) == 0
+
+    async def ok():
+        return 1
+
+    assert await cache.get_or_compute("k", ok) == 1
+
+
+async def test_waiter_takes_over_when_leader_is_cancelled():
+    cache = AsyncLRUCache(maxsize=4)
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "fast"
+
+    leader = asyncio.create_task(cache.get_or_compute("k", slow))
+    await started.wait()
+    follower = asyncio.create_task(cache.get_or_compute("k", fast))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "fast"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+def test_lru_eviction_and_invalidate():
+    cache = AsyncLRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # refresh "a"
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    assert cache.invalidate(lambda key: key == "a") == 1
+    assert cache.get("a") is None
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.memo.time.monotonic", lambda: now[0])
+    cache = AsyncLRUCache(maxsize=2, ttl=5)
+    cache.put("a", 1)
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
@@ -10,6 +10,7 @@ EXPECTED_TABLES = {
     "default_spreads",
     "dividends",
     "earnings_calendar",
+    "financial_facts",
     "financial_statements",
     "fred_series",
     "glossary",
@@ -20,11 +21,12 @@ EXPECTED_TABLES = {
     "sector_mapping",
     "stock_splits",
     "stocks",
+    "ttm_snapshots",
     "users",
 }
 
 
-def test_all_19_models_import():
+def test_all_21_models_import():
     """All model modules import without error and register with Base."""
     from app.models.dashboard import DashboardTicker
     from app.models.stocks import (
@@ -43,8 +45,8 @@ def test_all_19_models_import():
     assert FredSeries.__tablename__ == "fred_series"
 
 
-def test_base_metadata_has_19_tables():
-    """Base.metadata.tables contains exactly 19 app tables."""
+def test_base_metadata_has_21_tables():
+    """Base.metadata.tables contains exactly 21 app tables."""
     table_names = set(Base.metadata.tables.keys())
     assert table_names == EXPECTED_TABLES
 
@@ -80,6 +82,27 @@ def test_financial_statements_columns():
     assert expected == col_names
 
 
+def test_financial_facts_columns():
+    table = Base.metadata.tables["financial_facts"]
+    assert {c.name for c in table.columns} == {"statement_id", "fact", "value"}
+    assert [c.name for c in table.primary_key.columns] == ["statement_id", "fact"]
+
+
+def test_ttm_snapshots_columns():
+    table = Base.metadata.tables["ttm_snapshots"]
+    col_names = {c.name for c in table.columns}
+    expected = {
+        "stock_id",
+        "income_date",
+        "balance_sheet_date",
+        "cash_flow_date",
+        "data",
+        "computed_at",
+    }
+    assert expected == col_names
+    assert [c.name for c in table.primary_key.columns] == ["stock_id"]
+
+
 def test_dcf_valuations_columns():
     table = Base.metadata.tables["dcf_valuations"]
     col_names = {c.name for c in table.columns}
@@ -96,6 +119,13 @@ def test_dcf_valuations_columns():
         "is_saved",
         "inputs",
         "outputs",
+        "fingerprint",
+        "sensitivity",
+        "scenario",
+        "value_per_share",
+        "implied_upside",
+        "wacc",
+        "terminal_growth",
     }
     assert expected == col_names
 
@@ -387,6 +387,46 @@ async def test_fred_scheduler_fetch_and_cache():
     assert scheduler.latest_values["SPREAD_2S10S"]["value"] == round(4.25 - 3.80, 4)
 
 
+async def test_fred_scheduler_notifies_on_dgs10_value_change():
+    """on_rate_change fires only when the stored DGS10 value moves: not on
+    startup, a repeat fetch or a new observation at the same rate."""
+    mock_session = AsyncMock()
+    mock_factory = MagicMock()
+    mock_ctx = AsyncMock()
+    mock_ctx.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_ctx.__aexit__ = AsyncMock(return_value=False)
+    mock_factory.return_value = mock_ctx
+
+    on_rate_change = MagicMock()
+    scheduler = FredScheduler(
+        client=MagicMock(),
+        session_factory=mock_factory,
+        on_rate_change=on_rate_change,
+    )
+    observation = {"DGS10": {"value": 4.25, "date": "2024-01-15"}}
+
+    mock_service = AsyncMock()
+    mock_service.get_latest_value = AsyncMock(
+        side_effect=lambda series_id: observation.get(series_id)
+    )
+
+    with patch(
+        "app.services.fred_scheduler.FredDataService",
+        return_value=mock_service,
+    ):
+        # Startup: the rate already stored in the DB is the baseline
+        await scheduler.fetch_and_cache()
+        await scheduler.fetch_and_cache()
+        observation["DGS10"] = {"value": 4.25, "date": "2024-01-16"}
+        await scheduler.fetch_and_cache()
+        assert on_rate_change.call_count == 0
+
+        observation["DGS10"] = {"value": 4.30, "date": "2024-01-17"}
+        await scheduler.fetch_and_cache()
+
+    assert on_rate_change.call_count == 1
+
+
 # ======================================================================
 # Dashboard config endpoint tests
 # ======================================================================
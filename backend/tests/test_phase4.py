@@ -118,6 +118,78 @@ async def test_seed_is_idempotent():
     assert mock_session.add.call_count == 0
 
 
+async def test_seed_only_touches_changed_rows():
+    """Unchanged rows keep their updated_at; only changes to rows default
+    DCF valuations are fingerprinted on are reported."""
+    from types import SimpleNamespace
+
+    stale = object()
+    spreads = [
+        SimpleNamespace(rating=r, spread_over_treasury=s, updated_at=stale)
+        for r, s in DEFAULT_SPREADS
+    ]
+    spreads[0].spread_over_treasury += Decimal("0.001")
+    countries = [
+        SimpleNamespace(
+            country=c,
+            moody_rating=m,
+            default_spread=ds,
+            equity_risk_premium=erp,
+            country_risk_premium=crp,
+            updated_at=stale,
+        )
+        for c, m, ds, erp, crp in COUNTRY_RISK_PREMIUMS
+    ]
+    fields = (
+        "num_firms",
+        "unlevered_beta",
+        "avg_effective_tax_rate",
+        "avg_debt_to_equity",
+        "avg_operating_margin",
+        "avg_roc",
+        "avg_reinvestment_rate",
+        "cost_of_capital",
+        "fundamental_growth_rate",
+    )
+    industries = [
+        SimpleNamespace(
+            industry_name=row[0], updated_at=stale, **dict(zip(fields, row[1:]))
+        )
+        for row in DAMODARAN_INDUSTRIES
+    ]
+    # Spreads and non-US countries are not read by the DCF engine
+    us = next(i for i, row in enumerate(countries) if row.country == "United States")
+    other = next(i for i, row in enumerate(countries) if i != us)
+    countries[other].equity_risk_premium += Decimal("0.001")
+    countries[us].equity_risk_premium += Decimal("0.001")
+    industries[0].unlevered_beta += Decimal("0.01")
+
+    def make_mock_result(existing_list):
+        r = MagicMock()
+        r.scalars.return_value.all.return_value = existing_list
+        return r
+
+    mock_session = AsyncMock()
+    mock_session.execute = AsyncMock(
+        side_effect=[
+            make_mock_result(spreads),
+            make_mock_result(countries),
+            make_mock_result(industries),
+        ]
+    )
+
+    counts = await seed_damodaran_data(mock_session)
+
+    assert counts["changed"] == 2
+    assert counts["default_spreads"] == 15
+    assert spreads[0].updated_at is not stale
+    assert spreads[0].spread_over_treasury == DEFAULT_SPREADS[0][1]
+    assert all(row.updated_at is stale for row in spreads[1:])
+    moved = {id(countries[us]), id(countries[other]), id(industries[0])}
+    for row in countries + industries:
+        assert (row.updated_at is not stale) == (id(row) in moved)
+
+
 async def test_seed_data_values_are_decimals():
     """All seed data values should be proper Decimal types."""
     for rating, spread in DEFAULT_SPREADS:
@@ -245,6 +317,17 @@ async def test_sector_mapping_exact_industry_match():
 # ======================================================================
 
 
+@pytest.fixture(autouse=True)
+def _clear_dcf_caches():
+    """Snapshots, artifacts and persisted defaults are process-wide; start
+    every test cold."""
+    from app.services import dcf_service
+
+    dcf_service._snapshots.invalidate()
+    dcf_service._artifacts.invalidate()
+    dcf_service._persisted.invalidate()
+
+
 def _make_stock(
     symbol="AAPL", name="Apple Inc", sector="Technology", industry="Software"
 ):
@@ -257,32 +340,47 @@ def _make_stock(
     return stock
 
 
+def _with_facts(ttm):
+    """Add the canonical facts TTMService derives from the raw statements."""
+    from app.services.financial_facts import normalize_statement, ttm_facts
+
+    ttm["facts"] = ttm_facts(
+        {
+            stmt_type: [normalize_statement(stmt_type, ttm.get(stmt_type, {}))]
+            for stmt_type in ("income", "cash_flow", "balance_sheet")
+        }
+    )
+    return ttm
+
+
 def _make_ttm():
     """Create a mock TTM result with all needed financial data."""
-    return {
-        "income": {
-            "revenue": 400000,
-            "operating_income": 120000,
-            "income_before_tax": 115000,
-            "income_tax_expense": 20000,
-            "interest_expense": 5000,
-        },
-        "cash_flow": {
-            "capital_expenditure": -12000,
-            "depreciation_and_amortization": 8000,
-        },
-        "balance_sheet": {
-            "total_debt": 110000,
-            "cash_and_cash_equivalents": 50000,
-            "total_shareholders_equity": 80000,
-            "current_assets": 140000,
-            "current_liabilities": 120000,
-            "shares_outstanding": 15000,
-            "minority_interest": 0,
-        },
-        "period_end": "2024-06-30",
-        "quarters_used": 4,
-    }
+    return _with_facts(
+        {
+            "income": {
+                "revenue": 400000,
+                "operating_income": 120000,
+                "income_before_tax": 115000,
+                "income_tax_expense": 20000,
+                "interest_expense": 5000,
+            },
+            "cash_flow": {
+                "capital_expenditure": -12000,
+                "depreciation_and_amortization": 8000,
+            },
+            "balance_sheet": {
+                "total_debt": 110000,
+                "cash_and_cash_equivalents": 50000,
+                "total_shareholders_equity": 80000,
+                "current_assets": 140000,
+                "current_liabilities": 120000,
+                "shares_outstanding": 15000,
+                "minority_interest": 0,
+            },
+            "period_end": "2024-06-30",
+            "quarters_used": 4,
+        }
+    )
 
 
 def _make_sector_result():
@@ -305,6 +403,20 @@ def _make_sector_result():
     )
 
 
+def _make_inputs():
+    """DCFInputs assembled from the mock TTM and sector data."""
+    from app.services.dcf_service import DCFService
+
+    return DCFService(AsyncMock())._assemble_inputs(
+        _make_ttm(),
+        _make_sector_result(),
+        Decimal("175.00"),
+        Decimal("0.0425"),
+        Decimal("0.046"),
+        Decimal("0"),
+    )
+
+
 @patch("app.services.dcf_service.sector_mapping_service")
 async def test_dcf_service_compute_default(mock_sms):
     """compute_default should run full DCF pipeline and return a result dict."""
@@ -336,8 +448,16 @@ async def test_dcf_service_compute_default(mock_sms):
     mock_country_result = MagicMock()
     mock_country_result.scalar_one_or_none.return_value = mock_country
 
-    # Mock TTM
-    with patch.object(service, "_get_ttm", new_callable=AsyncMock, return_value=ttm):
+    # Mock TTM and a stale stored default
+    with (
+        patch.object(service, "_get_ttm", new_callable=AsyncMock, return_value=ttm),
+        patch.object(
+            service,
+            "_get_default_state",
+            new_callable=AsyncMock,
+            return_value=("fp-new", True, None),
+        ),
+    ):
         mock_sms.get_mapping = AsyncMock(return_value=sector)
 
         # Set up session.execute to return different results based on call order
@@ -363,6 +483,7 @@ async def test_dcf_service_compute_default(mock_sms):
 
             result = await service.compute_default("AAPL")
 
+    assert mock_save.call_args.kwargs["fingerprint"] == "fp-new"
     assert result["symbol"] == "AAPL"
     assert result["value_per_share"] > 0
     assert "projections" in result
@@ -373,246 +494,1824 @@ async def test_dcf_service_compute_default(mock_sms):
 
 
 @patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_service_ineligible_financial(mock_sms):
-    """Financial companies should be rejected."""
-    from app.services.dcf_service import DCFService, DCFEligibilityError
+async def test_dcf_service_compute_default_serves_stored(mock_sms):
+    """A stored default computed from the same data is returned as-is."""
+    from app.services.dcf_service import DCFService
 
     mock_session = AsyncMock()
     service = DCFService(mock_session)
 
-    stock = _make_stock(sector="Financial Services", industry="Banks")
-    sector = _make_sector_result()
-    sector.is_eligible = False
-    sector.rejection_reason = "financial_firm"
-
     mock_stock_result = MagicMock()
-    mock_stock_result.scalar_one_or_none.return_value = stock
+    mock_stock_result.scalar_one_or_none.return_value = _make_stock()
     mock_session.execute = AsyncMock(return_value=mock_stock_result)
-    mock_sms.get_mapping = AsyncMock(return_value=sector)
+    stored = {"symbol": "AAPL", "value_per_share": 123.45}
 
-    with pytest.raises(DCFEligibilityError) as exc_info:
-        await service.compute_default("JPM")
+    with (
+        patch.object(
+            service,
+            "_get_default_state",
+            new_callable=AsyncMock,
+            return_value=("fp", True, stored),
+        ),
+        patch.object(service, "_save_valuation", new_callable=AsyncMock) as mock_save,
+    ):
+        result = await service.compute_default("AAPL")
 
-    assert exc_info.value.reason == "financial_firm"
+    assert result == stored
+    mock_sms.get_mapping.assert_not_called()
+    mock_save.assert_not_called()
+    mock_session.commit.assert_not_called()
 
 
 @patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_service_missing_stock(mock_sms):
-    """Missing stock should raise eligibility error."""
-    from app.services.dcf_service import DCFService, DCFEligibilityError
+async def test_dcf_service_endpoints_share_default_artifact(mock_sms):
+    """Summary, sensitivity and default fired together compute the DCF once."""
+    import asyncio
+
+    from app.services.dcf_service import DCFService
 
     mock_session = AsyncMock()
     service = DCFService(mock_session)
 
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = None
-    mock_session.execute = AsyncMock(return_value=mock_result)
-
-    with pytest.raises(DCFEligibilityError) as exc_info:
-        await service.compute_default("FAKE")
-
-    assert exc_info.value.reason == "missing_stock"
-
-
-# ======================================================================
-# DCF endpoint tests
-# ======================================================================
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = _make_stock()
+    mock_session.execute = AsyncMock(return_value=mock_stock_result)
+    mock_sms.get_mapping = AsyncMock(return_value=_make_sector_result())
+
+    with (
+        patch.object(
+            service,
+            "_get_default_state",
+            new_callable=AsyncMock,
+            return_value=("fp", True, None),
+        ),
+        patch.object(
+            service, "_get_ttm", new_callable=AsyncMock, return_value=_make_ttm()
+        ),
+        patch.object(
+            service,
+            "_build_inputs",
+            wraps=service._build_inputs,
+        ) as mock_build,
+        patch.object(
+            service,
+            "_get_risk_free_rate",
+            new_callable=AsyncMock,
+            return_value=Decimal("0.0425"),
+        ),
+        patch.object(
+            service,
+            "_get_current_price",
+            new_callable=AsyncMock,
+            return_value=Decimal("175.00"),
+        ),
+        patch.object(
+            service,
+            "_get_country_risk",
+            new_callable=AsyncMock,
+            return_value=(Decimal("0.046"), Decimal("0")),
+        ),
+        patch.object(service, "_save_valuation", new_callable=AsyncMock),
+    ):
+        default, summary, sensitivity = await asyncio.gather(
+            service.compute_default("AAPL"),
+            service.get_summary("AAPL"),
+            service.get_sensitivity("AAPL"),
+        )
 
+    assert mock_build.call_count == 1
+    assert mock_sms.get_mapping.await_count == 1
+    assert summary["value_per_share"] == default["value_per_share"]
+    assert sensitivity["base_value"] == default["value_per_share"]
 
-@patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_constraints_endpoint(mock_sms):
-    """GET /api/dcf/constraints should return slider rules."""
-    from httpx import ASGITransport, AsyncClient
-    from app.main import app
 
-    async with AsyncClient(
-        transport=ASGITransport(app=app), base_url="http://test"
-    ) as client:
-        resp = await client.get("/api/dcf/constraints")
+async def test_dcf_service_sensitivity_served_from_stored_surfaces():
+    """A current fingerprint serves the stored surfaces without recomputing."""
+    from app.services.dcf_service import DCFService
 
-    assert resp.status_code == 200
-    data = resp.json()["data"]
-    assert "forecast_years" in data
-    assert data["forecast_years"]["min"] == 5
-    assert data["forecast_years"]["max"] == 10
-    assert "stable_growth_rate" in data
-    assert "stable_beta" in data
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = _make_stock()
+    mock_session.execute = AsyncMock(return_value=mock_stock_result)
+    surfaces = {"standard": {"base_value": 1.0}, "dense": {"base_value": 1.0}}
 
+    with (
+        patch.object(
+            service,
+            "_get_default_state",
+            new_callable=AsyncMock,
+            return_value=("fp", True, surfaces),
+        ) as mock_state,
+        patch.object(service, "_get_default_artifact", new_callable=AsyncMock) as art,
+    ):
+        dense = await service.get_sensitivity("AAPL", density="dense")
 
-@patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_default_missing_stock(mock_sms):
-    """GET /api/dcf/{symbol}/default should return 422 for missing stock."""
-    from httpx import ASGITransport, AsyncClient
-    from app.main import app
-    from app.services.dcf_service import DCFEligibilityError
+    assert dense is surfaces["dense"]
+    assert mock_state.call_args.args[1].key == "sensitivity"
+    art.assert_not_awaited()
 
-    with patch("app.routers.dcf.DCFService") as mock_cls:
-        mock_instance = AsyncMock()
-        mock_instance.compute_default = AsyncMock(
-            side_effect=DCFEligibilityError("missing_stock", "Stock 'FAKE' not found")
-        )
-        mock_cls.return_value = mock_instance
 
-        async with AsyncClient(
-            transport=ASGITransport(app=app), base_url="http://test"
-        ) as client:
-            resp = await client.get("/api/dcf/FAKE/default")
+async def test_dcf_service_sensitivity_miss_persists_default():
+    """Stale surfaces recompute the default and store both under one fingerprint."""
+    from app.services.dcf_engine import compute_dcf
+    from app.services.dcf_service import DCFService, ValuationArtifact
 
-    assert resp.status_code == 422
-    body = resp.json()
-    assert body["detail"]["reason"] == "missing_stock"
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = _make_stock()
+    mock_session.execute = AsyncMock(return_value=mock_stock_result)
+    inputs = _make_inputs()
+    artifact = ValuationArtifact(
+        fingerprint="fp",
+        sector=_make_sector_result(),
+        ttm=_make_ttm(),
+        inputs=inputs,
+        result=compute_dcf(inputs, scenario="moderate"),
+    )
 
+    with (
+        patch.object(
+            service,
+            "_get_default_state",
+            new_callable=AsyncMock,
+            return_value=("fp", True, None),
+        ),
+        patch.object(
+            service,
+            "_get_default_artifact",
+            new_callable=AsyncMock,
+            return_value=artifact,
+        ),
+        patch.object(service, "_save_valuation", new_callable=AsyncMock) as mock_save,
+    ):
+        standard = await service.get_sensitivity("AAPL")
+
+    saved = mock_save.call_args.kwargs
+    assert saved["is_default"] is True
+    assert saved["fingerprint"] == "fp"
+    assert saved["sensitivity"]["standard"] == standard
+    assert standard["base_value"] == float(artifact.result.value_per_share)
+    assert len(standard["wacc_values"]) == 9
+
+
+async def test_dcf_service_concurrent_default_misses_persist_once():
+    """compute_default and get_sensitivity missing together write one default."""
+    import asyncio
+
+    from app.services.dcf_engine import compute_dcf
+    from app.services.dcf_service import DCFService, ValuationArtifact
 
-@patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_save_requires_auth(mock_sms):
-    """POST /api/dcf/{symbol}/save should require authentication."""
-    from httpx import ASGITransport, AsyncClient
-    from app.main import app
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    inputs = _make_inputs()
+    artifact = ValuationArtifact(
+        fingerprint="fp",
+        sector=_make_sector_result(),
+        ttm=_make_ttm(),
+        inputs=inputs,
+        result=compute_dcf(inputs, scenario="moderate"),
+    )
 
-    async with AsyncClient(
-        transport=ASGITransport(app=app), base_url="http://test"
-    ) as client:
-        resp = await client.post(
-            "/api/dcf/AAPL/save",
-            json={"run_name": "test", "overrides": {}},
+    async def _slow_save(**kwargs):
+        await asyncio.sleep(0.01)
+
+    with (
+        patch.object(
+            service, "_get_stock", new_callable=AsyncMock, return_value=_make_stock()
+        ),
+        patch.object(
+            service,
+            "_get_default_state",
+            new_callable=AsyncMock,
+            return_value=("fp", True, None),
+        ),
+        patch.object(
+            service,
+            "_get_default_artifact",
+            new_callable=AsyncMock,
+            return_value=artifact,
+        ),
+        patch.object(
+            service, "_save_valuation", new_callable=AsyncMock, side_effect=_slow_save
+        ) as mock_save,
+    ):
+        default, standard = await asyncio.gather(
+            service.compute_default("AAPL"), service.get_sensitivity("AAPL")
         )
 
-    assert resp.status_code == 401
-
+    mock_save.assert_awaited_once()
+    assert default["value_per_share"] == standard["base_value"]
 
-@patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_runs_requires_auth(mock_sms):
-    """GET /api/dcf/{symbol}/runs should require authentication."""
-    from httpx import ASGITransport, AsyncClient
-    from app.main import app
-
-    async with AsyncClient(
-        transport=ASGITransport(app=app), base_url="http://test"
-    ) as client:
-        resp = await client.get("/api/dcf/AAPL/runs")
 
-    assert resp.status_code == 401
+def test_default_fingerprint_tracks_every_component():
+    from datetime import date
 
+    from app.services.dcf_service import _default_fingerprint
 
-@patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_delete_requires_auth(mock_sms):
-    """DELETE /api/dcf/{symbol}/runs/1 should require authentication."""
-    from httpx import ASGITransport, AsyncClient
-    from app.main import app
+    components = [
+        date(2024, 6, 30),
+        date(2024, 9, 3),
+        date(2024, 9, 4),
+        7,
+        3,
+        None,
+        None,
+    ]
+    base = _default_fingerprint(*components)
+    assert base == _default_fingerprint(*components)
+    for i in range(len(components)):
+        changed = list(components)
+        changed[i] = "changed"
+        assert _default_fingerprint(*changed) != base
 
-    async with AsyncClient(
-        transport=ASGITransport(app=app), base_url="http://test"
-    ) as client:
-        resp = await client.delete("/api/dcf/AAPL/runs/1")
 
-    assert resp.status_code == 401
+def _mock_default_inputs_session(mock_session, calls=1):
+    """session.execute results for _get_stock, _get_default_state and _build_inputs, in call order."""
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = _make_stock()
+    mock_state_result = MagicMock()
+    mock_state_result.one.return_value = (
+        None,
+        None,
+        None,
+        7,
+        1,
+        None,
+        None,
+        None,
+        None,
+    )
+    mock_rf_result = MagicMock()
+    mock_rf_result.scalar_one_or_none.return_value = Decimal("4.25")
+    mock_price_result = MagicMock()
+    mock_price_result.scalar_one_or_none.return_value = Decimal("175.00")
+    mock_country_result = MagicMock()
+    mock_country_result.scalar_one_or_none.return_value = None
+    mock_session.execute = AsyncMock(
+        side_effect=[
+            mock_stock_result,
+            mock_state_result,
+            mock_rf_result,
+            mock_price_result,
+            mock_country_result,
+        ]
+        * calls
+    )
 
 
 @patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_summary_missing_stock(mock_sms):
-    """GET /api/dcf/{symbol}/summary should return 422 for ineligible stock."""
-    from httpx import ASGITransport, AsyncClient
-    from app.main import app
-    from app.services.dcf_service import DCFEligibilityError
+async def test_dcf_service_compute_custom_reports_stages(mock_sms):
+    """A slider move with a snapshot token skips data gathering and the base year."""
+    from app.services import dcf_service
+    from app.services.dcf_service import DCFService
 
-    with patch("app.routers.dcf.DCFService") as mock_cls:
-        mock_instance = AsyncMock()
-        mock_instance.get_summary = AsyncMock(
-            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    _mock_default_inputs_session(mock_session)
+    mock_sms.get_mapping = AsyncMock(return_value=_make_sector_result())
+    dcf_service._stage_graphs.clear()
+
+    with patch.object(
+        service, "_get_ttm", new_callable=AsyncMock, return_value=_make_ttm()
+    ) as mock_ttm:
+        first = await service.compute_custom("AAPL", {"stable_growth_rate": 0.03})
+        second = await service.compute_custom(
+            "AAPL",
+            {"stable_growth_rate": 0.025},
+            snapshot_token=first["snapshot_token"],
+            stage_token=first["stage_token"],
         )
-        mock_cls.return_value = mock_instance
-
-        async with AsyncClient(
-            transport=ASGITransport(app=app), base_url="http://test"
-        ) as client:
-            resp = await client.get("/api/dcf/FAKE/summary")
 
-    assert resp.status_code == 422
+    # The token skips every query on the second call
+    assert mock_session.execute.await_count == 5
+    assert mock_ttm.await_count == 1
+    assert second["snapshot_token"] == first["snapshot_token"]
+    assert first["stages_run"][0] == "base_year"
+    assert "base_year" not in second["stages_run"]
+    assert second["value_per_share"] != first["value_per_share"]
+    assert second["stage_token"] == first["stage_token"]
 
 
 @patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_sensitivity_missing_stock(mock_sms):
-    """GET /api/dcf/{symbol}/sensitivity should return 422 for ineligible stock."""
-    from httpx import ASGITransport, AsyncClient
-    from app.main import app
-    from app.services.dcf_service import DCFEligibilityError
+async def test_dcf_service_compute_custom_stage_graphs_per_client(mock_sms):
+    """Clients editing the same stock never reuse each other's stages."""
+    from app.services.dcf_service import DCFService
 
-    with patch("app.routers.dcf.DCFService") as mock_cls:
-        mock_instance = AsyncMock()
-        mock_instance.get_sensitivity = AsyncMock(
-            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    _mock_default_inputs_session(mock_session)
+    mock_sms.get_mapping = AsyncMock(return_value=_make_sector_result())
+
+    with patch.object(
+        service, "_get_ttm", new_callable=AsyncMock, return_value=_make_ttm()
+    ):
+        first = await service.compute_custom("AAPL", {"stable_growth_rate": 0.03})
+        token = first["snapshot_token"]
+        other = await service.compute_custom(
+            "AAPL", {"stable_growth_rate": 0.025}, snapshot_token=token
+        )
+        own = await service.compute_custom(
+            "AAPL",
+            {"stable_growth_rate": 0.025},
+            snapshot_token=token,
+            stage_token=first["stage_token"],
+        )
+        connection: dict = {}
+        live = await service.compute_custom(
+            "AAPL", {}, snapshot_token=token, stage_graphs=connection
         )
-        mock_cls.return_value = mock_instance
-
-        async with AsyncClient(
-            transport=ASGITransport(app=app), base_url="http://test"
-        ) as client:
-            resp = await client.get("/api/dcf/FAKE/sensitivity")
 
-    assert resp.status_code == 422
+    assert other["stage_token"] != first["stage_token"]
+    assert other["stages_run"][0] == "base_year"
+    assert "base_year" not in own["stages_run"]
+    assert "stage_token" not in live
+    assert live["stages_run"][0] == "base_year"
+    assert len(connection) == 1
 
 
 @patch("app.services.dcf_service.sector_mapping_service")
-async def test_dcf_sector_context_missing_stock(mock_sms):
-    """GET /api/dcf/{symbol}/sector-context should return 404 for missing stock."""
-    from httpx import ASGITransport, AsyncClient
-    from app.main import app
-    from app.services.dcf_service import DCFEligibilityError
+async def test_dcf_service_compute_custom_stale_token_rebuilds(mock_sms):
+    """An unknown or expired snapshot token falls back to gathering the data."""
+    from app.services.dcf_service import DCFService
 
-    with patch("app.routers.dcf.DCFService") as mock_cls:
-        mock_instance = AsyncMock()
-        mock_instance.get_sector_context = AsyncMock(
-            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    _mock_default_inputs_session(mock_session)
+    mock_sms.get_mapping = AsyncMock(return_value=_make_sector_result())
+
+    with patch.object(
+        service, "_get_ttm", new_callable=AsyncMock, return_value=_make_ttm()
+    ):
+        result = await service.compute_custom(
+            "AAPL", {}, snapshot_token="no-such-token"
         )
-        mock_cls.return_value = mock_instance
-
-        async with AsyncClient(
-            transport=ASGITransport(app=app), base_url="http://test"
-        ) as client:
-            resp = await client.get("/api/dcf/FAKE/sector-context")
 
-    assert resp.status_code == 404
-
-
-# ======================================================================
-# DCF service helper tests
-# ======================================================================
+    assert result["snapshot_token"] != "no-such-token"
+    assert result["value_per_share"] > 0
 
 
-def test_safe_decimal_normal():
-    from app.services.dcf_service import _safe_decimal
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_get_scenarios(mock_sms):
+    """get_scenarios should value every preset from one data-gathering pass."""
+    from app.schemas.dcf import ScenarioComparison
+    from app.services.dcf_service import DCFService
 
-    assert _safe_decimal({"key": "123.45"}, "key") == Decimal("123.45")
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    _mock_default_inputs_session(mock_session)
+    mock_sms.get_mapping = AsyncMock(return_value=_make_sector_result())
+
+    with patch.object(
+        service, "_get_ttm", new_callable=AsyncMock, return_value=_make_ttm()
+    ) as mock_ttm:
+        result = await service.get_scenarios("AAPL")
+
+    mock_ttm.assert_awaited_once()
+    assert mock_session.execute.await_count == 5
+    assert [s["scenario"] for s in result["scenarios"]] == [
+        "conservative",
+        "moderate",
+        "optimistic",
+    ]
+    values = [s["value_per_share"] for s in result["scenarios"]]
+    assert values[0] <= values[1] <= values[2]
+    ScenarioComparison.model_validate(result)
 
 
-def test_safe_decimal_none():
-    from app.services.dcf_service import _safe_decimal
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_run_simulation(mock_sms):
+    """run_simulation should summarize draws around the default valuation."""
+    from app.services.dcf_service import DCFService
 
-    assert _safe_decimal({"key": None}, "key") == Decimal("0")
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    _mock_default_inputs_session(mock_session)
+    mock_sms.get_mapping = AsyncMock(return_value=_make_sector_result())
 
+    with patch.object(
+        service, "_get_ttm", new_callable=AsyncMock, return_value=_make_ttm()
+    ):
+        result = await service.run_simulation("AAPL", draws=1_000, seed=42)
 
-def test_safe_decimal_missing_key():
-    from app.services.dcf_service import _safe_decimal
+    assert result["symbol"] == "AAPL"
+    assert result["draws"] == 1_000
+    assert result["valid_draws"] > 0
+    assert result["current_price"] == 175.0
+    assert result["percentiles"]["p5"] <= result["percentiles"]["p95"]
+    assert result["spreads"]["stable_beta"] == 0.10
 
-    assert _safe_decimal({}, "key") == Decimal("0")
 
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_sensitivity_grid(mock_sms):
+    """get_sensitivity_grid should return one nested row per first-axis value."""
+    from app.services.dcf_service import DCFService
 
-def test_safe_decimal_integer():
-    from app.services.dcf_service import _safe_decimal
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    _mock_default_inputs_session(mock_session)
+    mock_sms.get_mapping = AsyncMock(return_value=_make_sector_result())
 
-    assert _safe_decimal({"key": 42}, "key") == Decimal("42")
+    axes = [
+        {"field": "stable_growth_rate"},
+        {"field": "stable_beta", "min": 0.0, "max": 1.0},
+    ]
+    with patch.object(
+        service, "_get_ttm", new_callable=AsyncMock, return_value=_make_ttm()
+    ):
+        result = await service.get_sensitivity_grid("AAPL", axes, resolution=5)
+
+    assert [axis["field"] for axis in result["axes"]] == [
+        "stable_growth_rate",
+        "stable_beta",
+    ]
+    assert len(result["values"]) == 5
+    assert all(len(row) == 5 for row in result["values"])
+    assert result["values"][0][-1] > 0
+    assert result["base_value"] > 0
 
 
-def test_extract_financials():
-    """_extract_financials should correctly map TTM JSONB keys to DCF fields."""
-    from app.services.dcf_service import DCFService
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_ineligible_financial(mock_sms):
+    """Financial companies should be rejected."""
+    from app.services.dcf_service import DCFService, DCFEligibilityError
 
     mock_session = AsyncMock()
     service = DCFService(mock_session)
 
-    ttm = _make_ttm()
-    fin = service._extract_financials(ttm)
-
+    stock = _make_stock(sector="Financial Services", industry="Banks")
+    sector = _make_sector_result()
+    sector.is_eligible = False
+    sector.rejection_reason = "financial_firm"
+
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = stock
+    mock_session.execute = AsyncMock(return_value=mock_stock_result)
+    mock_sms.get_mapping = AsyncMock(return_value=sector)
+
+    with (
+        patch.object(
+            service,
+            "_get_default_state",
+            new_callable=AsyncMock,
+            return_value=("fp", True, None),
+        ),
+        pytest.raises(DCFEligibilityError) as exc_info,
+    ):
+        await service.compute_default("JPM")
+
+    assert exc_info.value.reason == "financial_firm"
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_missing_stock(mock_sms):
+    """Missing stock should raise eligibility error."""
+    from app.services.dcf_service import DCFService, DCFEligibilityError
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = None
+    mock_session.execute = AsyncMock(return_value=mock_result)
+
+    with pytest.raises(DCFEligibilityError) as exc_info:
+        await service.compute_default("FAKE")
+
+    assert exc_info.value.reason == "missing_stock"
+
+
+async def test_dcf_service_list_runs_selects_summary_columns():
+    """list_runs reads typed summary columns, never the inputs/outputs JSONB."""
+    from datetime import date, datetime
+    from types import SimpleNamespace
+
+    from app.services.dcf_service import DCFService
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = _make_stock()
+    mock_runs_result = MagicMock()
+    mock_runs_result.all.return_value = [
+        SimpleNamespace(
+            id=7,
+            run_name=None,
+            scenario="optimistic",
+            value_per_share=Decimal("201.5000"),
+            implied_upside=Decimal("0.151400"),
+            computed_at=datetime(2024, 7, 1, 12, 0),
+            source_fiscal_date=date(2024, 6, 30),
+        )
+    ]
+    mock_session.execute = AsyncMock(side_effect=[mock_stock_result, mock_runs_result])
+
+    runs = await service.list_runs("AAPL", "user_1")
+
+    statement = mock_session.execute.call_args_list[1].args[0]
+    selected = {column.name for column in statement.selected_columns}
+    assert "outputs" not in selected and "inputs" not in selected
+    assert runs == [
+        {
+            "id": 7,
+            "run_name": "Untitled",
+            "scenario": "optimistic",
+            "value_per_share": 201.5,
+            "implied_upside": 0.1514,
+            "computed_at": "2024-07-01 12:00:00",
+            "source_fiscal_date": "2024-06-30",
+        }
+    ]
+
+
+async def test_dcf_service_compare_runs():
+    """compare_runs aligns projections and attributes from the stored inputs."""
+    from dataclasses import replace
+    from datetime import datetime
+    from types import SimpleNamespace
+
+    from app.services.dcf_engine import compute_dcf
+    from app.services.dcf_outputs import compact_outputs
+    from app.services.dcf_service import DCFService
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    stock = _make_stock()
+
+    base_inputs = _make_inputs()
+    other_inputs = replace(base_inputs, forecast_years=5, stable_beta=Decimal("1.2"))
+
+    def _row(run_id, inputs, compact):
+        outputs = service._format_result(
+            stock, compute_dcf(inputs), "2024-06-30", inputs
+        )
+        return SimpleNamespace(
+            id=run_id,
+            run_name=f"run {run_id}",
+            scenario="custom",
+            value_per_share=Decimal(str(outputs["value_per_share"])),
+            computed_at=datetime(2024, 7, 1),
+            inputs=service._serialize_inputs(inputs),
+            outputs=compact_outputs(outputs) if compact else outputs,
+        )
+
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = stock
+    mock_runs_result = MagicMock()
+    mock_runs_result.all.return_value = [
+        _row(2, other_inputs, compact=False),  # legacy row
+        _row(1, base_inputs, compact=True),
+    ]
+    mock_session.execute = AsyncMock(side_effect=[mock_stock_result, mock_runs_result])
+
+    result = await service.compare_runs("AAPL", [1, 2], "user_1")
+
+    assert [r["id"] for r in result["runs"]] == [1, 2]
+    assert result["years"] == list(range(1, 11))
+    assert result["projections"][1]["fcff"][5:] == [None] * 5
+    (waterfall,) = result["attribution"]
+    assert [s["field"] for s in waterfall["steps"]] == [
+        "forecast_years",
+        "stable_beta",
+    ]
+    assert waterfall["end_value"] == pytest.approx(
+        result["runs"][1]["value_per_share"], abs=0.01
+    )
+    assert waterfall["unknown_fields"] == []
+
+
+async def test_dcf_service_compare_runs_legacy_inputs_unknown():
+    """Drivers a legacy run never stored are reported unknown, not changed."""
+    from dataclasses import replace
+    from datetime import datetime
+    from types import SimpleNamespace
+
+    from app.services.dcf_service import DCFService
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+
+    base_inputs = replace(
+        _make_inputs(),
+        stable_debt_to_equity=Decimal("0.3"),
+        preferred_stock=Decimal("50"),
+    )
+    other_inputs = replace(base_inputs, stable_beta=Decimal("1.2"))
+    # Legacy rows had no stable_debt_to_equity / minority / preferred keys
+    # and stored a zero stable_roc as null
+    legacy = service._serialize_inputs(other_inputs)
+    for key in ("stable_debt_to_equity", "minority_interests", "preferred_stock"):
+        del legacy[key]
+    legacy["stable_roc"] = None
+
+    def _row(run_id, inputs):
+        return SimpleNamespace(
+            id=run_id,
+            run_name=None,
+            scenario="custom",
+            value_per_share=None,
+            computed_at=datetime(2024, 7, 1),
+            inputs=inputs,
+            outputs={},
+        )
+
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = _make_stock()
+    mock_runs_result = MagicMock()
+    mock_runs_result.all.return_value = [
+        _row(1, service._serialize_inputs(base_inputs)),
+        _row(2, legacy),
+    ]
+    mock_session.execute = AsyncMock(side_effect=[mock_stock_result, mock_runs_result])
+
+    result = await service.compare_runs("AAPL", [1, 2], "user_1")
+
+    (waterfall,) = result["attribution"]
+    assert [s["field"] for s in waterfall["steps"]] == ["stable_beta"]
+    assert waterfall["unknown_fields"] == [
+        "minority_interests",
+        "preferred_stock",
+        "stable_debt_to_equity",
+        "stable_growth_rate",
+        "stable_roc",
+    ]
+
+
+async def test_dcf_service_compare_runs_missing_run():
+    """Unknown run ids are reported as not found."""
+    from app.services.dcf_service import DCFEligibilityError, DCFService
+
+    mock_session = AsyncMock()
+    mock_stock_result = MagicMock()
+    mock_stock_result.scalar_one_or_none.return_value = _make_stock()
+    mock_runs_result = MagicMock()
+    mock_runs_result.all.return_value = []
+    mock_session.execute = AsyncMock(side_effect=[mock_stock_result, mock_runs_result])
+
+    with pytest.raises(DCFEligibilityError, match="1, 2"):
+        await DCFService(mock_session).compare_runs("AAPL", [1, 2], "user_1")
+
+
+async def test_dcf_service_export_runs_streams_expanded_records():
+    """export_runs reads through a server-side cursor and expands outputs."""
+    from datetime import datetime
+    from types import SimpleNamespace
+
+    from app.services.dcf_outputs import compact_outputs
+    from app.services.dcf_service import DCFService
+
+    outputs = {
+        "scenario": "custom",
+        "value_per_share": 201.5,
+        "projections": [{"year": 1, "fcff": 100.0}],
+        "equity_bridge": {"enterprise_value": 3_000_000.0},
+    }
+    rows = [
+        SimpleNamespace(
+            id=run_id,
+            symbol="AAPL",
+            run_name=None,
+            scenario=None,
+            is_default=True,
+            computed_at=datetime(2024, 7, 1),
+            source_fiscal_date=None,
+            inputs={"revenue": 1.0},
+            outputs=compact_outputs(outputs),
+        )
+        for run_id in (1, 2)
+    ]
+
+    class _Stream:
+        def __aiter__(self):
+            return self._rows()
+
+        async def _rows(self):
+            for row in rows:
+                yield row
+
+    mock_session = AsyncMock()
+    mock_session.stream = AsyncMock(return_value=_Stream())
+    service = DCFService(mock_session)
+
+    records = [r async for r in service.export_runs(symbols=["aapl"])]
+
+    statement = mock_session.stream.call_args.args[0]
+    assert statement.get_execution_options()["yield_per"] > 0
+    assert ["AAPL"] in statement.compile().params.values()
+    assert [r["run_id"] for r in records] == [1, 2]
+    assert records[0]["projections"][0]["fcff"] == 100.0
+    assert records[0]["scenario"] == "custom"
+    assert "format_version" not in records[0]
+
+
+def test_serialize_inputs_round_trip():
+    """Stored inputs rebuild the same DCFInputs, including zero-valued optionals."""
+    from dataclasses import replace
+
+    from app.services.dcf_service import DCFService
+
+    inputs = replace(
+        _make_inputs(),
+        stable_growth_rate=Decimal("0"),
+        stable_debt_to_equity=Decimal("0.5"),
+        preferred_stock=Decimal("100"),
+    )
+    stored = DCFService._serialize_inputs(inputs)
+    assert stored["stable_growth_rate"] == 0.0
+    assert DCFService._deserialize_inputs(stored) == inputs
+
+
+async def test_dcf_service_save_valuation_fills_summary_columns():
+    """Saved rows carry the headline results in typed columns."""
+    from app.services.dcf_engine import compute_dcf
+    from app.services.dcf_service import DCFService
+
+    mock_session = AsyncMock()
+    mock_session.add = MagicMock()
+    service = DCFService(mock_session)
+
+    inputs = service._assemble_inputs(
+        _make_ttm(),
+        _make_sector_result(),
+        Decimal("175.00"),
+        Decimal("0.0425"),
+        Decimal("0.046"),
+        Decimal("0"),
+    )
+    result = compute_dcf(inputs, scenario="custom")
+
+    valuation = await service._save_valuation(
+        stock=_make_stock(),
+        sector=_make_sector_result(),
+        fiscal_date="2024-06-30",
+        inputs=inputs,
+        result=result,
+        is_default=False,
+        user_id="user_1",
+        run_name="Mine",
+    )
+
+    assert valuation.scenario == "custom"
+    assert valuation.value_per_share == result.value_per_share
+    assert valuation.implied_upside == result.implied_upside
+    assert valuation.wacc == result.wacc
+    assert valuation.terminal_growth == result.terminal_growth
+
+
+async def test_dcf_service_save_defaults_nulls_out_of_range_summary():
+    """A value a summary column cannot hold is stored as NULL, not inserted."""
+    from dataclasses import replace
+
+    from app.services.dcf_engine import compute_dcf
+    from app.services.dcf_service import DCFService
+
+    mock_session = AsyncMock()
+    mock_session.execute = AsyncMock(return_value=MagicMock())
+    service = DCFService(mock_session)
+    inputs = service._assemble_inputs(
+        _make_ttm(),
+        _make_sector_result(),
+        Decimal("175.00"),
+        Decimal("0.0425"),
+        Decimal("0.046"),
+        Decimal("0"),
+    )
+    result = compute_dcf(inputs, scenario="moderate")
+    degenerate = replace(result, value_per_share=3.2e12, implied_upside=float("inf"))
+
+    await service._save_default_valuations(
+        [
+            (_make_stock(), _make_sector_result(), None, inputs, result, {}),
+            (_make_stock(), _make_sector_result(), None, inputs, degenerate, {}),
+        ],
+        {},
+    )
+
+    rows = mock_session.execute.await_args_list[1].args[1]
+    assert rows[0]["value_per_share"] == result.value_per_share
+    assert rows[1]["value_per_share"] is None
+    assert rows[1]["implied_upside"] is None
+    assert rows[1]["wacc"] == result.wacc
+    # The engine's figure is kept in the JSONB outputs
+    assert rows[1]["outputs"]["value_per_share"] == 3.2e12
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_compute_batch(mock_sms):
+    """compute_batch returns one result per item, in order, with item errors."""
+    from app.services.dcf_engine import apply_scenario, compute_dcf
+    from app.services.dcf_service import DCFService
+    from app.services.ttm import TTMService
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+
+    aapl = _make_stock()
+    jpm = _make_stock(symbol="JPM", sector="Financial Services", industry="Banks")
+    jpm.id = 2
+    bank = _make_sector_result()
+    bank.is_eligible = False
+    bank.rejection_reason = "financial_firm"
+
+    mock_stocks_result = MagicMock()
+    mock_stocks_result.scalars.return_value.all.return_value = [aapl, jpm]
+    mock_session.execute = AsyncMock(return_value=mock_stocks_result)
+    mock_sms.get_mappings = AsyncMock(return_value={1: _make_sector_result(), 2: bank})
+
+    items = [
+        {"symbol": "aapl", "overrides": {}, "scenario": "moderate"},
+        {"symbol": "FAKE", "overrides": {}, "scenario": None},
+        {"symbol": "JPM", "overrides": {}, "scenario": None},
+        {"symbol": "AAPL", "overrides": {"stable_growth_rate": 0.02}, "scenario": None},
+    ]
+    with (
+        patch.object(
+            service,
+            "_get_risk_free_rate",
+            new_callable=AsyncMock,
+            return_value=Decimal("0.0425"),
+        ),
+        patch.object(
+            service,
+            "_get_country_risk",
+            new_callable=AsyncMock,
+            return_value=(Decimal("0.046"), Decimal("0")),
+        ),
+        patch.object(
+            TTMService,
+            "compute_ttm_many",
+            new_callable=AsyncMock,
+            return_value={1: _make_ttm()},
+        ) as mock_ttm,
+        patch.object(
+            service,
+            "_get_current_prices",
+            new_callable=AsyncMock,
+            return_value={1: Decimal("175.00")},
+        ),
+    ):
+        results = await service.compute_batch(items)
+
+    # One set-based query per data type, only for eligible stocks
+    assert mock_session.execute.await_count == 1
+    mock_ttm.assert_awaited_once_with([1])
+
+    assert [r["symbol"] for r in results] == ["AAPL", "FAKE", "JPM", "AAPL"]
+    assert results[1]["error"]["reason"] == "missing_stock"
+    assert results[2]["error"]["reason"] == "financial_firm"
+    assert results[3]["scenario"] == "custom"
+    assert results[3]["error"] is None
+
+    sector = _make_sector_result()
+    baseline = service._assemble_inputs(
+        _make_ttm(),
+        sector,
+        Decimal("175.00"),
+        Decimal("0.0425"),
+        Decimal("0.046"),
+        Decimal("0"),
+    )
+    expected = compute_dcf(
+        apply_scenario(
+            baseline,
+            "moderate",
+            sector_avg_reinvestment_rate=sector.avg_roc,
+            sector_avg_roc=sector.avg_roc,
+        )
+    )
+    assert results[0]["value_per_share"] == pytest.approx(
+        float(expected.value_per_share), abs=0.01
+    )
+    assert results[0]["current_price"] == 175.0
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_revalue_universe(mock_sms):
+    """Universe revaluation persists valued stocks and reports the rest."""
+    from app.services.dcf_service import DCFService
+    from app.services.ttm import TTMService
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+
+    aapl = _make_stock()
+    jpm = _make_stock(symbol="JPM", sector="Financial Services", industry="Banks")
+    jpm.id = 2
+    newco = _make_stock(symbol="NEWCO")
+    newco.id = 3
+
+    bank = _make_sector_result()
+    bank.is_eligible = False
+    bank.rejection_reason = "financial_firm"
+
+    mock_stocks_result = MagicMock()
+    mock_stocks_result.scalars.return_value.all.return_value = [aapl, jpm, newco]
+    mock_session.execute = AsyncMock(return_value=mock_stocks_result)
+    mock_sms.get_mappings = AsyncMock(
+        return_value={1: _make_sector_result(), 2: bank, 3: _make_sector_result()}
+    )
+
+    with (
+        patch.object(
+            service,
+            "_get_risk_free_rate",
+            new_callable=AsyncMock,
+            return_value=Decimal("0.0425"),
+        ),
+        patch.object(
+            service,
+            "_get_country_risk",
+            new_callable=AsyncMock,
+            return_value=(Decimal("0.046"), Decimal("0")),
+        ),
+        patch.object(
+            TTMService,
+            "compute_ttm_many",
+            new_callable=AsyncMock,
+            return_value={1: _make_ttm()},
+        ),
+        patch.object(
+            service,
+            "_get_current_prices",
+            new_callable=AsyncMock,
+            return_value={1: Decimal("175.00"), 3: Decimal("10.00")},
+        ),
+        patch.object(
+            service,
+            "_get_default_fingerprints",
+            new_callable=AsyncMock,
+            return_value={1: "fp-1", 2: "fp-2", 3: "fp-3"},
+        ),
+        patch.object(
+            service, "_save_default_valuations", new_callable=AsyncMock
+        ) as mock_save,
+    ):
+        report = await service.revalue_universe(max_workers=1)
+
+    assert report["total"] == 3
+    assert report["valued"] == 1
+    assert report["failed"] == 2
+    assert [(f["symbol"], f["reason"]) for f in report["failures"]] == [
+        ("JPM", "financial_firm"),
+        ("NEWCO", "missing_financials"),
+    ]
+    valued, fingerprints = mock_save.call_args.args
+    assert fingerprints[1] == "fp-1"
+    stock, _, _, _, result, surfaces = valued[0]
+    assert stock is aapl
+    assert result.value_per_share > 0
+    assert surfaces["standard"]["base_value"] == float(result.value_per_share)
+    assert len(surfaces["dense"]["wacc_values"]) == 41
+
+
+async def test_dcf_service_run_default_jobs_uses_given_executor():
+    """Default jobs run in the caller's executor, never a pool of their own."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.services.dcf_service import DCFService
+
+    jobs = [(stock_id, _make_inputs()) for stock_id in range(1, 6)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with patch.object(executor, "submit", wraps=executor.submit) as submit:
+            outcomes = await DCFService._run_default_jobs(jobs, 2, executor)
+
+    # 5 jobs over 2 workers x 4 chunks each -> one job per chunk
+    assert submit.call_count == 5
+    assert [stock_id for stock_id, *_ in outcomes] == [1, 2, 3, 4, 5]
+    assert all(error is None and surfaces for _, _, surfaces, error in outcomes)
+
+
+async def test_dcf_service_run_default_jobs_background_one_chunk_at_a_time():
+    """Without an executor, small chunks run sequentially off the loop."""
+    from app.services import dcf_service
+    from app.services.dcf_service import DCFService
+
+    jobs = [(stock_id, _make_inputs()) for stock_id in range(1, 6)]
+    running = []
+
+    async def _to_thread(func, chunk):
+        assert not running  # never two chunks at once
+        running.append(chunk)
+        try:
+            return func(chunk)
+        finally:
+            running.pop()
+
+    with patch.object(
+        dcf_service.asyncio, "to_thread", side_effect=_to_thread
+    ) as mock_to_thread:
+        outcomes = await DCFService._run_default_jobs(jobs, None)
+
+    sizes = [len(c.args[1]) for c in mock_to_thread.call_args_list]
+    assert sizes == [dcf_service._BACKGROUND_CHUNK_SIZE, 1]
+    assert [stock_id for stock_id, *_ in outcomes] == [1, 2, 3, 4, 5]
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_revalue_stale_defaults(mock_sms):
+    """Stale defaults on current statements reuse their stored inputs."""
+    from dataclasses import replace
+    from datetime import date
+
+    from app.services.dcf_engine import apply_scenario
+    from app.services.dcf_service import DCFService
+    from app.services.ttm import TTMService
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+
+    aapl, msft, newq = (_make_stock(symbol=s) for s in ("AAPL", "MSFT", "NEWQ"))
+    aapl.id, msft.id, newq.id = 1, 2, 3
+    sector = _make_sector_result()
+    stored = apply_scenario(
+        _make_inputs(),
+        "moderate",
+        sector_avg_reinvestment_rate=sector.avg_roc,
+        sector_avg_roc=sector.avg_roc,
+    )
+
+    defaults_result = MagicMock()
+    defaults_result.all.return_value = [
+        (aapl, "old-1", date(2024, 6, 30)),
+        (msft, "fp-2", date(2024, 6, 30)),  # fresh
+        (newq, "old-3", date(2024, 3, 31)),  # newer statements since
+    ]
+    inputs_result = MagicMock()
+    inputs_result.all.return_value = [(1, service._serialize_inputs(stored))]
+    mock_session.execute = AsyncMock(side_effect=[defaults_result, inputs_result])
+    mock_sms.get_mappings = AsyncMock(return_value={1: sector})
+
+    with (
+        patch.object(
+            service,
+            "_get_default_fingerprints",
+            new_callable=AsyncMock,
+            return_value={1: "fp-1", 2: "fp-2", 3: "fp-3"},
+        ),
+        patch.object(
+            service,
+            "_get_latest_fiscal_dates",
+            new_callable=AsyncMock,
+            return_value={1: date(2024, 6, 30), 3: date(2024, 6, 30)},
+        ),
+        patch.object(
+            service,
+            "_get_risk_free_rate",
+            new_callable=AsyncMock,
+            return_value=Decimal("0.05"),
+        ),
+        patch.object(
+            service,
+            "_get_country_risk",
+            new_callable=AsyncMock,
+            return_value=(Decimal("0.046"), Decimal("0")),
+        ),
+        patch.object(
+            service,
+            "_get_current_prices",
+            new_callable=AsyncMock,
+            return_value={1: Decimal("175.00")},
+        ),
+        patch.object(
+            TTMService, "compute_ttm_many", new_callable=AsyncMock
+        ) as mock_ttm,
+        patch.object(
+            service, "_save_default_valuations", new_callable=AsyncMock
+        ) as mock_save,
+        patch.object(
+            service,
+            "revalue_universe",
+            new_callable=AsyncMock,
+            return_value={"valued": 1, "failures": []},
+        ) as mock_rebuild,
+    ):
+        report = await service.revalue_stale_defaults(max_workers=1)
+
+    assert report["checked"] == 3
+    assert report["stale"] == 2
+    assert report["refreshed"] == 1
+    assert report["rebuilt"] == 1
+    mock_ttm.assert_not_awaited()
+    mock_rebuild.assert_awaited_once_with(["NEWQ"], max_workers=1, executor=None)
+
+    valued, fingerprints = mock_save.call_args.args
+    stock, _, fiscal_date, inputs, result, surfaces = valued[0]
+    assert stock is aapl and fiscal_date == "2024-06-30"
+    expected = apply_scenario(
+        replace(stored, risk_free_rate=Decimal("0.05")),
+        "moderate",
+        sector_avg_reinvestment_rate=sector.avg_roc,
+        sector_avg_roc=sector.avg_roc,
+    )
+    assert inputs == expected
+    assert inputs.stable_growth_rate == Decimal("0.04")
+    assert surfaces["standard"]["base_value"] == float(result.value_per_share)
+    assert fingerprints[1] == "fp-1"
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_service_get_history(mock_sms):
+    """Quarter ends use point-in-time TTM; days between move only the price."""
+    from dataclasses import replace
+    from datetime import date, timedelta
+    from types import SimpleNamespace
+
+    from app.services.dcf_engine import apply_scenario, compute_dcf
+    from app.services.dcf_service import DCFService
+    from app.services.financial_facts import normalize_statement
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+    sector = _make_sector_result()
+    mock_sms.get_mapping = AsyncMock(return_value=sector)
+
+    def statement(stmt_type, fiscal_date, data):
+        facts = normalize_statement(stmt_type, data)
+        return SimpleNamespace(
+            statement_type=stmt_type,
+            fiscal_date=fiscal_date,
+            data=data,
+            facts=[SimpleNamespace(fact=k, value=v) for k, v in facts.items()],
+        )
+
+    ttm = _make_ttm()
+    today = date.today()
+    quarter_ends = [today - timedelta(days=91 * k) for k in range(6, 0, -1)]
+    statements = []
+    for n, fiscal_date in enumerate(quarter_ends):
+        growth = 1 + 0.05 * n
+        for stmt_type in ("income", "cash_flow"):
+            data = {k: v * growth / 4 for k, v in ttm[stmt_type].items()}
+            statements.append(statement(stmt_type, fiscal_date, data))
+        statements.append(statement("balance_sheet", fiscal_date, ttm["balance_sheet"]))
+    days = [quarter_ends[0] + timedelta(days=d) for d in range(0, 91 * 6)]
+    rates = [(quarter_ends[0] - timedelta(days=1), Decimal("4.25"))]
+    prices = [(d, Decimal("150") + Decimal(i % 7)) for i, d in enumerate(days)]
+
+    def _result(rows, scalars=False):
+        result = MagicMock()
+        result.all.return_value = rows
+        result.scalars.return_value.all.return_value = rows
+        return result
+
+    stock_result = MagicMock()
+    stock_result.scalar_one_or_none.return_value = _make_stock()
+    mock_session.execute = AsyncMock(
+        side_effect=[
+            stock_result,
+            _result(statements),
+            _result(rates),
+            _result(prices),
+        ]
+    )
+
+    with patch.object(
+        service,
+        "_get_country_risk",
+        new_callable=AsyncMock,
+        return_value=(Decimal("0.046"), Decimal("0")),
+    ):
+        history = await service.get_history("AAPL", years=2)
+
+    # The first three quarters lack a full trailing year
+    assert [q["fiscal_date"] for q in history["quarters"]] == [
+        str(d) for d in quarter_ends[3:]
+    ]
+    last = history["quarters"][-1]
+    price = Decimal(str(last["price"]))
+    expected_ttm = _with_facts(
+        {
+            **ttm,
+            "income": {
+                k: sum(v * (1 + 0.05 * n) / 4 for n in range(2, 6))
+                for k, v in ttm["income"].items()
+            },
+            "cash_flow": {
+                k: sum(v * (1 + 0.05 * n) / 4 for n in range(2, 6))
+                for k, v in ttm["cash_flow"].items()
+            },
+        }
+    )
+    baseline = apply_scenario(
+        service._assemble_inputs(
+            expected_ttm,
+            sector,
+            price,
+            Decimal("0.0425"),
+            Decimal("0.046"),
+            Decimal("0"),
+        ),
+        "moderate",
+        sector_avg_reinvestment_rate=sector.avg_roc,
+        sector_avg_roc=sector.avg_roc,
+    )
+    expected = compute_dcf(baseline, scenario="moderate")
+    assert last["value_per_share"] == pytest.approx(
+        float(expected.value_per_share), abs=0.01
+    )
+
+    daily = history["daily"]
+    assert len(daily["dates"]) == len(daily["value_per_share"]) == len(daily["price"])
+    assert daily["dates"][0] > history["quarters"][0]["fiscal_date"]
+    i = daily["dates"].index(str(quarter_ends[-1] + timedelta(days=3)))
+    moved = compute_dcf(
+        replace(baseline, current_price=Decimal(str(daily["price"][i]))),
+        scenario="moderate",
+    )
+    assert daily["value_per_share"][i] == pytest.approx(
+        float(moved.value_per_share), abs=0.01
+    )
+
+
+async def test_default_revaluator_coalesces_requests():
+    """Requests during a running pass collapse into one follow-up pass."""
+    import asyncio
+
+    from app.services.dcf_revaluation import DefaultRevaluator
+
+    mock_ctx = AsyncMock()
+    mock_ctx.__aenter__ = AsyncMock(return_value=AsyncMock())
+    mock_ctx.__aexit__ = AsyncMock(return_value=False)
+    revaluator = DefaultRevaluator(session_factory=MagicMock(return_value=mock_ctx))
+
+    release = asyncio.Event()
+    report = {
+        "checked": 1,
+        "stale": 1,
+        "refreshed": 1,
+        "rebuilt": 0,
+        "failed": 0,
+        "failures": [],
+        "elapsed_seconds": 0.0,
+    }
+
+    async def _revalue(max_workers=None):
+        await release.wait()
+        return report
+
+    with patch("app.services.dcf_revaluation.DCFService") as mock_cls:
+        mock_cls.return_value.revalue_stale_defaults = AsyncMock(side_effect=_revalue)
+        revaluator.notify("new_dgs10")
+        await asyncio.sleep(0)
+        revaluator.notify("damodaran_update")
+        revaluator.notify("new_dgs10")
+        release.set()
+        await revaluator.wait()
+
+    assert mock_cls.return_value.revalue_stale_defaults.await_count == 2
+    assert revaluator.last_report is report
+
+
+# ======================================================================
+# DCF endpoint tests
+# ======================================================================
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_constraints_endpoint(mock_sms):
+    """GET /api/dcf/constraints should return slider rules."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        resp = await client.get("/api/dcf/constraints")
+
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert "forecast_years" in data
+    assert data["forecast_years"]["min"] == 5
+    assert data["forecast_years"]["max"] == 10
+    assert "stable_growth_rate" in data
+    assert "stable_beta" in data
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_default_missing_stock(mock_sms):
+    """GET /api/dcf/{symbol}/default should return 422 for missing stock."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.compute_default = AsyncMock(
+            side_effect=DCFEligibilityError("missing_stock", "Stock 'FAKE' not found")
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.get("/api/dcf/FAKE/default")
+
+    assert resp.status_code == 422
+    body = resp.json()
+    assert body["detail"]["reason"] == "missing_stock"
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_save_requires_auth(mock_sms):
+    """POST /api/dcf/{symbol}/save should require authentication."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        resp = await client.post(
+            "/api/dcf/AAPL/save",
+            json={"run_name": "test", "overrides": {}},
+        )
+
+    assert resp.status_code == 401
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_runs_requires_auth(mock_sms):
+    """GET /api/dcf/{symbol}/runs should require authentication."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        resp = await client.get("/api/dcf/AAPL/runs")
+
+    assert resp.status_code == 401
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_delete_requires_auth(mock_sms):
+    """DELETE /api/dcf/{symbol}/runs/1 should require authentication."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        resp = await client.delete("/api/dcf/AAPL/runs/1")
+
+    assert resp.status_code == 401
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_summary_missing_stock(mock_sms):
+    """GET /api/dcf/{symbol}/summary should return 422 for ineligible stock."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.get_summary = AsyncMock(
+            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.get("/api/dcf/FAKE/summary")
+
+    assert resp.status_code == 422
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_sensitivity_missing_stock(mock_sms):
+    """GET /api/dcf/{symbol}/sensitivity should return 422 for ineligible stock."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.get_sensitivity = AsyncMock(
+            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.get("/api/dcf/FAKE/sensitivity")
+
+    assert resp.status_code == 422
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_sensitivity_grid_rejects_bad_axes(mock_sms):
+    """POST /api/dcf/{symbol}/sensitivity should validate the requested axes."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        one_axis = await client.post(
+            "/api/dcf/AAPL/sensitivity",
+            json={"axes": [{"field": "stable_beta"}]},
+        )
+        bad_field = await client.post(
+            "/api/dcf/AAPL/sensitivity",
+            json={"axes": [{"field": "revenue"}, {"field": "stable_beta"}]},
+        )
+
+    assert one_axis.status_code == 422
+    assert bad_field.status_code == 422
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_sensitivity_grid_missing_stock(mock_sms):
+    """POST /api/dcf/{symbol}/sensitivity should return 422 for ineligible stock."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.get_sensitivity_grid = AsyncMock(
+            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.post(
+                "/api/dcf/FAKE/sensitivity",
+                json={
+                    "axes": [
+                        {"field": "stable_growth_rate"},
+                        {"field": "risk_free_rate"},
+                    ],
+                    "resolution": 50,
+                },
+            )
+
+    assert resp.status_code == 422
+    assert resp.json()["detail"]["reason"] == "missing_stock"
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_scenarios_rejects_unknown_scenario(mock_sms):
+    """GET /api/dcf/{symbol}/scenarios should validate scenario names."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        resp = await client.get("/api/dcf/AAPL/scenarios?scenarios=moderate,wild")
+
+    assert resp.status_code == 422
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_implied_no_solution(mock_sms):
+    """GET /api/dcf/{symbol}/implied should return 422 when no root exists."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.get_implied = AsyncMock(
+            side_effect=DCFEligibilityError("no_solution", "No stable_roc found")
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.get("/api/dcf/AAPL/implied?solve_for=stable_roc")
+            bad = await client.get("/api/dcf/AAPL/implied?solve_for=revenue")
+
+    assert resp.status_code == 422
+    assert resp.json()["detail"]["reason"] == "no_solution"
+    assert bad.status_code == 422
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_compute_passes_snapshot_token(mock_sms):
+    """POST /api/dcf/{symbol}/compute forwards the token, not as an override."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.compute_custom = AsyncMock(return_value={"snapshot_token": "t"})
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.post(
+                "/api/dcf/AAPL/compute",
+                json={"stable_growth_rate": 0.02, "snapshot_token": "t"},
+            )
+
+    assert resp.status_code == 200
+    kwargs = mock_instance.compute_custom.call_args.kwargs
+    assert kwargs["snapshot_token"] == "t"
+    assert kwargs["overrides"] == {"stable_growth_rate": 0.02}
+
+
+def _fake_live_compute(
+    symbol, overrides, scenario=None, snapshot_token=None, stage_graphs=None
+):
+    growth = overrides.get("stable_growth_rate", 0.03)
+    return {
+        "symbol": symbol,
+        "value_per_share": round(100 + 1000 * growth, 2),
+        "terminal": {"terminal_growth": growth},
+        "wacc": 0.09,
+        "snapshot_token": "t",
+    }
+
+
+def test_dcf_live_streams_deltas():
+    """WS /api/dcf/{symbol}/live pushes the full result, then only changes."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = MagicMock()
+        mock_instance.compute_custom = AsyncMock(side_effect=_fake_live_compute)
+        mock_cls.return_value = mock_instance
+
+        with TestClient(app).websocket_connect("/api/dcf/AAPL/live") as ws:
+            first = ws.receive_json()
+            ws.send_json({"stable_growth_rate": 0.02})
+            delta = ws.receive_json()
+            ws.send_json({"stable_beta": "not a number"})
+            error = ws.receive_json()
+            ws.send_text("{not json")
+            malformed = ws.receive_json()
+            ws.send_json({"stable_beta": 1.1})
+            unchanged = ws.receive_json()
+
+    assert first["type"] == "valuation"
+    assert first["data"]["value_per_share"] == 130.0
+    assert delta == {
+        "type": "delta",
+        "data": {"value_per_share": 120.0, "terminal": {"terminal_growth": 0.02}},
+    }
+    assert error["reason"] == "invalid_overrides"
+    assert malformed["reason"] == "invalid_overrides"
+    assert malformed["detail"][0]["type"] == "json_invalid"
+    # Partial messages accumulate and the token is reused after the first push
+    assert unchanged == {"type": "delta", "data": {}}
+    kwargs = mock_instance.compute_custom.call_args.kwargs
+    assert kwargs["overrides"] == {"stable_growth_rate": 0.02, "stable_beta": 1.1}
+    assert kwargs["snapshot_token"] == "t"
+
+
+def test_dcf_live_push_failure_closes():
+    """WS /api/dcf/{symbol}/live closes with 1011 if a push fails unexpectedly."""
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+    from app.main import app
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = MagicMock()
+        mock_instance.compute_custom = AsyncMock(
+            side_effect=[_fake_live_compute("AAPL", {}), RuntimeError("boom")]
+        )
+        mock_cls.return_value = mock_instance
+
+        with TestClient(app).websocket_connect("/api/dcf/AAPL/live") as ws:
+            ws.receive_json()
+            ws.send_json({"stable_growth_rate": 0.02})
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                ws.receive_json()
+
+    assert exc_info.value.code == 1011
+
+
+def test_dcf_live_ineligible_stock_closes():
+    """WS /api/dcf/{symbol}/live reports eligibility errors and closes."""
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = MagicMock()
+        mock_instance.compute_custom = AsyncMock(
+            side_effect=DCFEligibilityError("financial_firm", "Banks")
+        )
+        mock_cls.return_value = mock_instance
+
+        with TestClient(app).websocket_connect("/api/dcf/JPM/live") as ws:
+            message = ws.receive_json()
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                ws.receive_json()
+
+    assert message == {"type": "error", "reason": "financial_firm", "detail": "Banks"}
+    assert exc_info.value.code == 1008
+
+
+async def test_dcf_batch_endpoint():
+    """POST /api/dcf/batch validates item count and returns results in order."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.compute_batch = AsyncMock(
+            return_value=[
+                {"symbol": "MSFT", "scenario": "custom", "value_per_share": 300.0},
+                {
+                    "symbol": "FAKE",
+                    "scenario": "custom",
+                    "error": {"reason": "missing_stock", "detail": "not found"},
+                },
+            ]
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            empty = await client.post("/api/dcf/batch", json={"items": []})
+            resp = await client.post(
+                "/api/dcf/batch",
+                json={
+                    "items": [
+                        {"symbol": "MSFT", "overrides": {"stable_beta": 1.1}},
+                        {"symbol": "FAKE"},
+                    ]
+                },
+            )
+
+    assert empty.status_code == 422
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert [d["symbol"] for d in data] == ["MSFT", "FAKE"]
+    assert data[1]["error"]["reason"] == "missing_stock"
+    sent = mock_instance.compute_batch.call_args.args[0]
+    assert sent[0]["overrides"] == {"stable_beta": 1.1}
+
+
+async def test_dcf_compare_runs_endpoint():
+    """GET /runs/compare validates ids and is not shadowed by /runs/{run_id}."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    headers = {"X-User-Id": "user_1"}
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.compare_runs = AsyncMock(
+            return_value={
+                "symbol": "AAPL",
+                "runs": [],
+                "years": [],
+                "projections": [],
+                "attribution": [],
+            }
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            single = await client.get(
+                "/api/dcf/AAPL/runs/compare?ids=1", headers=headers
+            )
+            bad = await client.get(
+                "/api/dcf/AAPL/runs/compare?ids=1,x", headers=headers
+            )
+            resp = await client.get(
+                "/api/dcf/AAPL/runs/compare?ids=3,1", headers=headers
+            )
+
+    assert single.status_code == 422
+    assert bad.status_code == 422
+    assert resp.status_code == 200
+    assert mock_instance.compare_runs.call_args.args == ("AAPL", [3, 1], "user_1")
+
+
+async def test_dcf_export_runs_endpoint():
+    """GET /api/dcf/runs/export streams records; saved runs require auth."""
+    import json
+
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+
+    async def _export(symbols, user_id):
+        yield {"run_id": 1, "symbol": "AAPL", "user": user_id, "symbols": symbols}
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_cls.return_value.export_runs = _export
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            anonymous = await client.get("/api/dcf/runs/export")
+            bad_format = await client.get(
+                "/api/dcf/runs/export?scope=default&format=xml"
+            )
+            resp = await client.get(
+                "/api/dcf/runs/export?scope=default&format=jsonl&symbols=aapl, msft"
+            )
+
+    assert anonymous.status_code == 401
+    assert bad_format.status_code == 422
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert json.loads(resp.text) == {
+        "run_id": 1,
+        "symbol": "AAPL",
+        "user": None,
+        "symbols": ["AAPL", "MSFT"],
+    }
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_tornado_missing_stock(mock_sms):
+    """GET /api/dcf/{symbol}/tornado should return 422 for ineligible stock."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.get_tornado = AsyncMock(
+            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.get("/api/dcf/FAKE/tornado?shock=0.1")
+
+    assert resp.status_code == 422
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_simulation_missing_stock(mock_sms):
+    """GET /api/dcf/{symbol}/simulation should return 422 for ineligible stock."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.run_simulation = AsyncMock(
+            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.get("/api/dcf/FAKE/simulation")
+
+    assert resp.status_code == 422
+
+
+@patch("app.services.dcf_service.sector_mapping_service")
+async def test_dcf_sector_context_missing_stock(mock_sms):
+    """GET /api/dcf/{symbol}/sector-context should return 404 for missing stock."""
+    from httpx import ASGITransport, AsyncClient
+    from app.main import app
+    from app.services.dcf_service import DCFEligibilityError
+
+    with patch("app.routers.dcf.DCFService") as mock_cls:
+        mock_instance = AsyncMock()
+        mock_instance.get_sector_context = AsyncMock(
+            side_effect=DCFEligibilityError("missing_stock", "Stock not found")
+        )
+        mock_cls.return_value = mock_instance
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.get("/api/dcf/FAKE/sector-context")
+
+    assert resp.status_code == 404
+
+
+# ======================================================================
+# DCF service helper tests
+# ======================================================================
+
+
+def test_extract_financials():
+    """_extract_financials should correctly map TTM facts to DCF fields."""
+    from app.services.dcf_service import DCFService
+
+    mock_session = AsyncMock()
+    service = DCFService(mock_session)
+
+    ttm = _make_ttm()
+    fin = service._extract_financials(ttm)
+
     assert fin["revenue"] == Decimal("400000")
     assert fin["ebit"] == Decimal("120000")
     assert fin["total_debt"] == Decimal("110000")
@@ -622,7 +2321,7 @@ def test_extract_financials():
 
 
 def test_extract_financials_alternative_keys():
-    """Should handle alternative key names in JSONB data."""
+    """Alternative JSONB key names resolve to the same facts at ingest."""
     from app.services.dcf_service import DCFService
 
     mock_session = AsyncMock()
@@ -651,7 +2350,7 @@ def test_extract_financials_alternative_keys():
         },
     }
 
-    fin = service._extract_financials(ttm)
+    fin = service._extract_financials(_with_facts(ttm))
     assert fin["ebit"] == Decimal("20000")
     assert fin["total_debt"] == Decimal("20000")  # 5000 + 15000
     assert fin["cash"] == Decimal("10000")
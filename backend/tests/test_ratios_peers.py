@@ -13,6 +13,7 @@ from httpx import ASGITransport, AsyncClient
 
 from app.main import app
 from app.database import get_session
+from app.services.financial_facts import normalize_statement, ttm_facts
 from app.services.ratios import compute_ratios
 
 
@@ -80,37 +81,50 @@ def _session_override(mock_db):
     return _override
 
 
+def _with_facts(ttm):
+    """Add the canonical facts TTMService derives from the raw statements."""
+    ttm["facts"] = ttm_facts(
+        {
+            stmt_type: [normalize_statement(stmt_type, ttm.get(stmt_type, {}))]
+            for stmt_type in ("income", "balance_sheet", "cash_flow")
+        }
+    )
+    return ttm
+
+
 def _make_ttm_data():
     """Create a realistic TTM dataset for ratio computation."""
-    return {
-        "income": {
-            "revenue": 400000,
-            "cost_of_revenue": 220000,
-            "gross_profit": 180000,
-            "operating_income": 120000,
-            "net_income": 95000,
-            "interest_expense": 5000,
-            "income_before_tax": 115000,
-            "income_tax_expense": 20000,
-        },
-        "balance_sheet": {
-            "total_assets": 350000,
-            "total_shareholders_equity": 80000,
-            "total_debt": 110000,
-            "current_assets": 140000,
-            "current_liabilities": 120000,
-            "inventory": 10000,
-            "cash_and_cash_equivalents": 50000,
-            "shares_outstanding": 15000,
-        },
-        "cash_flow": {
-            "depreciation_and_amortization": 8000,
-            "capital_expenditure": -12000,
-        },
-        "quarters_used": 4,
-        "period_start": "2024-03-31",
-        "period_end": "2024-12-31",
-    }
+    return _with_facts(
+        {
+            "income": {
+                "revenue": 400000,
+                "cost_of_revenue": 220000,
+                "gross_profit": 180000,
+                "operating_income": 120000,
+                "net_income": 95000,
+                "interest_expense": 5000,
+                "income_before_tax": 115000,
+                "income_tax_expense": 20000,
+            },
+            "balance_sheet": {
+                "total_assets": 350000,
+                "total_shareholders_equity": 80000,
+                "total_debt": 110000,
+                "current_assets": 140000,
+                "current_liabilities": 120000,
+                "inventory": 10000,
+                "cash_and_cash_equivalents": 50000,
+                "shares_outstanding": 15000,
+            },
+            "cash_flow": {
+                "depreciation_and_amortization": 8000,
+                "capital_expenditure": -12000,
+            },
+            "quarters_used": 4,
+            "period_start": "2024-03-31",
+            "period_end": "2024-12-31",
+        }
+    )
 
 
 # ======================================================================
@@ -172,7 +186,7 @@ def test_compute_ratios_missing_inputs_returns_null():
         "balance_sheet": {},
         "cash_flow": {},
     }
-    ratios = compute_ratios(ttm)
+    ratios = compute_ratios(_with_facts(ttm))
 
     # Net margin should work (revenue + net_income available)
     assert ratios["net_margin"] is not None
@@ -217,7 +231,7 @@ def test_compute_ratios_zero_denominator():
         },
         "cash_flow": {},
     }
-    ratios = compute_ratios(ttm)
+    ratios = compute_ratios(_with_facts(ttm))
 
     assert ratios["gross_margin"] is None
     assert ratios["operating_margin"] is None
@@ -237,7 +251,7 @@ def test_compute_ratios_derives_gross_profit_from_cogs():
         "balance_sheet": {},
         "cash_flow": {},
     }
-    ratios = compute_ratios(ttm)
+    ratios = compute_ratios(_with_facts(ttm))
     assert ratios["gross_margin"] is not None
     assert abs(ratios["gross_margin"] - 0.4) < 0.001
 
@@ -254,7 +268,7 @@ def test_compute_ratios_alternative_balance_sheet_keys():
         },
         "cash_flow": {},
     }
-    ratios = compute_ratios(ttm)
+    ratios = compute_ratios(_with_facts(ttm))
     assert ratios["roe"] is not None
     assert abs(ratios["roe"] - 10000 / 50000) < 0.001
     assert ratios["debt_to_equity"] is not None
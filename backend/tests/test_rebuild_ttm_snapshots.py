@@ -0,0 +1,31 @@
+"""Tests for the TTM snapshot backfill script."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from scripts.rebuild_ttm_snapshots import rebuild_snapshots
+
+
+@pytest.mark.asyncio
+async def test_rebuilds_in_batches():
+    session = AsyncMock()
+    session.expunge_all = MagicMock()
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = [1, 2, 3, 4, 5]
+    session.execute.return_value = mock_result
+
+    async def _compute(stock_ids):
+        # Stock 5 has no usable quarters
+        return {stock_id: {} for stock_id in stock_ids if stock_id != 5}
+
+    with patch(
+        "scripts.rebuild_ttm_snapshots.TTMService.compute_ttm_many",
+        new_callable=AsyncMock,
+        side_effect=_compute,
+    ) as mock_compute:
+        result = await rebuild_snapshots(session, batch_size=2)
+
+    assert result == {"stocks": 5, "snapshots": 4}
+    assert [c.args[0] for c in mock_compute.await_args_list] == [[1, 2], [3, 4], [5]]
+    assert session.expunge_all.call_count == 3
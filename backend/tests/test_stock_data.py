@@ -1,6 +1,7 @@
 """Tests for StockDataService — the stock data pipeline orchestrator."""
 
 from datetime import date, datetime
+from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock, patch
 
 
@@ -216,6 +217,47 @@ class TestFetchFinancials:
         # Only the row with fiscal_date was upserted: 1 row x 2 periods = 2
         assert total == 2
 
+    async def test_upsert_writes_canonical_facts(self):
+        """Each upserted row's aliases are resolved once into financial_facts."""
+        session = _mock_session()
+        upserted = MagicMock()
+        upserted.scalar_one.side_effect = [10, 11]
+        session.execute = AsyncMock(return_value=upserted)
+        service = StockDataService(_mock_client(), session)
+
+        rows = [
+            {"fiscal_date": "2024-09-30", "ebit": "250", "currency": "USD"},
+            {"fiscal_date": "2024-06-30", "operating_income": "200"},
+        ]
+        count = await service._upsert_financial_statements(1, "income", "annual", rows)
+
+        assert count == 2
+        statements = [str(c.args[0]) for c in session.execute.call_args_list]
+        assert statements[2].startswith("DELETE FROM financial_facts")
+        assert statements[3].startswith("INSERT INTO financial_facts")
+        assert session.execute.call_args_list[3].args[1] == [
+            {"statement_id": 10, "fact": "operating_income", "value": Decimal("250.0")},
+            {"statement_id": 11, "fact": "operating_income", "value": Decimal("200.0")},
+        ]
+
+    async def test_quarterly_upsert_rebuilds_ttm_snapshot(self):
+        """Quarterly upserts rebuild the cached TTM before committing."""
+        client = _mock_client()
+        session = _mock_session()
+        sample_row = [{"fiscal_date": "2024-09-30", "revenue": "100"}]
+        client.get_income_statement = AsyncMock(return_value=sample_row)
+        client.get_balance_sheet = AsyncMock(return_value=[])
+        client.get_cash_flow = AsyncMock(return_value=[])
+        session.execute = AsyncMock(return_value=MagicMock())
+
+        service = StockDataService(client, session)
+        with patch("app.services.stock_data.TTMService") as MockTTM:
+            MockTTM.return_value.rebuild_snapshot = AsyncMock()
+            await service.fetch_financials(1, "AAPL")
+
+        # income/annual does not touch TTM; income/quarterly rebuilds once
+        MockTTM.return_value.rebuild_snapshot.assert_awaited_once_with(1)
+
 
 # ------------------------------------------------------------------
 # fetch_price_history
@@ -498,8 +540,13 @@ class TestFetchSplits:
 
         client.get_splits = AsyncMock(
             return_value=[
-                {"date": "2020-08-31", "from_factor": "4", "to_factor": "1",
-                 "description": "4-for-1 split", "ratio": 0.25},
+                {
+                    "date": "2020-08-31",
+                    "from_factor": "4",
+                    "to_factor": "1",
+                    "description": "4-for-1 split",
+                    "ratio": 0.25,
+                },
             ]
         )
 
@@ -1,8 +1,9 @@
 from datetime import date
 from unittest.mock import AsyncMock, MagicMock
 
+import pytest
 
-from app.services.ttm import TTMService, _to_float
+from app.services.ttm import TTMService
 
 
 def _make_session():
@@ -18,43 +19,27 @@ def _make_statement(fiscal_date, data: dict):
     return stmt
 
 
+def _uncached(service):
+    """Stub out the ttm_snapshots cache: every read misses, writes are recorded."""
+    service._load_snapshots = AsyncMock(return_value={})
+    service._fill_snapshots = AsyncMock()
+    return service
+
+
 def _mock_fetch_quarters(income=None, balance_sheet=None, cash_flow=None):
-    """Return an AsyncMock side_effect for _fetch_quarters that maps statement_type to data."""
+    """Return an AsyncMock side_effect for _fetch_latest_quarters keyed by statement_type."""
     mapping = {
         "income": income or [],
         "balance_sheet": balance_sheet or [],
         "cash_flow": cash_flow or [],
     }
 
-    async def _side_effect(stock_id, statement_type, limit=4):
-        return mapping.get(statement_type, [])
+    async def _side_effect(stock_id, limit=4):
+        return {k: v for k, v in mapping.items() if v}
 
     return _side_effect
 
 
-# ---------- _to_float ----------
-
-
-async def test_to_float_int():
-    assert _to_float(5) == 5.0
-
-
-async def test_to_float_float():
-    assert _to_float(3.14) == 3.14
-
-
-async def test_to_float_numeric_string():
-    assert _to_float("1234") == 1234.0
-
-
-async def test_to_float_non_numeric_string():
-    assert _to_float("hello") is None
-
-
-async def test_to_float_none():
-    assert _to_float(None) is None
-
-
 # ---------- _sum_numeric_fields ----------
 
 
@@ -123,7 +108,7 @@ async def test_sum_numeric_fields_empty():
 async def test_compute_ttm_with_4_quarters():
     """Full TTM: income and cash_flow summed, balance_sheet latest only."""
     session = _make_session()
-    service = TTMService(session)
+    service = _uncached(TTMService(session))
 
     income_stmts = [
         _make_statement(
@@ -174,7 +159,7 @@ async def test_compute_ttm_with_4_quarters():
         ),
     ]
 
-    service._fetch_quarters = AsyncMock(
+    service._fetch_latest_quarters = AsyncMock(
         side_effect=_mock_fetch_quarters(
             income=income_stmts,
             balance_sheet=bs_stmts,
@@ -208,14 +193,14 @@ async def test_compute_ttm_with_4_quarters():
 async def test_compute_ttm_fewer_than_4_quarters():
     """When only 2 quarters exist, quarters_used reflects that."""
     session = _make_session()
-    service = TTMService(session)
+    service = _uncached(TTMService(session))
 
     income_stmts = [
         _make_statement(date(2024, 6, 30), {"revenue": "4000"}),
         _make_statement(date(2024, 3, 31), {"revenue": "3000"}),
     ]
 
-    service._fetch_quarters = AsyncMock(
+    service._fetch_latest_quarters = AsyncMock(
         side_effect=_mock_fetch_quarters(income=income_stmts)
     )
 
@@ -231,9 +216,9 @@ async def test_compute_ttm_fewer_than_4_quarters():
 async def test_compute_ttm_no_data_returns_none():
     """When no quarterly data exists, compute_ttm returns None."""
     session = _make_session()
-    service = TTMService(session)
+    service = _uncached(TTMService(session))
 
-    service._fetch_quarters = AsyncMock(side_effect=_mock_fetch_quarters())
+    service._fetch_latest_quarters = AsyncMock(side_effect=_mock_fetch_quarters())
 
     result = await service.compute_ttm(stock_id=1)
 
@@ -243,7 +228,7 @@ async def test_compute_ttm_no_data_returns_none():
 async def test_balance_sheet_uses_latest_quarter_only():
     """Balance sheet data should come from index 0 only, not be summed."""
     session = _make_session()
-    service = TTMService(session)
+    service = _uncached(TTMService(session))
 
     bs_stmts = [
         _make_statement(date(2024, 6, 30), {"total_assets": "50000", "cash": "5000"}),
@@ -252,7 +237,7 @@ async def test_balance_sheet_uses_latest_quarter_only():
         _make_statement(date(2023, 9, 30), {"total_assets": "44000", "cash": "2000"}),
     ]
 
-    service._fetch_quarters = AsyncMock(
+    service._fetch_latest_quarters = AsyncMock(
         side_effect=_mock_fetch_quarters(balance_sheet=bs_stmts)
     )
 
@@ -264,3 +249,256 @@ async def test_balance_sheet_uses_latest_quarter_only():
     assert result["balance_sheet"]["cash"] == "5000"
     # Verify these are NOT the summed values (188000 and 14000)
     assert result["balance_sheet"]["total_assets"] != "188000"
+
+
+# ---------- _fetch_latest_quarters ----------
+
+
+async def test_fetch_latest_quarters_single_query():
+    """All statement types come back from one windowed query, grouped by type."""
+    session = _make_session()
+    service = TTMService(session)
+
+    rows = []
+    for stmt_type, fiscal_date in [
+        ("balance_sheet", date(2024, 6, 30)),
+        ("cash_flow", date(2024, 6, 30)),
+        ("income", date(2024, 6, 30)),
+        ("income", date(2024, 3, 31)),
+    ]:
+        row = _make_statement(fiscal_date, {})
+        row.stock_id = 1
+        row.statement_type = stmt_type
+        rows.append(row)
+
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    session.execute = AsyncMock(return_value=result)
+
+    quarters = await service._fetch_latest_quarters(stock_id=1)
+
+    session.execute.assert_awaited_once()
+    sql = str(session.execute.call_args.args[0])
+    assert "row_number() OVER (PARTITION BY financial_statements.stock_id" in sql
+    stmt = session.execute.call_args.args[0]
+    assert stmt.get_execution_options()["populate_existing"] is True
+    assert [s.fiscal_date for s in quarters["income"]] == [
+        date(2024, 6, 30),
+        date(2024, 3, 31),
+    ]
+    assert len(quarters["balance_sheet"]) == len(quarters["cash_flow"]) == 1
+
+
+# ---------- compute_ttm_many ----------
+
+
+async def test_compute_ttm_many_groups_by_stock():
+    """One query for every stock; each stock aggregated like compute_ttm."""
+    session = _make_session()
+    service = _uncached(TTMService(session))
+
+    rows = []
+    for stock_id, stmt_type, fiscal_date, revenue in [
+        (1, "income", date(2024, 6, 30), "400"),
+        (1, "income", date(2024, 3, 31), "300"),
+        (2, "balance_sheet", date(2024, 6, 30), None),
+        (2, "income", date(2024, 6, 30), "50"),
+    ]:
+        row = _make_statement(fiscal_date, {"revenue": revenue} if revenue else {})
+        row.stock_id = stock_id
+        row.statement_type = stmt_type
+        rows.append(row)
+
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    session.execute = AsyncMock(return_value=result)
+
+    snapshots = await service.compute_ttm_many([1, 2, 3])
+
+    session.execute.assert_awaited_once()
+    assert set(snapshots) == {1, 2}
+    assert snapshots[1]["income"]["revenue"] == 700
+    assert snapshots[1]["quarters_used"] == 2
+    assert snapshots[2]["income"]["revenue"] == 50
+    assert snapshots[2]["balance_sheet"] == {}
+
+
+async def test_compute_ttm_many_empty_skips_query():
+    session = _make_session()
+    assert await TTMService(session).compute_ttm_many([]) == {}
+    session.execute.assert_not_awaited()
+
+
+# ---------- ttm_snapshots cache ----------
+
+
+async def test_compute_ttm_cache_hit_skips_statements():
+    session = _make_session()
+    service = TTMService(session)
+    cached = {"income": {"revenue": 10}, "quarters_used": 4}
+    service._load_snapshots = AsyncMock(return_value={1: cached})
+    service._fetch_latest_quarters = AsyncMock()
+
+    assert await service.compute_ttm(stock_id=1) is cached
+    service._fetch_latest_quarters.assert_not_awaited()
+    session.commit.assert_not_awaited()
+
+
+async def test_compute_ttm_miss_stores_snapshot():
+    session = _make_session()
+    service = _uncached(TTMService(session))
+    income = [_make_statement(date(2024, 6, 30), {"revenue": "4000"})]
+    service._fetch_latest_quarters = AsyncMock(
+        side_effect=_mock_fetch_quarters(income=income)
+    )
+
+    result = await service.compute_ttm(stock_id=1)
+
+    stored = service._fill_snapshots.call_args.args[0]
+    assert stored[1] == ({"income": income}, result)
+    # The caller's transaction is never committed
+    session.commit.assert_not_awaited()
+
+
+async def test_compute_ttm_many_only_builds_misses():
+    session = _make_session()
+    service = TTMService(session)
+    service._load_snapshots = AsyncMock(return_value={1: {"quarters_used": 4}})
+    service._fill_snapshots = AsyncMock()
+    income = [_make_statement(date(2024, 6, 30), {"revenue": "50"})]
+    service._fetch_latest_quarters_many = AsyncMock(
+        return_value={2: {"income": income}}
+    )
+
+    snapshots = await service.compute_ttm_many([1, 2])
+
+    service._fetch_latest_quarters_many.assert_awaited_once_with([2])
+    assert snapshots[1] == {"quarters_used": 4}
+    assert snapshots[2]["income"]["revenue"] == 50
+    assert set(service._fill_snapshots.call_args.args[0]) == {2}
+    session.commit.assert_not_awaited()
+
+
+async def test_load_snapshots_checks_latest_dates():
+    """Snapshots are served only while they match the latest quarter per type."""
+    session = _make_session()
+    session.execute = AsyncMock(return_value=MagicMock(all=lambda: []))
+
+    await TTMService(session)._load_snapshots([1, 2])
+
+    sql = str(session.execute.call_args.args[0])
+    assert "max(financial_statements.fiscal_date) FILTER" in sql
+    for column in ("income_date", "balance_sheet_date", "cash_flow_date"):
+        assert f"ttm_snapshots.{column} IS NOT DISTINCT FROM" in sql
+
+
+async def test_fill_snapshots_commits_own_transaction():
+    """Read-path fills commit a separate session, not the caller's."""
+    session = _make_session()
+    fill_session = _make_session()
+    factory = MagicMock()
+    factory.return_value.__aenter__.return_value = fill_session
+    service = TTMService(session, session_factory=factory)
+    income = [_make_statement(date(2024, 6, 30), {})]
+
+    await service._fill_snapshots({1: ({"income": income}, {"quarters_used": 1})})
+
+    assert "INSERT INTO ttm_snapshots" in str(fill_session.execute.call_args.args[0])
+    fill_session.commit.assert_awaited_once()
+    session.execute.assert_not_awaited()
+    session.commit.assert_not_awaited()
+
+
+async def test_store_snapshots_sql():
+    """Read-path fills replace only stale rows; ingest rebuilds always upsert."""
+    session = _make_session()
+    service = TTMService(session)
+    income = [_make_statement(date(2024, 6, 30), {})]
+    built = {1: ({"income": income}, {"quarters_used": 1})}
+
+    await service._store_snapshots(built)
+    await service._store_snapshots(built, replace=True)
+
+    fill, rebuild = [str(c.args[0]) for c in session.execute.call_args_list]
+    assert "ON CONFLICT (stock_id) DO UPDATE" in fill
+    assert "WHERE excluded.income_date IS DISTINCT FROM" in fill
+    assert "ON CONFLICT (stock_id) DO UPDATE" in rebuild
+    assert "IS DISTINCT FROM" not in rebuild
+
+
+async def test_rebuild_snapshot_replaces_or_deletes():
+    session = _make_session()
+    service = TTMService(session)
+    service._store_snapshots = AsyncMock()
+    income = [_make_statement(date(2024, 6, 30), {"revenue": "4000"})]
+    service._fetch_latest_quarters = AsyncMock(return_value={"income": income})
+
+    ttm = await service.rebuild_snapshot(1)
+    assert ttm["income"]["revenue"] == 4000
+    assert service._store_snapshots.call_args.kwargs == {"replace": True}
+
+    service._fetch_latest_quarters = AsyncMock(return_value={})
+    assert await service.rebuild_snapshot(1) is None
+    assert "DELETE FROM ttm_snapshots" in str(session.execute.call_args.args[0])
+    session.commit.assert_not_awaited()
+
+
+# ---------- build_ttm_history ----------
+
+
+def _quarters(stmt_type, rows):
+    out = []
+    for fiscal_date, data in rows:
+        stmt = _make_statement(fiscal_date, data)
+        stmt.statement_type = stmt_type
+        out.append(stmt)
+    return out
+
+
+async def test_build_ttm_history_matches_window_sums():
+    """Every window equals _sum_numeric_fields over the same four quarters."""
+    dates = [date(2022 + m // 12, m % 12 + 1, 28) for m in range(0, 27, 3)]
+    rows = [
+        (d, {"revenue": str(1000 + 100 * i), "ebit": 10.5 * i, "currency": "USD"})
+        for i, d in enumerate(dates)
+    ]
+    rows[5][1]["ebit"] = None
+    income = _quarters("income", rows)
+
+    history = TTMService.build_ttm_history({"income": income})
+    series = history["income"]
+
+    assert len(series["period_end"]) == len(dates) - 3
+    assert series["period_start"][0] == str(dates[0])
+    assert series["period_end"][-1] == str(dates[-1])
+    assert "currency" not in series["fields"]
+    for w in range(len(dates) - 3):
+        window = [s.data for s in reversed(income[w : w + 4])]
+        expected = TTMService._sum_numeric_fields(window)
+        assert series["fields"]["revenue"][w] == expected["revenue"]
+        assert series["fields"]["ebit"][w] == pytest.approx(expected["ebit"])
+    assert history["cash_flow"] == {"period_start": [], "period_end": [], "fields": {}}
+
+
+async def test_build_ttm_history_field_missing_from_window_is_none():
+    dates = [date(2023, 3, 31), date(2023, 6, 30), date(2023, 9, 30)]
+    dates += [date(2023, 12, 31), date(2024, 3, 31), date(2024, 6, 30)]
+    rows = [(d, {"revenue": "10"}) for d in dates]
+    rows[0][1]["one_off"] = "5"
+    cash_flow = _quarters("cash_flow", rows)
+
+    fields = TTMService.build_ttm_history({"cash_flow": cash_flow})["cash_flow"][
+        "fields"
+    ]
+
+    assert fields["revenue"] == [40, 40, 40]
+    assert fields["one_off"] == [5, None, None]
+
+
+async def test_compute_ttm_history_no_data_returns_none():
+    session = _make_session()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session.execute = AsyncMock(return_value=result)
+
+    assert await TTMService(session).compute_ttm_history(stock_id=1) is None